@@ -3,7 +3,7 @@ from django import forms
 from django.db import models
 from django.urls import reverse
 from django.utils.html import format_html
-from .models import Challenge, Submission, Tag, Badge, Profile
+from .models import Challenge, Submission, Tag, Badge, Profile, TestCase
 
 
 @admin.register(Tag)
@@ -85,10 +85,19 @@ class SubmissionInline(admin.TabularInline):
     ordering = ("-created_at",)
 
 
+class TestCaseInline(admin.TabularInline):
+    model = TestCase
+    extra = 1
+    fields = ("order", "input", "expected_output", "is_hidden")
+    formfield_overrides = {
+        models.TextField: {'widget': forms.Textarea(attrs={'rows': 3, 'cols': 40})},
+    }
+
+
 @admin.register(Challenge)
 class ChallengeAdmin(admin.ModelAdmin):
     form = ChallengeAdminForm
-    inlines = [SubmissionInline]
+    inlines = [TestCaseInline, SubmissionInline]
 
     # List view
     list_display = ("title", "difficulty", "submissions_count", "created_at", "view_on_site")
@@ -167,7 +176,7 @@ class ChallengeAdmin(admin.ModelAdmin):
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
-    list_display = ("user", "challenge", "language", "status", "score", "created_at")
+    list_display = ("user", "challenge", "language", "status", "score", "passed_tests", "total_tests", "created_at")
     list_filter = ("status", "language")
     search_fields = ("user__username", "challenge__title")
 
@@ -0,0 +1,154 @@
+"""
+DB-backed dispatch queue for judging submissions.
+
+Submissions are created in the ``queued`` state by the submit view and picked
+up by ``manage.py run_judge_worker``. A worker claims a row by stamping
+``claimed_at`` with a conditional UPDATE, so several workers can drain the
+same table without judging a submission twice. The claimed submission is
+marked ``running`` and judged against all of its challenge's test cases
+(see ``coding_challenges.judging``). Claims older than
+``CLAIM_LEASE_SECONDS`` are treated as abandoned (crashed worker) and become
+claimable again.
+"""
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from . import judge0, judging, polling
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 120
+CLAIM_LEASE_SECONDS = 120
+DEFAULT_THREADS = 4
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+    return delay + random.uniform(0, delay / 2)
+
+
+def ready_queryset(now=None):
+    """Queued submissions that are due and not held by a live worker"""
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=CLAIM_LEASE_SECONDS)
+    return (
+        # Running without a Judge0 token means a worker was judging it in-process
+        Submission.objects.filter(Q(status='queued') | Q(status='running', external_token=''))
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale))
+    )
+
+
+def claim_jobs(limit):
+    """Claim up to ``limit`` due submissions, oldest first, and return their ids"""
+    now = timezone.now()
+    candidates = list(
+        ready_queryset(now).order_by('created_at').values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for submission_id in candidates:
+        # The conditional update only succeeds for one worker per row
+        if ready_queryset(now).filter(id=submission_id).update(claimed_at=now):
+            claimed.append(submission_id)
+    return claimed
+
+
+def _schedule_retry(submission, error):
+    attempts = submission.attempts + 1
+    delay = backoff_delay(attempts)
+    Submission.objects.filter(id=submission.id).update(
+        status='queued',
+        attempts=attempts,
+        claimed_at=None,
+        next_attempt_at=timezone.now() + timedelta(seconds=delay),
+        result_raw={'error': str(error), 'attempts': attempts},
+    )
+    logger.warning(
+        f"Judge0 dispatch failed for submission {submission.id} "
+        f"(attempt {attempts}/{MAX_ATTEMPTS}), retrying in {delay:.1f}s: {str(error)}"
+    )
+
+
+def _mark_failed(submission, error):
+    submission.attempts += 1
+    submission.status = 'error'
+    submission.claimed_at = None
+    submission.result_raw = {'error': str(error), 'attempts': submission.attempts}
+    submission.save(update_fields=['attempts', 'status', 'claimed_at', 'result_raw'])
+    logger.error(f"Failed to process submission {submission.id}: {str(error)}")
+
+
+def dispatch_submission(submission_id):
+    """Judge a claimed submission. Returns True once it has a final result."""
+    submission = Submission.objects.select_related('challenge').get(id=submission_id)
+    if submission.status not in ('queued', 'running') or submission.external_token:
+        return False
+
+    Submission.objects.filter(id=submission.id).update(status='running')
+    try:
+        judging.judge_submission(submission)
+    except Exception as e:
+        if judge0.is_transient_error(e) and submission.attempts + 1 < MAX_ATTEMPTS:
+            _schedule_retry(submission, e)
+        else:
+            _mark_failed(submission, e)
+        return False
+
+    submission.attempts += 1
+    submission.claimed_at = None
+    # post_save scores the final result
+    submission.save(update_fields=judging.RESULT_UPDATE_FIELDS + ['attempts', 'claimed_at'])
+    return True
+
+
+def _run_job(submission_id):
+    try:
+        return dispatch_submission(submission_id)
+    except Exception as e:
+        logger.exception(f"Unexpected error dispatching submission {submission_id}: {str(e)}")
+        return False
+    finally:
+        close_old_connections()
+
+
+def run_worker(threads=DEFAULT_THREADS, poll_interval=DEFAULT_POLL_INTERVAL, once=False,
+               poll_results=True, stop_event=None):
+    """
+    Drain the queue with a bounded thread pool.
+
+    At most ``threads`` submissions are claimed per round, so a worker never
+    holds more leases than it can process. Between rounds running submissions
+    are refreshed with batched Judge0 polls unless ``poll_results`` is False.
+    With ``once`` the worker exits as soon as no due submissions remain.
+    Returns the number dispatched.
+    """
+    dispatched = 0
+    last_poll = 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='judge-worker') as pool:
+        while not (stop_event and stop_event.is_set()):
+            if poll_results and time.monotonic() - last_poll >= poll_interval:
+                last_poll = time.monotonic()
+                try:
+                    polling.poll_running()
+                except Exception as e:
+                    logger.exception(f"Judge0 result poll failed: {str(e)}")
+            ids = claim_jobs(threads)
+            if ids:
+                dispatched += sum(1 for ok in pool.map(_run_job, ids) if ok)
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+    return dispatched
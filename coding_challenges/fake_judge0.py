@@ -0,0 +1,193 @@
+"""
+In-process fake of the Judge0 REST API for offline testing and benchmarking.
+
+It does not execute anything. A submission "passes" by echoing its
+``expected_output`` (or its stdin when none was given). Markers in the source
+code force other verdicts::
+
+    # fake: wrong    -> 4 Wrong Answer
+    # fake: tle      -> 5 Time Limit Exceeded
+    # fake: error    -> 11 Runtime Error (NZEC)
+    # fake: echo     -> prints its stdin; 4 Wrong Answer unless that matches
+
+Submissions report status 2 (Processing) until ``processing_ms`` has passed.
+``latency_ms`` delays every response and ``failure_rate`` answers that share
+of requests with a 503, to exercise retries and the circuit breaker.
+"""
+import json
+import time
+import uuid
+import base64
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+VERDICTS = {
+    'wrong': (4, 'Wrong Answer'),
+    'tle': (5, 'Time Limit Exceeded'),
+    'error': (11, 'Runtime Error (NZEC)'),
+}
+
+
+def _decode(value, encoded):
+    if value is None:
+        return None
+    return base64.b64decode(value).decode('utf-8', errors='replace') if encoded else value
+
+
+def _encode(value, encoded):
+    if value is None:
+        return None
+    return base64.b64encode(value.encode()).decode() if encoded else value
+
+
+class FakeJudge0Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _begin(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000)
+        if server.failure_rate and random.random() < server.failure_rate:
+            self._send_json(503, {'error': 'Service Unavailable'})
+            return False
+        return True
+
+    def do_POST(self):
+        # Always consume the body so the keep-alive connection stays in sync
+        payload = self._read_json()
+        if not self._begin():
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        encoded = query.get('base64_encoded', ['false'])[0] == 'true'
+
+        if url.path.rstrip('/') == '/submissions/batch':
+            tokens = [{'token': self.server.create(item, encoded)} for item in payload.get('submissions', [])]
+            self._send_json(201, tokens)
+        elif url.path.rstrip('/') == '/submissions':
+            token = self.server.create(payload, encoded)
+            if query.get('wait', ['false'])[0] == 'true':
+                self._send_json(201, self.server.result(token, encoded, wait=True))
+            else:
+                self._send_json(201, {'token': token})
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        encoded = query.get('base64_encoded', ['false'])[0] == 'true'
+        path = url.path.rstrip('/')
+
+        if path == '/submissions/batch':
+            tokens = [t for t in query.get('tokens', [''])[0].split(',') if t]
+            self._send_json(200, {'submissions': [self.server.result(t, encoded) for t in tokens]})
+        elif path.startswith('/submissions/'):
+            result = self.server.result(path.rsplit('/', 1)[-1], encoded)
+            if result is None:
+                self._send_json(404, {'error': 'Not found'})
+            else:
+                self._send_json(200, result)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+
+class FakeJudge0Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, processing_ms=0, failure_rate=0.0):
+        super().__init__((host, port), FakeJudge0Handler)
+        self.latency_ms = latency_ms
+        self.processing_ms = processing_ms
+        self.failure_rate = failure_rate
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self.submissions = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def create(self, payload, encoded):
+        source = _decode(payload.get('source_code'), encoded) or ''
+        stdin = _decode(payload.get('stdin'), encoded) or ''
+        expected = _decode(payload.get('expected_output'), encoded)
+
+        status_id, description, stdout = 3, 'Accepted', expected if expected is not None else stdin
+        if '# fake: echo' in source:
+            stdout = stdin
+            if expected is not None and stdin.strip() != expected.strip():
+                status_id, description = 4, 'Wrong Answer'
+        for marker, verdict in VERDICTS.items():
+            if f'# fake: {marker}' in source:
+                status_id, description = verdict
+                stdout = '' if marker != 'wrong' else (stdout or '') + ' (wrong)'
+                break
+
+        token = str(uuid.uuid4())
+        with self.lock:
+            self.submissions[token] = {
+                'created': time.monotonic(),
+                'status': {'id': status_id, 'description': description},
+                'stdout': stdout,
+                'time': f"{random.uniform(0.001, 0.05):.3f}",
+                'memory': random.randint(3000, 12000),
+            }
+        return token
+
+    def result(self, token, encoded, wait=False):
+        with self.lock:
+            sub = self.submissions.get(token)
+        if sub is None:
+            return None
+        remaining = self.processing_ms / 1000 - (time.monotonic() - sub['created'])
+        if remaining > 0 and wait:
+            time.sleep(remaining)
+        elif remaining > 0:
+            return {'token': token, 'status': {'id': 2, 'description': 'Processing'},
+                    'stdout': None, 'stderr': None, 'compile_output': None,
+                    'message': None, 'time': None, 'memory': None}
+        return {
+            'token': token,
+            'status': sub['status'],
+            'stdout': _encode(sub['stdout'], encoded),
+            'stderr': None,
+            'compile_output': None,
+            'message': None,
+            'time': sub['time'],
+            'memory': sub['memory'],
+        }
+
+    def start(self):
+        """Serve from a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-judge0', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
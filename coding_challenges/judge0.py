@@ -0,0 +1,388 @@
+"""
+Judge0 HTTP client.
+
+All Judge0 traffic goes through one process-wide ``Judge0Client``: a
+``requests.Session`` with a sized connection pool (keep-alive, so the
+TCP+TLS handshake to the RapidAPI host is paid once per connection rather
+than per call), per-call timeouts, a circuit breaker that fails fast while
+the runner is down, and latency metrics per operation.
+"""
+import json
+import time
+import base64
+import logging
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+JUDGE0_TIMEOUT = 30
+JUDGE0_CONNECT_TIMEOUT = 5
+# Judge0 caps GET /submissions/batch at 20 tokens per request
+BATCH_SIZE = 20
+RESULT_FIELDS = 'token,status,stdout,stderr,compile_output,message,time,memory'
+
+LANGUAGE_MAP = {
+    # Judge0 language IDs (CE version). These may change; adjust as needed.
+    'python': 71,       # Python (3.8.1)
+    'cpp': 54,          # C++ (GCC 9.2.0)
+    'java': 62,         # Java (OpenJDK 13.0.1)
+    'javascript': 63,   # JavaScript (Node.js 12.14.0)
+}
+
+STATUS_MAP = {
+    1: 'queued',     # In Queue
+    2: 'running',    # Processing
+    3: 'passed',     # Accepted
+    4: 'failed',     # Wrong Answer
+    5: 'timeout',    # Time Limit Exceeded
+    6: 'error',      # Compilation Error
+    7: 'error',      # Runtime Error (SIGSEGV)
+    8: 'error',      # Runtime Error (SIGXFSZ)
+    9: 'error',      # Runtime Error (SIGFPE)
+    10: 'error',     # Runtime Error (SIGABRT)
+    11: 'error',     # Runtime Error (NZEC)
+    12: 'error',     # Runtime Error (Other)
+    13: 'error',     # Internal Error
+    14: 'error',     # Exec Format Error
+}
+
+FINAL_STATUSES = ('passed', 'failed', 'error', 'timeout')
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while the circuit breaker is open"""
+
+
+def _b64(value):
+    return base64.b64encode((value or '').encode()).decode()
+
+
+def submission_payload(language, code, stdin='', expected_output=None, time_limit_ms=None, memory_limit_kb=None):
+    """Build the (base64 encoded) JSON body for one Judge0 submission"""
+    language_id = LANGUAGE_MAP.get(language)
+    if not language_id:
+        raise ValueError(f"Unsupported language: {language}")
+
+    data = {
+        "language_id": language_id,
+        "source_code": _b64(code),
+        "stdin": _b64(stdin),
+        "redirect_stderr_to_stdout": True,
+    }
+    if expected_output is not None:
+        data["expected_output"] = _b64(expected_output)
+    if time_limit_ms:
+        data["cpu_time_limit"] = time_limit_ms / 1000
+    if memory_limit_kb:
+        data["memory_limit"] = memory_limit_kb
+    return data
+
+
+def judge0_headers():
+    headers = {"Content-Type": "application/json"}
+    if settings.JUDGE0_API_HOST and settings.JUDGE0_API_KEY:
+        headers.update({
+            "X-RapidAPI-Host": settings.JUDGE0_API_HOST,
+            "X-RapidAPI-Key": settings.JUDGE0_API_KEY,
+        })
+    return headers
+
+
+def is_transient_error(exc):
+    """Return True if a Judge0 error is worth retrying (network, 429 or 5xx)"""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(exc, 'response', None)
+    if response is not None:
+        return response.status_code == 429 or response.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` transient failures in a row the circuit opens
+    and calls fail immediately for ``reset_timeout`` seconds. Then a single
+    trial call is let through (half-open); its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Judge0 circuit opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyStats:
+    """Thread-safe call counters and a rolling window of latencies per operation"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._ops = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, op):
+        stats = self._ops.get(op)
+        if stats is None:
+            stats = self._ops[op] = {
+                'calls': 0, 'errors': 0, 'rejected': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'samples': deque(maxlen=self.window),
+            }
+        return stats
+
+    def record(self, op, elapsed_ms, ok):
+        with self._lock:
+            stats = self._entry(op)
+            stats['calls'] += 1
+            if not ok:
+                stats['errors'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['samples'].append(elapsed_ms)
+
+    def record_rejected(self, op):
+        with self._lock:
+            self._entry(op)['rejected'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for op, stats in self._ops.items():
+                samples = sorted(stats['samples'])
+                calls = stats['calls']
+                result[op] = {
+                    'calls': calls,
+                    'errors': stats['errors'],
+                    'rejected': stats['rejected'],
+                    'avg_ms': round(stats['total_ms'] / calls, 2) if calls else 0,
+                    'p50_ms': round(_percentile(samples, 50), 2),
+                    'p95_ms': round(_percentile(samples, 95), 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+
+def _percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class Judge0Client:
+    """Pooled keep-alive client for the Judge0 REST API"""
+
+    def __init__(self, base_url=None, pool_size=None, timeout=JUDGE0_TIMEOUT,
+                 connect_timeout=JUDGE0_CONNECT_TIMEOUT, breaker=None):
+        self.base_url = (base_url or settings.JUDGE0_API_URL).rstrip('/')
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=getattr(settings, 'JUDGE0_BREAKER_THRESHOLD', 5),
+            reset_timeout=getattr(settings, 'JUDGE0_BREAKER_RESET_SECONDS', 30),
+        )
+        self.metrics = LatencyStats()
+
+        pool_size = pool_size or getattr(settings, 'JUDGE0_POOL_SIZE', 10)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(judge0_headers())
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, op, method, path, timeout=None, **kwargs):
+        if not self.breaker.allow():
+            self.metrics.record_rejected(op)
+            raise CircuitOpenError("Judge0 circuit breaker is open; runner considered unavailable")
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.request(
+                method,
+                f"{self.base_url}{path}",
+                timeout=(self.connect_timeout, timeout or self.timeout),
+                **kwargs
+            )
+            response.raise_for_status()
+            ok = True
+        except requests.RequestException as e:
+            if is_transient_error(e):
+                self.breaker.record_failure()
+            else:
+                # The runner answered; a 4xx is our problem, not an outage
+                self.breaker.record_success()
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record(op, elapsed_ms, ok)
+            logger.debug(f"Judge0 {op} took {elapsed_ms:.1f} ms (ok={ok})")
+
+        self.breaker.record_success()
+        return response
+
+    def create_submission(self, language, code, stdin='', expected_output=None, timeout=None,
+                          time_limit_ms=None, memory_limit_kb=None):
+        """Send source code to Judge0 without waiting for the result and return its token"""
+        data = submission_payload(language, code, stdin, expected_output, time_limit_ms, memory_limit_kb)
+        response = self._request(
+            'create', 'POST', '/submissions',
+            params={'base64_encoded': 'true', 'wait': 'false'},
+            data=json.dumps(data),
+            timeout=timeout,
+        )
+        token = response.json().get('token')
+        if not token:
+            raise ValueError("No token received from Judge0")
+        return token
+
+    def create_submissions_batch(self, payloads, timeout=None):
+        """Create up to BATCH_SIZE submissions (see submission_payload) in one request. Returns their tokens in order."""
+        if not payloads:
+            return []
+        if len(payloads) > BATCH_SIZE:
+            raise ValueError(f"At most {BATCH_SIZE} submissions per batch request")
+
+        response = self._request(
+            'create_batch', 'POST', '/submissions/batch',
+            params={'base64_encoded': 'true'},
+            data=json.dumps({'submissions': payloads}),
+            timeout=timeout,
+        )
+        tokens = [(item or {}).get('token') for item in response.json()]
+        if len(tokens) != len(payloads) or not all(tokens):
+            raise ValueError(f"Judge0 rejected part of the batch: {response.text[:500]}")
+        return tokens
+
+    def get_submission(self, token, timeout=None):
+        """Fetch a single submission result (base64 encoded fields)"""
+        response = self._request(
+            'get', 'GET', f'/submissions/{token}',
+            params={'base64_encoded': 'true'},
+            timeout=timeout,
+        )
+        return response.json()
+
+    def get_submissions_batch(self, tokens, timeout=None):
+        """Fetch up to BATCH_SIZE results in one request. Returns {token: result}."""
+        if not tokens:
+            return {}
+        if len(tokens) > BATCH_SIZE:
+            raise ValueError(f"At most {BATCH_SIZE} tokens per batch request")
+
+        response = self._request(
+            'batch', 'GET', '/submissions/batch',
+            params={
+                'tokens': ','.join(tokens),
+                'base64_encoded': 'true',
+                'fields': RESULT_FIELDS,
+            },
+            timeout=timeout,
+        )
+        results = {}
+        # Unknown tokens come back as null entries
+        for item in response.json().get('submissions') or []:
+            if item and item.get('token'):
+                results[item['token']] = item
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide Judge0 client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Judge0Client()
+    return _client
+
+
+def create_submission(language, code, stdin='', expected_output=None, timeout=None,
+                      time_limit_ms=None, memory_limit_kb=None):
+    return get_client().create_submission(
+        language, code, stdin, expected_output, timeout=timeout,
+        time_limit_ms=time_limit_ms, memory_limit_kb=memory_limit_kb,
+    )
+
+
+def get_submission(token, timeout=None):
+    return get_client().get_submission(token, timeout=timeout)
+
+
+def get_submissions_batch(tokens, timeout=None):
+    return get_client().get_submissions_batch(tokens, timeout=timeout)
+
+
+def map_status(data):
+    """Map a Judge0 result to our simple submission status"""
+    status_id = (data.get('status') or {}).get('id')
+    return STATUS_MAP.get(status_id, 'running')
+
+
+def parse_metrics(data):
+    """Return (runtime_ms, memory_kb) from a Judge0 result; Judge0 reports time in seconds"""
+    try:
+        runtime_ms = int(round(float(data.get('time') or 0) * 1000))
+    except (TypeError, ValueError):
+        runtime_ms = 0
+    try:
+        memory_kb = int(data.get('memory') or 0)
+    except (TypeError, ValueError):
+        memory_kb = 0
+    return runtime_ms, memory_kb
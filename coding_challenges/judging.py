@@ -0,0 +1,106 @@
+"""
+Multi-test judging.
+
+A submission is run against every ``TestCase`` of its challenge (or the
+example input/output when it has none). The runner (see ``runners``) fans
+the tests out at once, they execute concurrently, and results are consumed
+as they finish: with early exit the first failing test ends the judging
+without waiting for the rest. Per-test verdicts, runtime and memory are kept in
+``result_raw['tests']`` and aggregated into the submission (status of the
+first failing test, passed/total tests, max runtime and memory).
+"""
+import time
+import logging
+
+from django.conf import settings
+
+from .runners import get_runner
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock budget for judging one submission; keep below CLAIM_LEASE_SECONDS
+JUDGE_DEADLINE_SECONDS = 90
+# Output kept per visible test in result_raw
+OUTPUT_PREVIEW_CHARS = 1000
+
+RESULT_UPDATE_FIELDS = ['status', 'score', 'runtime_ms', 'memory_kb', 'passed_tests', 'total_tests', 'result_raw']
+
+
+def get_tests(challenge):
+    """[(input, expected_output, is_hidden)] for a challenge, in order"""
+    tests = list(challenge.test_cases.values_list('input', 'expected_output', 'is_hidden'))
+    if not tests:
+        tests = [(challenge.example_input or '', challenge.example_output or '', False)]
+    return tests
+
+
+def aggregate(tests, results, early_exit):
+    """Fold per-test results (None for tests not run) into submission fields"""
+    summary = []
+    status = 'passed'
+    for index, ((_, _, hidden), result) in enumerate(zip(tests, results)):
+        if result is None:
+            summary.append({'index': index, 'status': 'skipped'})
+            continue
+        entry = {key: result[key] for key in ('status', 'description', 'runtime_ms', 'memory_kb')}
+        entry['index'] = index
+        if not hidden:
+            entry['stdout'] = result['stdout'][:OUTPUT_PREVIEW_CHARS]
+            entry['stderr'] = result['stderr'][:OUTPUT_PREVIEW_CHARS]
+        summary.append(entry)
+        if status == 'passed' and result['status'] != 'passed':
+            # The verdict is that of the first failing test in test order
+            status = result['status']
+
+    finished = [r for r in results if r is not None]
+    if len(finished) < len(tests) and status == 'passed':
+        status = 'error'
+    passed = sum(1 for r in finished if r['status'] == 'passed')
+    return {
+        'status': status,
+        'score': round(passed / len(tests) * 100, 1) if tests else 0,
+        'runtime_ms': max((r['runtime_ms'] for r in finished), default=0),
+        'memory_kb': max((r['memory_kb'] for r in finished), default=0),
+        'passed_tests': passed,
+        'total_tests': len(tests),
+        'result_raw': {'tests': summary, 'early_exit': early_exit},
+    }
+
+
+def judge_submission(submission, runner=None, early_exit=None):
+    """
+    Run ``submission`` against its challenge's tests and set the aggregated
+    result fields on it (without saving). Runner errors propagate.
+    """
+    if early_exit is None:
+        early_exit = getattr(settings, 'JUDGE_EARLY_EXIT', True)
+    runner = runner or get_runner(submission.language)
+    challenge = submission.challenge
+    tests = get_tests(challenge)
+
+    results = [None] * len(tests)
+    started = time.monotonic()
+    runs = runner.run(
+        submission.language,
+        submission.code,
+        tests,
+        time_limit_ms=challenge.time_limit_ms,
+        memory_limit_kb=challenge.memory_limit_kb,
+        deadline=started + JUDGE_DEADLINE_SECONDS,
+    )
+    try:
+        for index, result in runs:
+            results[index] = result
+            if early_exit and result['status'] != 'passed':
+                break
+    finally:
+        runs.close()
+
+    for field, value in aggregate(tests, results, early_exit).items():
+        setattr(submission, field, value)
+    logger.info(
+        f"Judged submission {submission.id}: {submission.status} "
+        f"({submission.passed_tests}/{submission.total_tests} tests) "
+        f"in {(time.monotonic() - started) * 1000:.0f} ms"
+    )
+    return submission
@@ -0,0 +1,213 @@
+"""
+Leaderboards for coding challenges.
+
+The all-time board is materialized in ``LeaderboardEntry``: one row per
+ranked profile with its position, ordered by (points desc, solved desc,
+profile id). Looking up a user's rank or a page of the board is an indexed
+lookup on ``rank`` rather than a sort or an OFFSET scan.
+
+When scoring changes a profile, ``record_score_change`` moves just that
+entry: the entries it overtook shift by one in a single UPDATE and it takes
+their top slot, so the work is proportional to the places gained, not the
+size of the board. A profile that is not on the board yet is first inserted
+where its old score ranks. ``rebuild`` (``manage.py rebuild_leaderboard``) recomputes
+everything and repairs any drift, e.g. after profiles are deleted or edited
+in the admin.
+
+Weekly and monthly boards are aggregated from ``Submission.created_at`` and
+cached for ``PERIOD_CACHE_TTL`` seconds.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Q, Sum, Value, When
+from django.utils import timezone
+
+from . import scoring
+from .models import LeaderboardEntry, Profile, Submission
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+PERIODS = {
+    'weekly': 7,
+    'monthly': 30,
+}
+PERIOD_CACHE_TTL = 300
+
+
+def _ranked_profiles():
+    return Profile.objects.filter(Q(points__gt=0) | Q(solved_count__gt=0))
+
+
+def rebuild():
+    """Recompute the whole all-time board. Returns the number of ranked profiles."""
+    rows = (
+        _ranked_profiles()
+        .order_by('-points', '-solved_count', 'id')
+        .values_list('id', 'points', 'solved_count')
+    )
+    entries = [
+        LeaderboardEntry(profile_id=profile_id, rank=rank, points=points, solved_count=solved)
+        for rank, (profile_id, points, solved) in enumerate(rows.iterator(), start=1)
+    ]
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    logger.info(f"Rebuilt leaderboard with {len(entries)} entries")
+    return len(entries)
+
+
+def _worse_than(points, solved, profile_id):
+    return (
+        Q(points__lt=points)
+        | Q(points=points, solved_count__lt=solved)
+        | Q(points=points, solved_count=solved, profile_id__gt=profile_id)
+    )
+
+
+def _better_than(points, solved, profile_id):
+    return (
+        Q(points__gt=points)
+        | Q(points=points, solved_count__gt=solved)
+        | Q(points=points, solved_count=solved, profile_id__lt=profile_id)
+    )
+
+
+def record_score_change(profile_id, old_points, old_solved, new_points, new_solved):
+    """Move a profile's entry after its score changed"""
+    with transaction.atomic():
+        entry = LeaderboardEntry.objects.filter(profile_id=profile_id).first()
+        if entry is None:
+            # Not on the board yet: insert it where its old score ranks, below the entries that beat it
+            rank = LeaderboardEntry.objects.filter(_better_than(old_points, old_solved, profile_id)).count() + 1
+            LeaderboardEntry.objects.filter(rank__gte=rank).update(rank=F('rank') + 1)
+            entry = LeaderboardEntry.objects.create(
+                profile_id=profile_id, rank=rank, points=old_points, solved_count=old_solved
+            )
+
+        others = LeaderboardEntry.objects.exclude(profile_id=profile_id)
+        improved = (new_points, new_solved) > (old_points, old_solved)
+        if improved:
+            # Entries above us that the new score beats slide down one place
+            moved = others.filter(
+                _worse_than(new_points, new_solved, profile_id),
+                rank__lt=entry.rank,
+                points__gte=old_points,
+            ).update(rank=F('rank') + 1)
+            entry.rank -= moved
+        else:
+            # Entries below us that now beat our score slide up one place
+            moved = others.filter(
+                rank__gt=entry.rank,
+                points__lte=old_points,
+            ).exclude(
+                _worse_than(new_points, new_solved, profile_id)
+            ).update(rank=F('rank') - 1)
+            entry.rank += moved
+
+        entry.points = new_points
+        entry.solved_count = new_solved
+        entry.save(update_fields=['rank', 'points', 'solved_count', 'updated_at'])
+    return entry.rank
+
+
+def period_board(period):
+    """Ranked (user_id, points, solved) rows for a rolling period, cached"""
+    cache_key = f"cc:leaderboard:{period}"
+    board = cache.get(cache_key)
+    if board is not None:
+        return board
+
+    since = timezone.now() - timedelta(days=PERIODS[period])
+    points = Sum(
+        Case(
+            *[When(status=status, then=Value(value)) for status, value in scoring.POINTS.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    rows = (
+        Submission.objects.filter(created_at__gte=since, status__in=list(scoring.POINTS), scored=True)
+        .values('user_id')
+        .annotate(points=points, solved=Count('challenge_id', filter=Q(status='passed'), distinct=True))
+        .order_by('-points', '-solved', 'user_id')
+        .values_list('user_id', 'points', 'solved')
+    )
+    rows = list(rows)
+    board = {
+        'rows': rows,
+        'ranks': {user_id: rank for rank, (user_id, _, _) in enumerate(rows, start=1)},
+    }
+    cache.set(cache_key, board, PERIOD_CACHE_TTL)
+    return board
+
+
+def get_rank(user, period=None):
+    """1-based rank of the user on the given board, or None if unranked"""
+    if period in PERIODS:
+        return period_board(period)['ranks'].get(user.id)
+    return (
+        LeaderboardEntry.objects.filter(profile__user_id=user.id)
+        .values_list('rank', flat=True)
+        .first()
+    )
+
+
+def get_page(page=1, period=None):
+    """
+    One page of a board as Profile objects annotated with ``rank``,
+    ``board_points`` and ``board_solved``, plus paging information.
+    """
+    page = max(1, page)
+    start = (page - 1) * PAGE_SIZE
+
+    if period in PERIODS:
+        board = period_board(period)
+        total = len(board['rows'])
+        top_points = board['rows'][0][1] if board['rows'] else 0
+        window = board['rows'][start:start + PAGE_SIZE]
+        profiles = {
+            p.user_id: p
+            for p in Profile.objects.filter(user_id__in=[row[0] for row in window])
+            .select_related('user').prefetch_related('badges')
+        }
+        rows = []
+        for rank, (user_id, points, solved) in enumerate(window, start=start + 1):
+            profile = profiles.get(user_id)
+            if profile is None:
+                continue
+            profile.rank, profile.board_points, profile.board_solved = rank, points, solved
+            rows.append(profile)
+    else:
+        total = LeaderboardEntry.objects.aggregate(last=Max('rank'))['last'] or 0
+        if not total and _ranked_profiles().exists():
+            total = rebuild()
+        entries = (
+            LeaderboardEntry.objects.filter(rank__gt=start, rank__lte=start + PAGE_SIZE)
+            .select_related('profile__user')
+            .prefetch_related('profile__badges')
+            .order_by('rank')
+        )
+        rows = []
+        for entry in entries:
+            profile = entry.profile
+            profile.rank, profile.board_points, profile.board_solved = entry.rank, entry.points, entry.solved_count
+            rows.append(profile)
+        top_points = (
+            rows[0].board_points if page == 1 and rows
+            else LeaderboardEntry.objects.filter(rank=1).values_list('points', flat=True).first() or 0
+        )
+
+    num_pages = max(1, -(-total // PAGE_SIZE))
+    return {
+        'rows': rows,
+        'page': page,
+        'num_pages': num_pages,
+        'has_previous': page > 1,
+        'has_next': page < num_pages,
+        'total': total,
+        'top_points': top_points,
+    }
@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from coding_challenges import judge0
+from coding_challenges.fake_judge0 import FakeJudge0Server
+
+
+class Command(BaseCommand):
+    help = "Benchmark the pooled Judge0 client against one-connection-per-call requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Submissions per run')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Latency of the fake server')
+        parser.add_argument('--url', help='Benchmark an existing Judge0 instead of the in-process fake')
+
+    def handle(self, *args, **options):
+        server = None
+        url = options['url']
+        if not url:
+            server = FakeJudge0Server(latency_ms=options['latency_ms'])
+            url = server.start()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Benchmarking Judge0 at {url}"))
+
+        n, concurrency = options['requests'], options['concurrency']
+        client = judge0.Judge0Client(base_url=url, pool_size=concurrency)
+        headers = judge0.judge0_headers()
+
+        def pooled(i):
+            token = client.create_submission('python', f'print({i})', stdin=str(i))
+            client.get_submission(token)
+
+        def unpooled(i):
+            # What every view used to do: bare requests calls, a new connection each time
+            r = requests.post(f"{url}/submissions?base64_encoded=true&wait=false", headers=headers,
+                              data='{"language_id": 71, "source_code": "", "stdin": ""}', timeout=30)
+            r.raise_for_status()
+            requests.get(f"{url}/submissions/{r.json()['token']}?base64_encoded=true",
+                         headers=headers, timeout=30).raise_for_status()
+
+        try:
+            for label, fn in (('unpooled', unpooled), ('pooled', pooled)):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    list(pool.map(fn, range(n)))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:>9}: {n} submissions in {elapsed:.2f}s "
+                    f"({n / elapsed:.1f}/s, {elapsed / n * 1000:.2f} ms per create+get)"
+                )
+            for op, stats in client.metrics.snapshot().items():
+                self.stdout.write(f"  pooled {op}: {stats}")
+        finally:
+            client.close()
+            if server:
+                server.stop()
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from coding_challenges import judge0, judging, runners
+from coding_challenges.fake_judge0 import FakeJudge0Server
+from coding_challenges.models import Challenge, Submission, TestCase
+
+
+class Command(BaseCommand):
+    help = "Judge a benchmark challenge to compare fan-out, sequential and early-exit judging"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runner', choices=sorted(runners.RUNNERS), default='judge0',
+                            help='judge0 uses an in-process fake Judge0; local runs real subprocesses')
+        parser.add_argument('--tests', type=int, default=10, help='Test cases per challenge')
+        parser.add_argument('--processing-ms', type=int, default=300, help='Execution time per test on the fake server')
+        parser.add_argument('--fail-at', type=int, default=2, help='Index of the failing test for the early-exit runs')
+
+    def _judge(self, label, submission, runner, early_exit):
+        started = time.perf_counter()
+        judging.judge_submission(submission, runner=runner, early_exit=early_exit)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"{label:>22}: {submission.status:<7} {submission.passed_tests}/{submission.total_tests} passed, "
+            f"{elapsed:.0f} ms, max runtime {submission.runtime_ms} ms, max memory {submission.memory_kb} KB"
+        )
+
+    def handle(self, *args, **options):
+        n, processing_ms = options['tests'], options['processing_ms']
+        fail_at = min(max(options['fail_at'], 0), n - 1)
+        server = client = None
+        if options['runner'] == 'local':
+            runner = runners.LocalRunner()
+            started = time.perf_counter()
+            runner.warm_up()
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Judging {n} tests with the local runner ({runner.workers} workers, "
+                f"warmed in {(time.perf_counter() - started) * 1000:.0f} ms)"
+            ))
+        else:
+            server = FakeJudge0Server(processing_ms=processing_ms)
+            url = server.start()
+            client = judge0.Judge0Client(base_url=url)
+            runner = runners.Judge0Runner(client=client)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Judging {n} tests against a fake Judge0 at {url} ({processing_ms} ms per test)"
+            ))
+
+        try:
+            with transaction.atomic():
+                challenge = Challenge.objects.create(title='Judging benchmark', problem_statement='-')
+                TestCase.objects.bulk_create([
+                    # Test fail_at is the only one whose expected output differs from its input
+                    TestCase(challenge=challenge, order=i, input=str(i),
+                             expected_output=str(i) if i != fail_at else 'mismatch')
+                    for i in range(n)
+                ])
+                passing = Submission(challenge=challenge, language='python',
+                                     code=f"x = input()\nprint('mismatch' if x == '{fail_at}' else x)")
+                echo = Submission(challenge=challenge, language='python', code='# fake: echo\nprint(input())')
+
+                self._judge('fan-out, all pass', passing, runner, early_exit=False)
+
+                # Baseline: one test at a time, each waiting for its result
+                started = time.perf_counter()
+                tests = judging.get_tests(challenge)
+                for test in tests:
+                    list(runner.run('python', passing.code, [test]))
+                elapsed = (time.perf_counter() - started) * 1000
+                self.stdout.write(f"{'sequential, all pass':>22}: {len(tests)} tests, {elapsed:.0f} ms")
+
+                self._judge(f'fail at #{fail_at}, no exit', echo, runner, early_exit=False)
+                self._judge(f'fail at #{fail_at}, early exit', echo, runner, early_exit=True)
+                transaction.set_rollback(True)
+        finally:
+            if server:
+                self.stdout.write(f"Fake Judge0 served {server.request_count} requests")
+                client.close()
+                server.stop()
+            else:
+                runner.shutdown()
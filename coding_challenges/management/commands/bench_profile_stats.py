@@ -0,0 +1,94 @@
+import time
+import random
+import statistics
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coding_challenges.judge0 import LANGUAGE_MAP
+from coding_challenges.models import Challenge, Submission
+from coding_challenges.stats import compute_stats, submission_stats
+
+BENCH_USERNAME = 'bench_profile_stats'
+
+
+def legacy_stats(user):
+    """The per-counter queries profile_view used to run"""
+    return {
+        'solved': Submission.objects.filter(user=user, status='passed').values('challenge').distinct().count(),
+        'total': Challenge.objects.count(),
+        'total_submissions': Submission.objects.filter(user=user).count(),
+        'passed_submissions': Submission.objects.filter(user=user, status='passed').count(),
+        'failed_submissions': Submission.objects.filter(user=user, status='failed').count(),
+        'error_submissions': Submission.objects.filter(user=user, status='error').count(),
+        'pending_submissions': Submission.objects.filter(user=user, status__in=['queued', 'running']).count(),
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark profile statistics queries for a user with many submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=10000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark user and its submissions')
+
+    def _measure(self, label, fn, runs, before=None):
+        timings = []
+        for _ in range(runs):
+            if before:
+                before()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:>16}: {len(ctx.captured_queries)} queries, "
+            f"median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms"
+        )
+
+    def handle(self, *args, **options):
+        n, runs = options['submissions'], options['runs']
+        challenges = list(Challenge.objects.all()[:50])
+        if not challenges:
+            self.stderr.write("No challenges found; run seed_challenges first")
+            return
+
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        existing = Submission.objects.filter(user=user).count()
+        if existing < n:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Creating {n - existing} submissions"))
+            statuses = ['passed', 'failed', 'error', 'queued']
+            languages = list(LANGUAGE_MAP)
+            Submission.objects.bulk_create(
+                [
+                    Submission(
+                        user=user,
+                        challenge=random.choice(challenges),
+                        language=random.choice(languages),
+                        code='print(1)',
+                        status=random.choice(statuses),
+                        scored=True,
+                    )
+                    for _ in range(n - existing)
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Profile stats for {n} submissions, {runs} runs"))
+        try:
+            expected = legacy_stats(user)
+            actual = {key: value for key, value in compute_stats(user.id).items() if key in expected}
+            if actual != expected:
+                raise CommandError(f"Aggregate stats {actual} do not match {expected}")
+            self._measure('legacy', lambda: legacy_stats(user), runs)
+            self._measure('aggregate', lambda: compute_stats(user.id), runs)
+            self._measure('cached (cold)', lambda: submission_stats(user), runs, before=cache.clear)
+            submission_stats(user)
+            self._measure('cached (warm)', lambda: submission_stats(user), runs)
+        finally:
+            if not options['keep']:
+                user.delete()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from coding_challenges.fake_judge0 import FakeJudge0Server
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Judge0 API for offline development (set JUDGE0_API_URL to its address)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=2358)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response')
+        parser.add_argument('--processing-ms', type=int, default=0, help='Time a submission stays in Processing')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 503')
+
+    def handle(self, *args, **options):
+        server = FakeJudge0Server(
+            host=options['host'],
+            port=options['port'],
+            latency_ms=options['latency_ms'],
+            processing_ms=options['processing_ms'],
+            failure_rate=options['failure_rate'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fake Judge0 listening on {server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from coding_challenges import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized all-time leaderboard from profile points"
+
+    def handle(self, *args, **options):
+        count = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt: {count} ranked players"))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from coding_challenges import dispatch, runners
+
+
+class Command(BaseCommand):
+    help = "Judge queued submissions against their test cases and poll Judge0 for running ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=dispatch.DEFAULT_THREADS,
+                            help='Maximum number of submissions judged concurrently')
+        parser.add_argument('--poll-interval', type=float, default=dispatch.DEFAULT_POLL_INTERVAL,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--no-poll', action='store_true', help='Only dispatch; do not poll Judge0 for results')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Judge worker started ({threads} threads, {settings.CODE_RUNNER} runner)"
+        ))
+        if settings.CODE_RUNNER in ('local', 'auto'):
+            # Start the sandbox processes now so the first submissions do not pay for it
+            local = runners.get_runner(name='local')
+            self.stdout.write(f"Warmed {local.warm_up()} local runner processes")
+        try:
+            dispatched = dispatch.run_worker(
+                threads=threads,
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+                poll_results=not options['no_poll'],
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Judge worker stopped"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Judged {dispatched} submissions"))
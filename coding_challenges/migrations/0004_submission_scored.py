@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:19
+
+from django.db import migrations, models
+
+
+def mark_existing_results_scored(apps, schema_editor):
+    # Finished submissions were already counted by the old post_save handler
+    Submission = apps.get_model('coding_challenges', 'Submission')
+    Submission.objects.filter(status__in=['passed', 'failed', 'error', 'timeout']).update(scored=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding_challenges', '0003_submission_attempts_submission_claimed_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='scored',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_existing_results_scored, migrations.RunPython.noop),
+    ]
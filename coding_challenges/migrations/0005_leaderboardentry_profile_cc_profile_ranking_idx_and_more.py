@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def fill_leaderboard(apps, schema_editor):
+    """Rank the existing profiles, as coding_challenges.leaderboard.rebuild does"""
+    Profile = apps.get_model('coding_challenges', 'Profile')
+    LeaderboardEntry = apps.get_model('coding_challenges', 'LeaderboardEntry')
+    rows = (
+        Profile.objects.filter(Q(points__gt=0) | Q(solved_count__gt=0))
+        .order_by('-points', '-solved_count', 'id')
+        .values_list('id', 'points', 'solved_count')
+    )
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(profile_id=profile_id, rank=rank, points=points, solved_count=solved)
+        for rank, (profile_id, points, solved) in enumerate(rows.iterator(), start=1)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding_challenges', '0004_submission_scored'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to='coding_challenges.profile')),
+                ('rank', models.PositiveIntegerField(db_index=True)),
+                ('points', models.IntegerField(default=0)),
+                ('solved_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-points', '-solved_count'], name='cc_profile_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['points', 'solved_count'], name='coding_chal_points_cb2cf3_idx'),
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
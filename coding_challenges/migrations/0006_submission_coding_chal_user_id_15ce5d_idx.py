@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding_challenges', '0005_leaderboardentry_profile_cc_profile_ranking_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', '-created_at'], name='coding_chal_user_id_15ce5d_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding_challenges', '0006_submission_coding_chal_user_id_15ce5d_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestCase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('input', models.TextField(blank=True)),
+                ('expected_output', models.TextField(blank=True)),
+                ('is_hidden', models.BooleanField(default=True, help_text='Hidden tests never show their data to participants')),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_cases', to='coding_challenges.challenge')),
+            ],
+            options={
+                'ordering': ['order', 'id'],
+            },
+        ),
+    ]
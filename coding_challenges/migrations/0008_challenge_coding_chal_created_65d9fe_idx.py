@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding_challenges', '0007_testcase'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['created_at', 'id'], name='coding_chal_created_65d9fe_idx'),
+        ),
+    ]
@@ -44,6 +44,8 @@ class Challenge(models.Model):
     class Meta:
         verbose_name = 'Code Challenge'
         verbose_name_plural = 'Code Challenges'
+        # Keyset pagination (core.pagination)
+        indexes = [models.Index(fields=['created_at', 'id'])]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -62,6 +64,20 @@ class Challenge(models.Model):
         return f"{self.title} ({self.get_difficulty_display()})"
 
 
+class TestCase(models.Model):
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='test_cases')
+    input = models.TextField(blank=True)
+    expected_output = models.TextField(blank=True)
+    is_hidden = models.BooleanField(default=True, help_text="Hidden tests never show their data to participants")
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return f"{self.challenge.title} test #{self.order}"
+
+
 class Badge(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=120, unique=True, blank=True)
@@ -85,10 +101,33 @@ class Profile(models.Model):
     solved_count = models.PositiveIntegerField(default=0)
     last_activity = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points', '-solved_count'], name='cc_profile_ranking_idx'),
+        ]
+
     def __str__(self):
         return f"Profile({self.user.username})"
 
 
+class LeaderboardEntry(models.Model):
+    """Materialized all-time ranking, maintained by coding_challenges.leaderboard"""
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True, related_name='leaderboard_entry')
+    rank = models.PositiveIntegerField(db_index=True)
+    points = models.IntegerField(default=0)
+    solved_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['points', 'solved_count']),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.profile_id} ({self.points} pts)"
+
+
 class Submission(models.Model):
     STATUS_CHOICES = (
         ('queued', 'Queued'),
@@ -110,10 +149,20 @@ class Submission(models.Model):
     total_tests = models.PositiveIntegerField(default=0)
     result_raw = models.JSONField(default=dict, blank=True)
     external_token = models.CharField(max_length=64, blank=True)
+    # Dispatch queue bookkeeping (see coding_challenges.dispatch)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # Set once the result has been applied to the user's profile (see coding_challenges.scoring)
+    scored = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user} -> {self.challenge} [{self.language}] {self.status}"
@@ -132,27 +181,10 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=Submission)
 def update_profile_stats_on_submission(sender, instance: Submission, created, **kwargs):
-    if not created and instance.status in ['passed', 'failed', 'error'] or created:
-        # update stats
-        profile, _ = Profile.objects.get_or_create(user=instance.user)
-        # simple points scheme: pass = +10, fail = +1, error = 0
-        if instance.status == 'passed':
-            profile.points += 10
-        elif instance.status == 'failed':
-            profile.points += 1
-        profile.last_activity = timezone.now()
-        # recompute solved_count
-        solved_ids = (
-            Submission.objects.filter(user=instance.user, status='passed')
-            .values_list('challenge_id', flat=True)
-            .distinct()
-        )
-        profile.solved_count = len(solved_ids)
-        profile.save()
-
-        # Auto-award badges based on thresholds
-        for badge in Badge.objects.all():
-            if profile.points >= badge.points_threshold and badge not in profile.badges.all():
-                profile.badges.add(badge)
+    # Intermediate saves (queued/running) and already scored results cost no queries
+    if instance.scored or instance.status in ('queued', 'running'):
+        return
+    from .scoring import record_result
+    record_result(instance)
 
 # Create your models here.
@@ -0,0 +1,66 @@
+"""
+Batched Judge0 result polling.
+
+Collects every ``running`` submission that has an ``external_token``, asks
+Judge0 for up to ``judge0.BATCH_SIZE`` results per request and writes the
+finished ones back with a single ``bulk_update``. Request handlers only read
+the submission rows this keeps up to date.
+"""
+import logging
+
+import requests
+
+from . import judge0, scoring
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+RESULT_UPDATE_FIELDS = ['status', 'score', 'runtime_ms', 'memory_kb', 'result_raw']
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def apply_result(submission, data):
+    """Copy a finished Judge0 result onto the submission. Returns True if it is final."""
+    status = judge0.map_status(data)
+    if status not in judge0.FINAL_STATUSES:
+        return False
+    submission.status = status
+    submission.score = 100 if status == 'passed' else 0
+    submission.runtime_ms, submission.memory_kb = judge0.parse_metrics(data)
+    submission.result_raw = data
+    return True
+
+
+def poll_running(batch_size=judge0.BATCH_SIZE):
+    """Refresh all running submissions from Judge0. Returns the number finished."""
+    running = list(
+        Submission.objects.filter(status='running')
+        .exclude(external_token='')
+        .only('id', 'user_id', 'challenge_id', 'status', 'external_token', 'scored')
+        .order_by('id')
+    )
+    if not running:
+        return 0
+
+    finished = []
+    for chunk in _chunks(running, batch_size):
+        try:
+            results = judge0.get_submissions_batch([s.external_token for s in chunk])
+        except requests.RequestException as e:
+            logger.warning(f"Judge0 batch poll failed for {len(chunk)} submissions: {str(e)}")
+            continue
+        for submission in chunk:
+            data = results.get(submission.external_token)
+            if data and apply_result(submission, data):
+                finished.append(submission)
+
+    if finished:
+        Submission.objects.bulk_update(finished, RESULT_UPDATE_FIELDS, batch_size=200)
+        # bulk_update skips post_save, so score the results explicitly
+        scoring.record_results(finished)
+        logger.info(f"Updated {len(finished)} of {len(running)} running submissions from Judge0")
+    return len(finished)
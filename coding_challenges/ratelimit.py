@@ -0,0 +1,169 @@
+"""
+Sliding-window rate limiting on a shared cache.
+
+Each policy is a list of (window seconds, limit) pairs. For every window the
+limiter keeps one counter per fixed bucket and estimates the rate over the
+last ``window`` seconds as the current bucket plus the previous bucket
+weighted by how much of it still overlaps the sliding window. That gives a
+smooth limit without the burst-at-the-boundary of fixed windows, for two
+cache keys per window.
+
+Requests are counted with ``cache.add`` + ``cache.incr`` *before* they are
+checked, so concurrent requests cannot all read the same count and slip
+through together; a rejected request gives its slot back. The counters live
+in the ``RATE_LIMIT_CACHE`` alias (see settings) so every worker process
+sees the same counts. ``incr`` is atomic on Redis, Memcached and LocMem;
+Django emulates it with get + set on the file and database backends, so for
+those the update is serialized with a lock (a ``flock`` in the cache
+directory for the file-based local default).
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICIES = {
+    'submit': [(60, 5), (3600, 50)],
+    'api_run': [(60, 10), (3600, 100)],  # Higher limits for API calls
+}
+
+WINDOW_NAMES = {60: 'minute', 3600: 'hour', 86400: 'day'}
+
+# Backends whose incr() is a single atomic operation
+ATOMIC_BACKENDS = {'RedisCache', 'PyMemcacheCache', 'PyLibMCCache', 'LocMemCache'}
+
+_thread_lock = threading.Lock()
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, action, window, limit, retry_after):
+        self.action = action
+        self.window = window
+        self.limit = limit
+        self.retry_after = retry_after
+        period = WINDOW_NAMES.get(window, f'{window} seconds')
+        super().__init__(f"Rate limit exceeded: max {limit} {action} requests per {period}")
+
+
+def get_policy(action):
+    policies = getattr(settings, 'RATE_LIMITS', None) or DEFAULT_POLICIES
+    return policies[action]
+
+
+def get_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def _bucket_key(action, ident, window, bucket):
+    return f"rl:{action}:{ident}:{window}:{bucket}"
+
+
+@contextmanager
+def _counter_lock(store):
+    if type(store).__name__ in ATOMIC_BACKENDS:
+        yield
+        return
+    with _thread_lock:
+        directory = getattr(store, '_dir', None)
+        if fcntl is None or directory is None:
+            yield
+            return
+        os.makedirs(directory, exist_ok=True)
+        # Not a .djcache file, so cache culling and clear() leave it alone
+        with open(os.path.join(directory, 'ratelimit.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _incr(store, key, ttl):
+    store.add(key, 0, ttl)
+    try:
+        return store.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        store.add(key, 1, ttl)
+        return 1
+
+
+def hit(action, ident, now=None):
+    """
+    Count one request for ``ident`` against the ``action`` policy.
+    Raises RateLimitExceeded (and does not count the request) when over a limit.
+    """
+    store = get_cache()
+    now = time.time() if now is None else now
+    counted = []
+    try:
+        with _counter_lock(store):
+            _count(store, action, ident, now, counted)
+    except RateLimitExceeded:
+        with _counter_lock(store):
+            for key in counted:
+                try:
+                    store.decr(key)
+                except ValueError:
+                    pass
+        raise
+    except Exception as e:
+        # Never take the site down because the limiter's cache is unreachable
+        logger.error(f"Rate limiter unavailable for {action}: {str(e)}")
+
+
+def _count(store, action, ident, now, counted):
+    for window, limit in get_policy(action):
+        bucket, offset = divmod(now, window)
+        current_key = _bucket_key(action, ident, window, int(bucket))
+        previous = store.get(_bucket_key(action, ident, window, int(bucket) - 1), 0)
+        current = _incr(store, current_key, window * 2)
+        counted.append(current_key)
+
+        weight = 1 - offset / window
+        if previous * weight + current > limit:
+            raise RateLimitExceeded(action, window, limit, retry_after=max(1, int(window - offset)))
+
+
+def user_ident(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.id}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def json_limited(request, error, *args, **kwargs):
+    response = JsonResponse({'ok': False, 'error': str(error)}, status=429)
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def rate_limit(action, ident=user_ident, on_limited=json_limited):
+    """
+    View decorator applying the ``action`` policy. ``on_limited(request, error,
+    *args, **kwargs)`` builds the response for rejected requests (a JSON 429 by
+    default).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            try:
+                hit(action, ident(request))
+            except RateLimitExceeded as e:
+                logger.info(f"{e} ({ident(request)})")
+                return on_limited(request, e, *args, **kwargs)
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,185 @@
+"""
+Content-addressed cache for "Run" results.
+
+A run is identified by a SHA-256 of (language, Judge0 language id, source,
+stdin, limits), so pressing Run again with the same code and input returns
+the earlier Judge0 result without spending a Judge0 call. Entries expire
+after ``ttl`` seconds and the least recently used are evicted beyond
+``max_entries``.
+
+While the first run is still executing its token is remembered, so repeated
+presses in the meantime get the same token instead of new submissions, and
+once the status endpoint sees its final result the result is stored. The
+cache is per process; every worker warms its own copy.
+"""
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .judge0 import LANGUAGE_MAP
+
+# Results worth replaying; Internal Error (13) says nothing about the code
+UNCACHEABLE_STATUS_IDS = {13}
+
+
+def run_key(language, code, stdin='', limits=None):
+    payload = json.dumps(
+        [language, LANGUAGE_MAP.get(language), code, stdin or '', limits or {}],
+        sort_keys=True,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RunCache:
+    """Thread-safe LRU + TTL cache of finished runs with hit/miss counters"""
+
+    def __init__(self, max_entries=1000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, token, result, run_ms)
+        self._tokens = {}               # token -> key, for finished runs
+        self._pending = OrderedDict()   # token -> (key, started_at)
+        self._inflight = {}             # key -> token
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_ms = 0.0
+
+    def _drop(self, key):
+        _, token, _, _ = self._entries.pop(key)
+        self._tokens.pop(token, None)
+
+    def _live_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        """Return (token, result) for a finished run, counting a hit or a miss"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_ms += entry[3]
+            return entry[1], entry[2]
+
+    def get_by_token(self, token):
+        with self._lock:
+            key = self._tokens.get(token)
+            entry = self._live_entry(key) if key else None
+            return entry[2] if entry else None
+
+    def inflight_token(self, key):
+        """Token of an identical run that has not finished yet, if any"""
+        with self._lock:
+            token = self._inflight.get(key)
+            if token is None:
+                return None
+            _, started_at = self._pending[token]
+            if time.monotonic() - started_at > self.ttl:
+                self._forget_pending(token)
+                return None
+            self.coalesced += 1
+            return token
+
+    def _forget_pending(self, token):
+        key, _ = self._pending.pop(token)
+        if self._inflight.get(key) == token:
+            del self._inflight[key]
+
+    def track(self, token, key):
+        """Remember that ``token`` is the run for ``key`` until its result arrives"""
+        with self._lock:
+            self._pending[token] = (key, time.monotonic())
+            self._inflight[key] = token
+            while len(self._pending) > self.max_entries:
+                self._forget_pending(next(iter(self._pending)))
+
+    def forget(self, token):
+        """Drop a tracked run that will never finish"""
+        with self._lock:
+            if token in self._pending:
+                self._forget_pending(token)
+
+    def complete(self, token, result, status_id=None):
+        """Store the final result of a tracked run"""
+        with self._lock:
+            if token not in self._pending:
+                return False
+            key, started_at = self._pending[token]
+            self._forget_pending(token)
+            if status_id in UNCACHEABLE_STATUS_IDS:
+                return False
+
+            if key in self._entries:
+                self._drop(key)
+            run_ms = (time.monotonic() - started_at) * 1000
+            self._entries[key] = (time.monotonic() + self.ttl, token, result, run_ms)
+            self._tokens[token] = key
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'pending': len(self._pending),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                # Judge0 submissions not made thanks to the cache
+                'judge0_calls_saved': self.hits + self.coalesced,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                # Sum of the original run times of the results replayed
+                'latency_saved_ms': round(self.saved_ms, 1),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens.clear()
+            self._pending.clear()
+            self._inflight.clear()
+            self._reset_counters()
+
+
+_run_cache = None
+_run_cache_lock = threading.Lock()
+
+
+def get_run_cache():
+    global _run_cache
+    if _run_cache is None:
+        with _run_cache_lock:
+            if _run_cache is None:
+                _run_cache = RunCache(
+                    max_entries=getattr(settings, 'RUN_CACHE_MAX_ENTRIES', 1000),
+                    ttl=getattr(settings, 'RUN_CACHE_TTL_SECONDS', 3600),
+                )
+    return _run_cache
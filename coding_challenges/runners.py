@@ -0,0 +1,211 @@
+"""
+Code runner backends.
+
+A runner executes one submission against a list of tests and yields
+``(test index, result)`` pairs as tests finish. ``judging`` consumes them
+and may stop early, so runners must tolerate being closed mid-way. Each
+result is a dict with ``status`` (one of ``judge0.FINAL_STATUSES``),
+``description``, ``runtime_ms``, ``memory_kb``, ``stdout`` and ``stderr``.
+
+``Judge0Runner`` sends the tests to Judge0 as batch submissions.
+``LocalRunner`` runs Python and JavaScript on this machine: every test is a
+fresh interpreter subprocess with CPU time, address space and output size
+capped by rlimits from the challenge's ``time_limit_ms``/``memory_limit_kb``
+(see ``sandbox``), executed by a pre-warmed process pool so a contest does not depend on
+Judge0's latency or quota. rlimits bound resources only; they are not a
+security boundary, so run local workers as an unprivileged user in a
+throwaway container when the code is untrusted.
+
+``CODE_RUNNER`` selects the backend: ``judge0``, ``local``, or ``auto``
+(local for the languages it supports, Judge0 for the rest).
+"""
+import os
+import sys
+import time
+import base64
+import shutil
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+
+import requests
+from django.conf import settings
+
+from . import judge0, sandbox
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_MIN = 0.2
+POLL_INTERVAL_MAX = 1.0
+
+
+def _decode(value):
+    if not value:
+        return ''
+    try:
+        return base64.b64decode(value).decode('utf-8', errors='replace')
+    except Exception:
+        return ''
+
+
+def judge0_result(status, data):
+    runtime_ms, memory_kb = judge0.parse_metrics(data)
+    return {
+        'status': status,
+        'description': (data.get('status') or {}).get('description', ''),
+        'runtime_ms': runtime_ms,
+        'memory_kb': memory_kb,
+        'stdout': _decode(data.get('stdout')),
+        'stderr': _decode(data.get('stderr')) or _decode(data.get('compile_output')),
+    }
+
+
+class BaseRunner:
+    """Interface of a code runner backend"""
+
+    name = None
+    languages = ()
+
+    def supports(self, language):
+        return language in self.languages
+
+    def run(self, language, code, tests, time_limit_ms=None, memory_limit_kb=None, deadline=None):
+        """Yield (test index, result) for each (stdin, expected_output, is_hidden) test as it finishes"""
+        raise NotImplementedError
+
+
+class Judge0Runner(BaseRunner):
+    """Runs all tests of a submission as Judge0 batch submissions"""
+
+    name = 'judge0'
+    languages = tuple(judge0.LANGUAGE_MAP)
+
+    def __init__(self, client=None, poll_interval=POLL_INTERVAL_MIN):
+        self.client = client or judge0.get_client()
+        self.poll_interval = poll_interval
+
+    def run(self, language, code, tests, time_limit_ms=None, memory_limit_kb=None, deadline=None):
+        payloads = [
+            judge0.submission_payload(language, code, stdin, expected, time_limit_ms, memory_limit_kb)
+            for stdin, expected, _ in tests
+        ]
+        pending = {}
+        for start in range(0, len(payloads), judge0.BATCH_SIZE):
+            tokens = self.client.create_submissions_batch(payloads[start:start + judge0.BATCH_SIZE])
+            pending.update({token: start + i for i, token in enumerate(tokens)})
+
+        interval = self.poll_interval
+        while pending:
+            time.sleep(interval)
+            if deadline and time.monotonic() > deadline:
+                raise requests.Timeout(f"Judging did not finish in time ({len(pending)} tests still running)")
+            tokens = list(pending)
+            for start in range(0, len(tokens), judge0.BATCH_SIZE):
+                results = self.client.get_submissions_batch(tokens[start:start + judge0.BATCH_SIZE])
+                for token, data in results.items():
+                    status = judge0.map_status(data)
+                    if status in judge0.FINAL_STATUSES and token in pending:
+                        yield pending.pop(token), judge0_result(status, data)
+            interval = min(POLL_INTERVAL_MAX, interval * 1.5)
+
+
+class LocalRunner(BaseRunner):
+    """Runs Python and JavaScript tests in rlimited subprocesses from a pre-warmed process pool"""
+
+    name = 'local'
+    languages = ('python', 'javascript')
+
+    def __init__(self, workers=None):
+        self.workers = workers or getattr(settings, 'LOCAL_RUNNER_WORKERS', None) or os.cpu_count() or 2
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def interpreters(self):
+        return {
+            'python': getattr(settings, 'LOCAL_RUNNER_PYTHON', '') or sys.executable,
+            'javascript': getattr(settings, 'LOCAL_RUNNER_NODE', '') or 'node',
+        }
+
+    def supports(self, language):
+        if sandbox.resource is None or language not in self.languages:
+            return False
+        return shutil.which(self.interpreters[language]) is not None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    methods = multiprocessing.get_all_start_methods()
+                    # Fork from a clean server process, not from a Django worker holding DB connections
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool
+
+    def warm_up(self):
+        """Start every pool process now instead of on the first submission"""
+        started = time.perf_counter()
+        pids = set(self.pool.map(sandbox.warm_worker, range(self.workers * 4)))
+        logger.info(
+            f"Local runner pool warmed: {len(pids)} processes in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return len(pids)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def run(self, language, code, tests, time_limit_ms=None, memory_limit_kb=None, deadline=None):
+        if not self.supports(language):
+            raise ValueError(f"Unsupported language for the local runner: {language}")
+        interpreters = self.interpreters
+        futures = {
+            self.pool.submit(
+                sandbox.execute_test, language, code, stdin, expected, time_limit_ms, memory_limit_kb, interpreters
+            ): index
+            for index, (stdin, expected, _) in enumerate(tests)
+        }
+        timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                yield futures[future], future.result()
+        except FutureTimeoutError:
+            # A busy pool, not the code: retried like Judge0's timeouts. Tests over their own
+            # limit come back from the sandbox as 'timeout' results instead.
+            raise requests.Timeout(f"Judging did not finish in time ({sum(not f.done() for f in futures)} tests left)")
+        finally:
+            # Early exit or failure: drop the tests that have not started yet
+            for future in futures:
+                future.cancel()
+
+
+RUNNERS = {
+    'judge0': Judge0Runner,
+    'local': LocalRunner,
+}
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def _instance(name):
+    if name not in _runners:
+        with _runners_lock:
+            if name not in _runners:
+                _runners[name] = RUNNERS[name]()
+    return _runners[name]
+
+
+def get_runner(language=None, name=None):
+    """The configured runner for ``language`` (see CODE_RUNNER)"""
+    name = name or getattr(settings, 'CODE_RUNNER', 'judge0')
+    if name == 'auto':
+        local = _instance('local')
+        return local if language and local.supports(language) else _instance('judge0')
+    if name not in RUNNERS:
+        raise ValueError(f"Unknown code runner: {name}")
+    return _instance(name)
@@ -0,0 +1,145 @@
+"""
+Child side of the local code runner (see ``runners.LocalRunner``).
+
+``execute_test`` runs inside the runner's pool processes. This module only
+imports the standard library: a test's subprocess is forked from a pool
+process, and the child's peak RSS, which is reported as the test's memory,
+counts whatever that process had loaded.
+"""
+import os
+import signal
+import tempfile
+import threading
+import subprocess
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits
+    resource = None
+
+OUTPUT_LIMIT_BYTES = 8 * 1024 * 1024
+OUTPUT_KEEP_CHARS = 64 * 1024
+# Wall-clock allowance on top of the CPU limit (I/O, sleeping code)
+WALL_TIME_FACTOR = 3
+WALL_TIME_GRACE_MS = 1000
+SOURCE_SUFFIXES = {
+    'python': '.py',
+    'javascript': '.js',
+}
+
+
+def outputs_match(stdout, expected):
+    """Compare outputs ignoring trailing whitespace on each line and at the end"""
+    actual = [line.rstrip() for line in stdout.rstrip().splitlines()]
+    wanted = [line.rstrip() for line in (expected or '').rstrip().splitlines()]
+    return actual == wanted
+
+
+def command(language, path, memory_limit_kb, interpreters):
+    """(argv, limit address space?) for running ``path``"""
+    if language == 'python':
+        # -I: ignore PYTHON* env vars, user site and the script's directory
+        return [interpreters['python'], '-I', '-B', path], True
+    if language == 'javascript':
+        heap_mb = max(16, memory_limit_kb // 1024) if memory_limit_kb else None
+        args = [interpreters['javascript']] + ([f'--max-old-space-size={heap_mb}'] if heap_mb else []) + [path]
+        # V8 reserves far more address space than it uses, so cap its heap instead of RLIMIT_AS
+        return args, False
+    raise ValueError(f"Unsupported language for the local runner: {language}")
+
+
+def _limit_resources(cpu_seconds, address_space, output_bytes):
+    def apply():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output_bytes, output_bytes))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if address_space:
+            resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+    return apply
+
+
+def _read_output(path):
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8', errors='replace')
+
+
+def execute_test(language, code, stdin, expected, time_limit_ms, memory_limit_kb, interpreters):
+    """Run one test in a fresh rlimited subprocess and return its result dict"""
+    time_limit_ms = time_limit_ms or 2000
+    with tempfile.TemporaryDirectory(prefix='cc-run-') as workdir:
+        source_path = os.path.join(workdir, f'main{SOURCE_SUFFIXES.get(language, "")}')
+        stdin_path = os.path.join(workdir, 'stdin')
+        stdout_path = os.path.join(workdir, 'stdout')
+        stderr_path = os.path.join(workdir, 'stderr')
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        with open(stdin_path, 'w', encoding='utf-8') as f:
+            f.write(stdin or '')
+
+        args, limit_address_space = command(language, source_path, memory_limit_kb, interpreters)
+        cpu_seconds = max(1, -(-time_limit_ms // 1000))
+        address_space = memory_limit_kb * 1024 if (memory_limit_kb and limit_address_space) else None
+        wall_seconds = (time_limit_ms * WALL_TIME_FACTOR + WALL_TIME_GRACE_MS) / 1000
+
+        # Files rather than pipes: no deadlock on large output, and RLIMIT_FSIZE caps it
+        with open(stdin_path, 'rb') as fin, open(stdout_path, 'wb') as fout, open(stderr_path, 'wb') as ferr:
+            proc = subprocess.Popen(
+                args,
+                stdin=fin, stdout=fout, stderr=ferr,
+                cwd=workdir,
+                env={'PATH': '/usr/local/bin:/usr/bin:/bin', 'HOME': workdir, 'LANG': 'C.UTF-8'},
+                preexec_fn=_limit_resources(cpu_seconds, address_space, OUTPUT_LIMIT_BYTES),
+                start_new_session=True,
+            )
+            killed = threading.Event()
+
+            def kill():
+                killed.set()
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+            timer = threading.Timer(wall_seconds, kill)
+            timer.start()
+            try:
+                # wait4 rather than Popen.wait so we get this child's own rusage
+                _, wait_status, usage = os.wait4(proc.pid, 0)
+            finally:
+                timer.cancel()
+            proc.returncode = os.waitstatus_to_exitcode(wait_status)
+
+        stdout = _read_output(stdout_path)
+        stderr = _read_output(stderr_path)
+
+    runtime_ms = int(round((usage.ru_utime + usage.ru_stime) * 1000))
+    memory_kb = int(usage.ru_maxrss)  # kilobytes on Linux
+    signum = -proc.returncode if proc.returncode < 0 else None
+
+    if killed.is_set() or signum == signal.SIGXCPU or runtime_ms > time_limit_ms:
+        status, description = 'timeout', 'Time Limit Exceeded'
+    elif signum == signal.SIGXFSZ or 'File too large' in stderr:
+        status, description = 'error', 'Output Limit Exceeded'
+    elif proc.returncode != 0:
+        status = 'error'
+        description = f'Runtime Error ({signal.Signals(signum).name})' if signum else 'Runtime Error (NZEC)'
+        if 'MemoryError' in stderr or 'heap out of memory' in stderr:
+            description = 'Memory Limit Exceeded'
+    elif expected is not None and not outputs_match(stdout, expected):
+        status, description = 'failed', 'Wrong Answer'
+    else:
+        status, description = 'passed', 'Accepted'
+
+    return {
+        'status': status,
+        'description': description,
+        'runtime_ms': runtime_ms,
+        'memory_kb': memory_kb,
+        'stdout': stdout[:OUTPUT_KEEP_CHARS],
+        'stderr': stderr[:OUTPUT_KEEP_CHARS],
+    }
+
+
+def warm_worker(_=None):
+    """Trivial task that makes a pool process start"""
+    return os.getpid()
@@ -0,0 +1,93 @@
+"""
+Incremental profile scoring.
+
+A submission is scored exactly once, when it first reaches a final status.
+``Submission.scored`` is flipped with a conditional UPDATE, so whichever code
+path gets there first (the batch poller, the status API, an admin save) wins
+and every later save is a no-op. Profile counters move with ``F()``
+expressions, badges are awarded from one set-difference query and the
+user's leaderboard entry is moved in place, so the cost per submission does
+not grow with the user's history.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import leaderboard
+from .judge0 import FINAL_STATUSES
+from .models import Badge, Profile, Submission
+
+logger = logging.getLogger(__name__)
+
+# Simple points scheme: pass = +10, fail = +1, error/timeout = 0
+POINTS = {
+    'passed': 10,
+    'failed': 1,
+}
+
+
+def award_badges(profile_id, points):
+    """Add every badge whose threshold is met and which the profile lacks"""
+    Through = Profile.badges.through
+    missing = Badge.objects.filter(points_threshold__lte=points).exclude(profiles__id=profile_id)
+    new_links = [Through(profile_id=profile_id, badge_id=badge_id)
+                 for badge_id in missing.values_list('id', flat=True)]
+    if new_links:
+        Through.objects.bulk_create(new_links, ignore_conflicts=True)
+    return len(new_links)
+
+
+def record_result(submission):
+    """Apply a finished submission to its author's profile. Returns True if it was scored now."""
+    if submission.status not in FINAL_STATUSES:
+        return False
+
+    with transaction.atomic():
+        claimed = Submission.objects.filter(id=submission.id, scored=False).update(scored=True)
+        submission.scored = True
+        if not claimed:
+            return False
+
+        points = POINTS.get(submission.status, 0)
+        first_solve = submission.status == 'passed' and not Submission.objects.filter(
+            user_id=submission.user_id,
+            challenge_id=submission.challenge_id,
+            status='passed',
+            scored=True,
+        ).exclude(id=submission.id).exists()
+
+        changes = {'last_activity': timezone.now()}
+        if points:
+            changes['points'] = F('points') + points
+        if first_solve:
+            changes['solved_count'] = F('solved_count') + 1
+
+        if not Profile.objects.filter(user_id=submission.user_id).update(**changes):
+            Profile.objects.get_or_create(user_id=submission.user_id)
+            Profile.objects.filter(user_id=submission.user_id).update(**changes)
+
+        if points or first_solve:
+            profile_id, total, solved = Profile.objects.filter(
+                user_id=submission.user_id
+            ).values_list('id', 'points', 'solved_count').get()
+            award_badges(profile_id, total)
+            leaderboard.record_score_change(
+                profile_id,
+                old_points=total - points,
+                old_solved=solved - (1 if first_solve else 0),
+                new_points=total,
+                new_solved=solved,
+            )
+
+    logger.info(
+        f"Scored submission {submission.id} ({submission.status}): "
+        f"+{points} points{', first solve' if first_solve else ''}"
+    )
+    return True
+
+
+def record_results(submissions):
+    """Score a batch of submissions (e.g. after bulk_update, which skips post_save)"""
+    return sum(1 for submission in submissions if record_result(submission))
@@ -0,0 +1,97 @@
+"""
+Per-user submission statistics.
+
+``submission_stats`` computes every counter the profile page shows in one
+conditional-aggregate query over the user's submissions (with the challenge
+total as a subquery) and caches the result. The cache key carries the user's
+latest submission timestamp and ``Profile.last_activity``, which scoring
+bumps whenever a submission reaches a final status, so a new submission or a
+new verdict simply moves on to a fresh key and nothing has to be invalidated.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Func, IntegerField, Q, Subquery
+
+from .judge0 import LANGUAGE_MAP
+from .models import Challenge
+
+STATS_CACHE_TTL = 3600
+_UNSET = object()
+
+
+def _timestamp(value):
+    return int(value.timestamp() * 1_000_000) if value else 0
+
+
+def stats_cache_key(user_id, latest_submission_at=None, last_activity=None):
+    return (
+        f"cc:stats:{user_id}:{_timestamp(latest_submission_at)}:{_timestamp(last_activity)}"
+    )
+
+
+def compute_stats(user_id):
+    """Aggregate a user's submission counters in a single query"""
+    challenge_total = Challenge.objects.order_by().annotate(
+        n=Func('id', function='COUNT')
+    ).values('n')
+    counters = {
+        'total_submissions': Count('challenge_submissions'),
+        'passed_submissions': Count('challenge_submissions', filter=Q(challenge_submissions__status='passed')),
+        'failed_submissions': Count('challenge_submissions', filter=Q(challenge_submissions__status='failed')),
+        'error_submissions': Count('challenge_submissions', filter=Q(challenge_submissions__status='error')),
+        'pending_submissions': Count(
+            'challenge_submissions',
+            filter=Q(challenge_submissions__status__in=['queued', 'running']),
+        ),
+        'solved': Count(
+            'challenge_submissions__challenge',
+            filter=Q(challenge_submissions__status='passed'),
+            distinct=True,
+        ),
+    }
+    for language in LANGUAGE_MAP:
+        counters[f'lang_{language}'] = Count(
+            'challenge_submissions', filter=Q(challenge_submissions__language=language)
+        )
+
+    row = (
+        User.objects.filter(id=user_id)
+        .annotate(total=Subquery(challenge_total[:1], output_field=IntegerField()), **counters)
+        .values('total', *counters)
+        .get()
+    )
+
+    stats = {key: row[key] or 0 for key in ('total', 'solved', 'total_submissions', 'passed_submissions',
+                                             'failed_submissions', 'error_submissions', 'pending_submissions')}
+    total = stats['total_submissions']
+    stats['success_rate'] = round(stats['passed_submissions'] / total * 100, 1) if total else 0
+
+    languages = sorted(
+        ((row[f'lang_{language}'], language) for language in LANGUAGE_MAP),
+        reverse=True,
+    )
+    count, language = languages[0]
+    stats['favorite_language'] = language if count else None
+    stats['favorite_language_share'] = round(count / total * 100) if total else 0
+    return stats
+
+
+def submission_stats(user, latest_submission_at=_UNSET, last_activity=_UNSET):
+    """
+    Cached statistics for ``user``. Callers that already hold the newest
+    submission and the profile pass their timestamps to skip the lookups.
+    """
+    if latest_submission_at is _UNSET:
+        latest_submission_at = (
+            user.challenge_submissions.order_by('-created_at')
+            .values_list('created_at', flat=True).first()
+        )
+    if last_activity is _UNSET:
+        last_activity = user.cc_profile.last_activity if hasattr(user, 'cc_profile') else None
+
+    key = stats_cache_key(user.id, latest_submission_at, last_activity)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(user.id)
+        cache.set(key, stats, STATS_CACHE_TTL)
+    return stats
@@ -1,3 +1,46 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from . import leaderboard
+from .models import LeaderboardEntry, Profile
+
+fill_migration = import_module('coding_challenges.migrations.0005_leaderboardentry_profile_cc_profile_ranking_idx_and_more')
+
+
+class LeaderboardEntryPlacementTests(TestCase):
+    def make_profile(self, username, points, solved=0):
+        user = User.objects.create_user(username)
+        profile, _ = Profile.objects.get_or_create(user=user)
+        Profile.objects.filter(pk=profile.pk).update(points=points, solved_count=solved)
+        return profile
+
+    def board(self):
+        return list(LeaderboardEntry.objects.order_by('rank').values_list('profile__user__username', 'rank', 'points'))
+
+    def test_migration_ranks_existing_profiles(self):
+        self.make_profile('lb1', 100, 1)
+        self.make_profile('lb2', 300, 3)
+        self.make_profile('lb3', 200, 2)
+        self.make_profile('idle', 0)
+        fill_migration.fill_leaderboard(apps, None)
+        self.assertEqual(self.board(), [('lb2', 1, 300), ('lb3', 2, 200), ('lb1', 3, 100)])
+
+    def test_missing_entry_is_placed_by_score_not_appended(self):
+        self.make_profile('lb1', 100)
+        self.make_profile('lb2', 200)
+        self.make_profile('lb3', 300)
+        leaderboard.rebuild()
+        newcomer = self.make_profile('new', 10)
+        existing = self.make_profile('old', 150)
+
+        self.assertEqual(leaderboard.record_score_change(newcomer.pk, 0, 0, 10, 0), 4)
+        self.assertEqual(leaderboard.record_score_change(existing.pk, 140, 0, 150, 0), 3)
+        self.assertEqual(self.board(), [
+            ('lb3', 1, 300), ('lb2', 2, 200), ('old', 3, 150), ('lb1', 4, 100), ('new', 5, 10),
+        ])
+        page = leaderboard.get_page()
+        self.assertEqual(page['total'], 5)
+        self.assertEqual([p.user.username for p in page['rows']], ['lb3', 'lb2', 'old', 'lb1', 'new'])
@@ -15,6 +15,7 @@ urlpatterns = [
 
     # API endpoints for async execution
     path('api/run/', views.api_run_code, name='api_run_code'),
+    path('api/run/cache-stats/', views.api_run_cache_stats, name='api_run_cache_stats'),
     path('api/submission/<str:token>/', views.api_submission_status, name='api_submission_status'),
     path('api/check-submission/<int:submission_id>/', views.check_submission_result, name='check_submission_result'),
     path('api/update-pending/', views.update_pending_submissions, name='update_pending_submissions'),
@@ -3,79 +3,39 @@ import time
 import base64
 import requests
 import logging
-import hashlib
 import re
+import uuid
 from datetime import datetime, timedelta
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.core.paginator import Paginator
-from django.core.cache import cache
-from django.db.models import Count, Q, Sum, Avg, Max
+from django.db.models import Count, Q, Sum, Avg, Max, prefetch_related_objects
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.conf import settings
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
 from django.db import transaction
 
+from core.pagination import KeysetPaginator
 from .models import Challenge, Submission, Tag, Profile
 from .forms import SubmissionForm, ChallengeForm
+from . import judge0, runners
+from . import leaderboard as leaderboards
+from .ratelimit import rate_limit
+from .runcache import get_run_cache, run_key
+from .stats import submission_stats
+from .judge0 import LANGUAGE_MAP, STATUS_MAP, FINAL_STATUSES, parse_metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Production constants
-MAX_SUBMISSIONS_PER_MINUTE = 5
-MAX_SUBMISSIONS_PER_HOUR = 50
-JUDGE0_TIMEOUT = 30
 MAX_CODE_LENGTH = 50000  # 50KB
 MAX_INPUT_LENGTH = 10000  # 10KB
-
-
-def get_rate_limit_key(user_id, action='submit'):
-    """Generate cache key for rate limiting"""
-    return f"rate_limit:{action}:{user_id}"
-
-
-def check_rate_limit(user, action='submit'):
-    """Check if user has exceeded rate limits"""
-    minute_key = f"{get_rate_limit_key(user.id, action)}:minute"
-    hour_key = f"{get_rate_limit_key(user.id, action)}:hour"
-    
-    minute_count = cache.get(minute_key, 0)
-    hour_count = cache.get(hour_key, 0)
-    
-    if minute_count >= MAX_SUBMISSIONS_PER_MINUTE:
-        return False, f"Rate limit exceeded: {MAX_SUBMISSIONS_PER_MINUTE} submissions per minute"
-    
-    if hour_count >= MAX_SUBMISSIONS_PER_HOUR:
-        return False, f"Rate limit exceeded: {MAX_SUBMISSIONS_PER_HOUR} submissions per hour"
-    
-    return True, None
-
-
-def increment_rate_limit(user, action='submit'):
-    """Increment rate limit counters"""
-    minute_key = f"{get_rate_limit_key(user.id, action)}:minute"
-    hour_key = f"{get_rate_limit_key(user.id, action)}:hour"
-    
-    # Increment minute counter
-    try:
-        cache.add(minute_key, 0, 60)  # 1 minute TTL
-        cache.incr(minute_key)
-    except ValueError:
-        cache.set(minute_key, 1, 60)
-    
-    # Increment hour counter
-    try:
-        cache.add(hour_key, 0, 3600)  # 1 hour TTL
-        cache.incr(hour_key)
-    except ValueError:
-        cache.set(hour_key, 1, 3600)
+RUN_TIMEOUT_SECONDS = 20
 
 
 def validate_submission_data(code, language, stdin=''):
@@ -108,50 +68,13 @@ def validate_submission_data(code, language, stdin=''):
     return errors
 
 
-def check_rate_limit(user, action_type='submission'):
-    """Check if user has exceeded rate limits"""
-    cache_key_minute = f"rate_limit_{action_type}_{user.id}_minute"
-    cache_key_hour = f"rate_limit_{action_type}_{user.id}_hour"
-    
-    # Get current counts
-    minute_count = cache.get(cache_key_minute, 0)
-    hour_count = cache.get(cache_key_hour, 0)
-    
-    # Define limits based on action type
-    if action_type == 'api_run':
-        minute_limit, hour_limit = 10, 100  # Higher limits for API calls
-    else:
-        minute_limit, hour_limit = 5, 50   # Standard submission limits
-    
-    # Check limits
-    if minute_count >= minute_limit:
-        return False, f"Rate limit exceeded: max {minute_limit} {action_type}s per minute"
-    if hour_count >= hour_limit:
-        return False, f"Rate limit exceeded: max {hour_limit} {action_type}s per hour"
-    
-    return True, None
-
-
-def increment_rate_limit(user, action_type='submission'):
-    """Increment rate limit counters"""
-    cache_key_minute = f"rate_limit_{action_type}_{user.id}_minute"
-    cache_key_hour = f"rate_limit_{action_type}_{user.id}_hour"
-    
-    # Increment counters with appropriate timeouts
-    try:
-        cache.set(cache_key_minute, cache.get(cache_key_minute, 0) + 1, 60)
-        cache.set(cache_key_hour, cache.get(cache_key_hour, 0) + 1, 3600)
-    except Exception as e:
-        logger.error(f"Failed to increment rate limit for user {user.id}: {str(e)}")
-
-
 def dashboard(request):
     # Filters
     difficulty = request.GET.get('difficulty')
     tag_slug = request.GET.get('tag')
     search = request.GET.get('q')
 
-    qs = Challenge.objects.all().order_by('-created_at')
+    qs = Challenge.objects.all()
     if difficulty in {'easy', 'medium', 'hard'}:
         qs = qs.filter(difficulty=difficulty)
     if tag_slug:
@@ -159,9 +82,8 @@ def dashboard(request):
     if search:
         qs = qs.filter(Q(title__icontains=search) | Q(problem_statement__icontains=search))
 
-    paginator = Paginator(qs, 12)
-    page = request.GET.get('page')
-    challenges = paginator.get_page(page)
+    paginator = KeysetPaginator(qs, 12, count='approximate')
+    challenges = paginator.get_page(request.GET.get('cursor'))
 
     tags = Tag.objects.annotate(count=Count('challenges')).order_by('-count')[:20]
 
@@ -202,18 +124,18 @@ def challenge_detail(request, slug):
     })
 
 
+def _submit_rate_limited(request, error, slug):
+    messages.error(request, str(error))
+    return redirect('coding_challenges:challenge_detail', slug=slug)
+
+
 @login_required
 @require_http_methods(["POST"])
+@rate_limit('submit', on_limited=_submit_rate_limited)
 def submit_solution(request, slug):
     """Handle code submission with production-ready validation and processing"""
     challenge = get_object_or_404(Challenge, slug=slug)
     
-    # Rate limiting check
-    rate_ok, rate_error = check_rate_limit(request.user)
-    if not rate_ok:
-        messages.error(request, rate_error)
-        return redirect('coding_challenges:challenge_detail', slug=challenge.slug)
-    
     form = SubmissionForm(request.POST)
     if not form.is_valid():
         messages.error(request, "Please correct the form errors.")
@@ -248,24 +170,14 @@ def submit_solution(request, slug):
                 status='queued'
             )
             
-            # Increment rate limit counters
-            increment_rate_limit(request.user)
-            
             # Log submission
             logger.info(
                 f"Submission created: user={request.user.id}, challenge={challenge.id}, "
                 f"language={language}, submission_id={submission.id}"
             )
             
-            # Process submission asynchronously
-            try:
-                process_submission_async(submission)
-                messages.success(request, "Code submitted successfully! Processing...")
-            except Exception as e:
-                logger.error(f"Failed to process submission {submission.id}: {str(e)}")
-                submission.status = 'error'
-                submission.save()
-                messages.error(request, "Failed to process submission. Please try again.")
+            # The judge worker (manage.py run_judge_worker) dispatches it to Judge0
+            messages.success(request, "Code submitted successfully! Processing...")
     
     except Exception as e:
         logger.error(f"Failed to create submission: {str(e)}")
@@ -274,88 +186,17 @@ def submit_solution(request, slug):
     return redirect('coding_challenges:challenge_detail', slug=challenge.slug)
 
 
-def process_submission_async(submission):
-    """Process submission with Judge0 API - can be moved to Celery task later"""
-    try:
-        # Prepare Judge0 submission
-        language_id = LANGUAGE_MAP.get(submission.language)
-        if not language_id:
-            raise ValueError(f"Unsupported language: {submission.language}")
-        
-        # Get test cases (for now, use example input/output)
-        test_input = submission.challenge.example_input or ""
-        expected_output = submission.challenge.example_output or ""
-        
-        # Submit to Judge0
-        data = {
-            "language_id": language_id,
-            "source_code": base64.b64encode(submission.code.encode()).decode(),
-            "stdin": base64.b64encode(test_input.encode()).decode(),
-            "expected_output": base64.b64encode(expected_output.encode()).decode(),
-            "redirect_stderr_to_stdout": True,
-        }
-        
-        headers = _judge0_headers()
-        response = requests.post(
-            f"{settings.JUDGE0_API_URL}/submissions?base64_encoded=true&wait=false",
-            headers=headers,
-            data=json.dumps(data),
-            timeout=JUDGE0_TIMEOUT
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        token = result.get('token')
-        
-        if token:
-            submission.external_token = token
-            submission.status = 'running'
-            submission.save()
-            
-            logger.info(f"Submission {submission.id} sent to Judge0 with token {token}")
-        else:
-            raise ValueError("No token received from Judge0")
-    
-    except Exception as e:
-        logger.error(f"Failed to process submission {submission.id}: {str(e)}")
-        submission.status = 'error'
-        submission.result_raw = {'error': str(e)}
-        submission.save()
-
-
-def _judge0_headers():
-    headers = {"Content-Type": "application/json"}
-    if settings.JUDGE0_API_HOST and settings.JUDGE0_API_KEY:
-        headers.update({
-            "X-RapidAPI-Host": settings.JUDGE0_API_HOST,
-            "X-RapidAPI-Key": settings.JUDGE0_API_KEY,
-        })
-    return headers
-
-
-LANGUAGE_MAP = {
-    # Judge0 language IDs (CE version). These may change; adjust as needed.
-    'python': 71,       # Python (3.8.1)
-    'cpp': 54,          # C++ (GCC 9.2.0)
-    'java': 62,         # Java (OpenJDK 13.0.1)
-    'javascript': 63,   # JavaScript (Node.js 12.14.0)
-}
-
-
 @login_required
 @require_http_methods(["POST"])
+@rate_limit('api_run')
 def api_run_code(request):
-    """API endpoint for running code with Judge0 - production ready"""
-    # Rate limiting for API calls
-    rate_ok, rate_error = check_rate_limit(request.user, 'api_run')
-    if not rate_ok:
-        return JsonResponse({'ok': False, 'error': rate_error}, status=429)
-    
+    """API endpoint for running code with Judge0, or on the local runner when CODE_RUNNER selects it"""
     try:
         payload = json.loads(request.body.decode('utf-8'))
         code = payload.get('code', '')
         language = payload.get('language', 'python')
         stdin = payload.get('stdin', '')
+        challenge_slug = payload.get('challenge')
     except (json.JSONDecodeError, UnicodeDecodeError) as e:
         logger.warning(f"Invalid JSON in api_run_code from user {request.user.id}: {str(e)}")
         return JsonResponse({'ok': False, 'error': 'Invalid JSON payload'}, status=400)
@@ -369,27 +210,46 @@ def api_run_code(request):
             'details': validation_errors
         }, status=400)
     
-    language_id = LANGUAGE_MAP.get(language)
-    if not language_id:
+    if language not in LANGUAGE_MAP:
         return JsonResponse({
             'ok': False, 
             'error': f'Unsupported language: {language}',
             'supported_languages': list(LANGUAGE_MAP.keys())
         }, status=400)
 
-    data = {
-        "language_id": language_id,
-        "source_code": base64.b64encode(code.encode()).decode(),
-        "stdin": base64.b64encode(stdin.encode()).decode(),
-        "redirect_stderr_to_stdout": True,
-    }
+    # Run with the challenge's limits when the editor tells us which one it is
+    limits = {}
+    if challenge_slug:
+        limits = Challenge.objects.filter(slug=challenge_slug).values('time_limit_ms', 'memory_limit_kb').first() or {}
+
+    # Identical runs are answered from the run cache without calling Judge0
+    run_cache = get_run_cache()
+    key = run_key(language, code, stdin, limits)
+    cached = run_cache.get(key)
+    if cached:
+        token, result = cached
+        return JsonResponse({'ok': True, 'token': token, 'cached': True, 'result': result})
+    token = run_cache.inflight_token(key)
+    if token:
+        return JsonResponse({'ok': True, 'token': token, 'cached': False})
 
     try:
-        r = requests.post(f"{settings.JUDGE0_API_URL}/submissions?base64_encoded=true&wait=false", headers=_judge0_headers(), data=json.dumps(data), timeout=20)
-        r.raise_for_status()
-        res = r.json()
-        token = res.get('token')
-        return JsonResponse({'ok': True, 'token': token})
+        runner = runners.get_runner(language)
+        if runner.name == 'local':
+            # Finished before we answer: the result is returned and cached under a token of our own
+            token = f"local-{uuid.uuid4().hex}"
+            run_cache.track(token, key)
+            try:
+                result = _run_locally(runner, token, language, code, stdin, limits)
+            except Exception:
+                run_cache.forget(token)
+                raise
+            run_cache.complete(token, result)
+            return JsonResponse({'ok': True, 'token': token, 'cached': False, 'result': result})
+
+        token = judge0.create_submission(language, code, stdin, timeout=RUN_TIMEOUT_SECONDS, **limits)
+        run_cache.track(token, key)
+        return JsonResponse({'ok': True, 'token': token, 'cached': False})
     except requests.RequestException as e:
         # Provide richer diagnostics to the client
         status_code = None
@@ -412,6 +272,45 @@ def api_run_code(request):
             # Limit size to avoid huge payloads
             error_payload['response'] = response_text[:2000]
         return JsonResponse(error_payload, status=503)
+    except ValueError as e:
+        # Judge0 answered but did not hand back a token
+        return JsonResponse({'ok': False, 'message': 'Runner unavailable', 'detail': str(e)}, status=503)
+
+
+def _run_locally(runner, token, language, code, stdin, limits):
+    """Run ``code`` once on the local runner; the same response api_submission_status gives"""
+    _, result = next(runner.run(
+        language, code, [(stdin, None, False)],
+        time_limit_ms=limits.get('time_limit_ms'),
+        memory_limit_kb=limits.get('memory_limit_kb'),
+        deadline=time.monotonic() + RUN_TIMEOUT_SECONDS,
+    ))
+    return {
+        'ok': True,
+        'status': result['status'],
+        'status_id': None,
+        'status_description': result['description'],
+        'stdout': result['stdout'],
+        'stderr': result['stderr'],
+        # Judge0 reports seconds
+        'time': f"{result['runtime_ms'] / 1000:.3f}",
+        'memory': result['memory_kb'],
+        'score': 100 if result['status'] == 'passed' else 0,
+        'token': token,
+    }
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_run_cache_stats(request):
+    """Run cache counters and Judge0 call metrics for this worker process (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'ok': False, 'error': 'Staff only'}, status=403)
+    return JsonResponse({
+        'ok': True,
+        'run_cache': get_run_cache().stats(),
+        'judge0': judge0.get_client().metrics.snapshot(),
+    })
 
 
 @login_required
@@ -426,14 +325,14 @@ def api_submission_status(request, token: str):
                 'error': 'Invalid token format'
             }, status=400)
         
+        # Finished runs replayed from the run cache need no Judge0 call
+        run_cache = get_run_cache()
+        cached_result = run_cache.get_by_token(token)
+        if cached_result:
+            return JsonResponse(cached_result)
+        
         # Make request to Judge0
-        response = requests.get(
-            f"{settings.JUDGE0_API_URL}/submissions/{token}?base64_encoded=true",
-            headers=_judge0_headers(),
-            timeout=JUDGE0_TIMEOUT
-        )
-        response.raise_for_status()
-        data = response.json()
+        data = judge0.get_submission(token)
         
         # Decode base64 outputs safely
         decoded = {}
@@ -453,25 +352,7 @@ def api_submission_status(request, token: str):
         status_id = status_info.get('id')
         description = (status_info.get('description', '')).lower()
         
-        # Enhanced status mapping with better error categorization
-        status_mapping = {
-            1: 'queued',     # In Queue
-            2: 'running',    # Processing
-            3: 'passed',     # Accepted
-            4: 'failed',     # Wrong Answer
-            5: 'timeout',    # Time Limit Exceeded
-            6: 'error',      # Compilation Error
-            7: 'error',      # Runtime Error (SIGSEGV)
-            8: 'error',      # Runtime Error (SIGXFSZ)
-            9: 'error',      # Runtime Error (SIGFPE)
-            10: 'error',     # Runtime Error (SIGABRT)
-            11: 'error',     # Runtime Error (NZEC)
-            12: 'error',     # Runtime Error (Other)
-            13: 'error',     # Internal Error
-            14: 'error',     # Exec Format Error
-        }
-        
-        simple_status = status_mapping.get(status_id, 'running')
+        simple_status = STATUS_MAP.get(status_id, 'running')
         
         # Merge compile output into stderr for better error reporting
         stderr = decoded.get('stderr', '')
@@ -500,24 +381,21 @@ def api_submission_status(request, token: str):
             'token': token
         }
         
+        if simple_status in FINAL_STATUSES:
+            run_cache.complete(token, response_data, status_id=status_id)
+        
         # Update submission record if it exists
         try:
-            submission = Submission.objects.filter(external_token=token).first()
-            if submission and simple_status in ['passed', 'failed', 'error', 'timeout']:
+            # Rows already final (e.g. scored by the batch poller) are left as they are
+            submission = Submission.objects.filter(external_token=token).exclude(status__in=FINAL_STATUSES).first()
+            if submission and simple_status in FINAL_STATUSES:
                 submission.status = simple_status
                 submission.score = score
-                submission.runtime_ms = data.get('time', 0) or 0
-                submission.memory_kb = data.get('memory', 0) or 0
+                submission.runtime_ms, submission.memory_kb = parse_metrics(data)
                 submission.result_raw = data
-                submission.save()
-                
-                # Update user profile if passed
-                if simple_status == 'passed':
-                    profile, created = Profile.objects.get_or_create(user=submission.user)
-                    profile.points += 10  # Base points for solving
-                    profile.solved_count += 1
-                    profile.last_activity = timezone.now()
-                    profile.save()
+                # Profile points are applied once by the post_save scoring hook. ``scored`` is not
+                # written back: the poller may have claimed the row since it was loaded.
+                submission.save(update_fields=['status', 'score', 'runtime_ms', 'memory_kb', 'result_raw'])
                     
                 logger.info(f"Updated submission {submission.id} with status {simple_status}")
         except Exception as e:
@@ -559,43 +437,26 @@ def api_submission_status(request, token: str):
 @login_required
 @require_http_methods(["POST"])
 def check_submission_result(request, submission_id):
-    """Check and update a specific submission's result from Judge0"""
+    """Check a specific submission's result"""
     try:
         submission = get_object_or_404(Submission, id=submission_id, user=request.user)
         
-        if not submission.external_token:
-            return JsonResponse({
-                'ok': False,
-                'error': 'No external token found for this submission'
-            }, status=400)
-        
-        # Check if submission is already completed
-        if submission.status in ['passed', 'failed', 'error', 'timeout']:
-            return JsonResponse({
-                'ok': True,
-                'status': submission.status,
-                'score': submission.score,
-                'message': 'Submission already completed'
-            })
-        
-        # Fetch result from Judge0
-        updated = update_submission_from_judge0(submission)
-        
-        if updated:
+        # Results are written by the judge worker's batched poller
+        if submission.status in FINAL_STATUSES:
             return JsonResponse({
                 'ok': True,
                 'status': submission.status,
                 'score': submission.score,
                 'runtime_ms': submission.runtime_ms,
                 'memory_kb': submission.memory_kb,
-                'message': 'Submission updated successfully'
-            })
-        else:
-            return JsonResponse({
-                'ok': True,
-                'status': submission.status,
-                'message': 'Submission still processing'
+                'message': 'Submission completed'
             })
+
+        return JsonResponse({
+            'ok': True,
+            'status': submission.status,
+            'message': 'Submission still processing'
+        })
     
     except Exception as e:
         logger.error(f"Error checking submission {submission_id}: {str(e)}")
@@ -605,171 +466,86 @@ def check_submission_result(request, submission_id):
         }, status=500)
 
 
-def update_submission_from_judge0(submission):
-    """Update a submission's result from Judge0 API"""
-    if not submission.external_token:
-        return False
-    
-    try:
-        # Fetch result from Judge0
-        response = requests.get(
-            f"{settings.JUDGE0_API_URL}/submissions/{submission.external_token}?base64_encoded=true",
-            headers=_judge0_headers(),
-            timeout=JUDGE0_TIMEOUT
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        # Process status
-        status_info = data.get('status', {})
-        status_id = status_info.get('id')
-        
-        # Enhanced status mapping
-        status_mapping = {
-            1: 'queued',     # In Queue
-            2: 'running',    # Processing
-            3: 'passed',     # Accepted
-            4: 'failed',     # Wrong Answer
-            5: 'timeout',    # Time Limit Exceeded
-            6: 'error',      # Compilation Error
-            7: 'error',      # Runtime Error (SIGSEGV)
-            8: 'error',      # Runtime Error (SIGXFSZ)
-            9: 'error',      # Runtime Error (SIGFPE)
-            10: 'error',     # Runtime Error (SIGABRT)
-            11: 'error',     # Runtime Error (NZEC)
-            12: 'error',     # Runtime Error (Other)
-            13: 'error',     # Internal Error
-            14: 'error',     # Exec Format Error
-        }
-        
-        new_status = status_mapping.get(status_id, 'running')
-        
-        # Only update if status has changed or is final
-        if new_status != submission.status or new_status in ['passed', 'failed', 'error', 'timeout']:
-            # Calculate score
-            score = 100 if new_status == 'passed' else 0
-            
-            # Update submission
-            submission.status = new_status
-            submission.score = score
-            submission.runtime_ms = data.get('time', 0) or 0
-            submission.memory_kb = data.get('memory', 0) or 0
-            submission.result_raw = data
-            submission.save()
-            
-            # Update user profile if passed
-            if new_status == 'passed':
-                # Check if this challenge was already solved by this user
-                already_solved = Submission.objects.filter(
-                    user=submission.user,
-                    challenge=submission.challenge,
-                    status='passed'
-                ).exclude(id=submission.id).exists()
-                
-                if not already_solved:
-                    profile, created = Profile.objects.get_or_create(user=submission.user)
-                    profile.points += 10  # Base points for solving
-                    profile.solved_count += 1
-                    profile.last_activity = timezone.now()
-                    profile.save()
-                    
-                    logger.info(f"User {submission.user.id} earned points for solving challenge {submission.challenge.id}")
-            
-            logger.info(f"Updated submission {submission.id} with status {new_status}, score {score}")
-            return True
-        
-        return False
-    
-    except Exception as e:
-        logger.error(f"Failed to update submission {submission.id} from Judge0: {str(e)}")
-        return False
-
-
 @login_required
 def update_pending_submissions(request):
-    """Update all pending submissions for the current user"""
-    pending_submissions = Submission.objects.filter(
+    """Report which of the given pending submissions have finished since the page was rendered"""
+    pending = Submission.objects.filter(
         user=request.user,
-        status__in=['queued', 'running'],
-        external_token__isnull=False
-    ).exclude(external_token='')
-    
+        status__in=['queued', 'running']
+    )
+    ids = [int(x) for x in request.GET.get('ids', '').split(',') if x.strip().isdigit()]
     updated_count = 0
-    for submission in pending_submissions:
-        if update_submission_from_judge0(submission):
-            updated_count += 1
+    if ids:
+        updated_count = Submission.objects.filter(
+            user=request.user, id__in=ids, status__in=FINAL_STATUSES
+        ).count()
     
     return JsonResponse({
         'ok': True,
         'updated_count': updated_count,
-        'total_pending': pending_submissions.count()
+        'total_pending': pending.count()
     })
 
 
 def leaderboard(request):
-    top_profiles = Profile.objects.order_by('-points', '-solved_count')[:50]
-    return render(request, 'coding_challenges/leaderboard.html', {'top_profiles': top_profiles})
+    period = request.GET.get('period')
+    if period not in leaderboards.PERIODS:
+        period = None
+    try:
+        page = int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        page = 1
+
+    board = leaderboards.get_page(page, period)
+    my_rank = None
+    if request.user.is_authenticated:
+        my_rank = leaderboards.get_rank(request.user, period)
+
+    return render(request, 'coding_challenges/leaderboard.html', {
+        'profiles': board['rows'],
+        'board': board,
+        'period': period or 'all',
+        'my_rank': my_rank,
+    })
 
 
 @login_required
 def profile_view(request):
     profile, _ = Profile.objects.get_or_create(user=request.user)
-    
-    # Update any pending submissions before showing profile
-    pending_submissions = Submission.objects.filter(
-        user=request.user,
-        status__in=['queued', 'running'],
-        external_token__isnull=False
-    ).exclude(external_token='')
-    
-    updated_count = 0
-    for submission in pending_submissions[:5]:  # Limit to avoid timeout
-        if update_submission_from_judge0(submission):
-            updated_count += 1
-    
-    if updated_count > 0:
-        # Refresh profile stats after updates
-        profile.refresh_from_db()
-    
-    # Calculate detailed statistics
-    solved = Submission.objects.filter(user=request.user, status='passed').values('challenge').distinct().count()
-    total = Challenge.objects.count()
-    total_submissions = Submission.objects.filter(user=request.user).count()
-    passed_submissions = Submission.objects.filter(user=request.user, status='passed').count()
-    failed_submissions = Submission.objects.filter(user=request.user, status='failed').count()
-    error_submissions = Submission.objects.filter(user=request.user, status='error').count()
-    pending_submissions_count = Submission.objects.filter(
-        user=request.user, 
-        status__in=['queued', 'running']
-    ).count()
-    
-    # Calculate success rate
-    success_rate = 0
-    if total_submissions > 0:
-        success_rate = round((passed_submissions / total_submissions) * 100, 1)
-    
+    # The template reads profile.badges.all several times
+    prefetch_related_objects([profile], 'badges')
+
     # Get recent submissions with more details
-    recent = Submission.objects.filter(user=request.user).select_related('challenge').order_by('-created_at')[:10]
-    
+    recent = list(
+        Submission.objects.filter(user=request.user).select_related('challenge').order_by('-created_at')[:10]
+    )
+
+    # All counters come from one cached aggregate; no Judge0 calls here
+    stats = submission_stats(
+        request.user,
+        latest_submission_at=recent[0].created_at if recent else None,
+        last_activity=profile.last_activity,
+    )
+
     # Get solved challenges
     solved_challenges = Submission.objects.filter(
         user=request.user, 
         status='passed'
     ).values('challenge__title', 'challenge__slug', 'challenge__difficulty').distinct()
-    
+
     return render(request, 'coding_challenges/profile.html', {
         'profile': profile,
-        'solved': solved,
-        'total': total,
+        'stats': stats,
+        'solved': stats['solved'],
+        'total': stats['total'],
         'recent': recent,
-        'total_submissions': total_submissions,
-        'passed_submissions': passed_submissions,
-        'failed_submissions': failed_submissions,
-        'error_submissions': error_submissions,
-        'pending_submissions': pending_submissions_count,
-        'success_rate': success_rate,
+        'total_submissions': stats['total_submissions'],
+        'passed_submissions': stats['passed_submissions'],
+        'failed_submissions': stats['failed_submissions'],
+        'error_submissions': stats['error_submissions'],
+        'pending_submissions': stats['pending_submissions'],
+        'success_rate': stats['success_rate'],
         'solved_challenges': solved_challenges,
-        'updated_count': updated_count,
     })
 
 class StaffAddChallengeRequired(UserPassesTestMixin):
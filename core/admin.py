@@ -74,11 +74,12 @@ class ProjectAdmin(admin.ModelAdmin):
 
 @admin.register(LearningResource)
 class LearningResourceAdmin(admin.ModelAdmin):
-    list_display = ('title', 'resource_type', 'status', 'view_count', 'created_at', 'admin_thumbnail')
-    list_filter = ('status', 'resource_type', 'created_at')
-    search_fields = ('title', 'short_description', 'description', 'document_text')
+    list_display = ('title', 'resource_type', 'status', 'extraction_status', 'view_count', 'created_at', 'admin_thumbnail')
+    list_filter = ('status', 'resource_type', 'extraction_status', 'created_at')
+    search_fields = ('title', 'short_description', 'description', 'pages__text')
     list_editable = ('status',)
-    readonly_fields = ('view_count', 'created_at', 'updated_at', 'published_at', 'admin_thumbnail')
+    readonly_fields = ('view_count', 'created_at', 'updated_at', 'published_at', 'admin_thumbnail', 'extraction_status', 'page_count', 'extraction_error')
+    actions = ['extract_document_text']
     prepopulated_fields = {'slug': ('title',)}
     fieldsets = (
         ('Basic Information', {
@@ -88,7 +89,7 @@ class LearningResourceAdmin(admin.ModelAdmin):
             'fields': ('short_description', 'description', 'content', 'read_time')
         }),
         ('Media', {
-            'fields': ('image', 'admin_thumbnail', 'image_caption', 'video_url', 'document')
+            'fields': ('image', 'admin_thumbnail', 'image_caption', 'video_url', 'document', 'extraction_status', 'page_count', 'extraction_error')
         }),
         ('Metadata', {
             'fields': ('view_count', 'created_at', 'updated_at', 'published_at'),
@@ -101,7 +102,14 @@ class LearningResourceAdmin(admin.ModelAdmin):
             return mark_safe(f'<img src="{obj.image.url}" width="100" />')
         return "No Image"
     admin_thumbnail.short_description = 'Thumbnail'
-    
+
+    def extract_document_text(self, request, queryset):
+        from .documents import get_document_extractor
+        resources = queryset.exclude(document='').exclude(document__isnull=True).only('id', 'document')
+        count = len(get_document_extractor().submit(resources))
+        self.message_user(request, f"Text extraction started for {count} document(s).")
+    extract_document_text.short_description = 'Extract document text again'
+
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('author')
     
@@ -0,0 +1,163 @@
+"""
+Buffered view counters.
+
+Counting a page view with ``save(update_fields=['view_count'])`` writes the
+hot row on every request, and on SQLite every such write takes the database
+write lock, so popular pages end up waiting on each other. A read-modify-write
+``view_count += 1`` also loses concurrent views.
+
+``CounterBuffer`` adds views up in memory instead, per (model, field, object).
+Every ``VIEW_COUNT_FLUSH_INTERVAL_SECONDS`` (or when
+``VIEW_COUNT_BUFFER_MAX_ENTRIES`` objects are pending) the buffer is written
+with one ``bulk_update`` per model and field. Each object gets
+``view_count = view_count + n``, so flushes from several worker processes
+add up instead of overwriting each other.
+
+``merge`` adds the views still pending in this process to loaded objects, so
+a detail page shows its own view at once. Other processes' pending views
+appear after their next flush. Views still in memory are lost if the
+process is killed; a normal exit flushes them.
+"""
+import time
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 400
+
+
+class CounterBuffer:
+    """Per-process, thread-safe buffer of counter increments"""
+
+    def __init__(self, flush_interval=10.0, max_entries=1000, background=True):
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.background = background
+        self._pending = {}  # (model, field, pk) -> increment
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher = None
+        self.increments = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def increment(self, obj, field='view_count', amount=1):
+        """Count ``amount`` for ``obj`` and show it on ``obj`` (see merge)"""
+        key = (type(obj), field, obj.pk)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + amount
+            self.increments += 1
+            due = (
+                len(self._pending) >= self.max_entries
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        merged = obj.__dict__.setdefault('_merged_counters', set())
+        if field in merged:
+            setattr(obj, field, getattr(obj, field) + amount)
+        else:
+            self.merge([obj], field)
+        if self.background:
+            self._start_flusher()
+        if due:
+            self.flush()
+
+    def pending(self, model, pk, field='view_count'):
+        with self._lock:
+            return self._pending.get((model, field, pk), 0)
+
+    def merge(self, objects, field='view_count'):
+        """Add the increments pending in this process to the loaded ``field`` of ``objects``"""
+        with self._lock:
+            for obj in objects:
+                merged = obj.__dict__.setdefault('_merged_counters', set())
+                if field in merged:
+                    continue
+                merged.add(field)
+                setattr(obj, field, getattr(obj, field) + self._pending.get((type(obj), field, obj.pk), 0))
+        return objects
+
+    def flush(self):
+        """Write all pending increments. Returns the number of rows updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            by_column = defaultdict(list)
+            for (model, field, pk), amount in pending.items():
+                obj = model(pk=pk)
+                setattr(obj, field, F(field) + amount)
+                by_column[model, field].append(obj)
+            try:
+                with transaction.atomic():
+                    written = sum(
+                        model.objects.bulk_update(objects, [field], batch_size=BATCH_SIZE)
+                        for (model, field), objects in by_column.items()
+                    )
+            except DatabaseError as e:
+                logger.error(f"Failed to flush {len(pending)} counters: {str(e)}")
+                self._requeue(pending)
+                return 0
+            with self._lock:
+                self.flushes += 1
+                self.rows_written += written
+            return written
+
+    def _requeue(self, pending):
+        with self._lock:
+            for key, amount in pending.items():
+                self._pending[key] = self._pending.get(key, 0) + amount
+
+    def _start_flusher(self):
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='counter-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _run_flusher(self):
+        # Increments also flush when due, this covers a buffer that went quiet
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Counter flusher error: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'increments': self.increments,
+                'flushes': self.flushes,
+                'rows_written': self.rows_written,
+            }
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = CounterBuffer(
+                    flush_interval=getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL_SECONDS', 10),
+                    max_entries=getattr(settings, 'VIEW_COUNT_BUFFER_MAX_ENTRIES', 1000),
+                )
+    return _counter
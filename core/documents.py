@@ -0,0 +1,207 @@
+"""
+Background text extraction for LearningResource documents.
+
+Saving a resource with a new PDF no longer extracts its text on the admin's
+request. The save drops the old document's pages, marks the resource
+``pending`` and, once the transaction commits, hands it to
+``queue_extraction``. The document is read in a process pool (see
+``core.pdf_text``) with a per-document timeout of
+``DOCUMENT_EXTRACTION_TIMEOUT_SECONDS``. When it finishes, its pages are
+stored as DocumentPage rows, one per page, in the transaction that sets
+``page_count`` and ``extraction_status`` to ``done`` (or ``failed`` with the
+error). Readers fetch a few pages at a time from them (see
+``read_pages``), so nothing ever loads the whole book.
+
+The status UPDATE only applies while the resource still has the document
+that was read, so a result for a file that has since been replaced is
+dropped. Jobs live in the web process: one that is still ``pending`` or ``processing``
+when the process exits is picked up again by the ``extract_documents``
+command, which also retries failed documents with ``--failed``.
+"""
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import DocumentPage, LearningResource
+from .pdf_text import extract_pages
+
+logger = logging.getLogger(__name__)
+
+ERROR_LENGTH = 255
+PAGE_BATCH = 500
+# Pages per reader request: the page shown and the next ones, fetched ahead
+READER_PAGES = 3
+READER_MAX_PAGES = 10
+
+
+def _source(document):
+    """The path of ``document``, or its bytes when the storage is not on this machine"""
+    try:
+        return document.path
+    except NotImplementedError:
+        with document.open('rb') as f:
+            return f.read()
+
+
+def _current(resource_id, name):
+    return LearningResource.objects.filter(pk=resource_id, document=name)
+
+
+def _opening(pages, length=200):
+    """The first ``length`` characters of the document"""
+    text = ''
+    for page in pages:
+        text = f"{text}\n{page}" if text else page
+        if len(text) >= length:
+            break
+    return text[:length]
+
+
+def store_pages(resource_id, name, pages):
+    """Save the page texts of document ``name``; False if the resource no longer has it"""
+    with transaction.atomic():
+        if not _current(resource_id, name).update(
+            page_count=len(pages), extraction_status='done', extraction_error=''
+        ):
+            return False
+        DocumentPage.objects.filter(resource_id=resource_id).delete()
+        DocumentPage.objects.bulk_create(
+            [DocumentPage(resource_id=resource_id, number=number, text=text) for number, text in enumerate(pages, 1)],
+            batch_size=PAGE_BATCH,
+        )
+        opening = _opening(pages)
+        if opening.strip():
+            # As before: a resource without a description gets the start of its document
+            LearningResource.objects.filter(pk=resource_id, description='').update(description=opening + '...')
+    return True
+
+
+def read_pages(resource, start, count):
+    """[(number, text)] of up to ``count`` pages of ``resource``, from page ``start``"""
+    return list(
+        DocumentPage.objects.filter(resource_id=resource.pk, number__gte=start, number__lt=start + count)
+        .order_by('number').values_list('number', 'text')
+    )
+
+
+def store_failure(resource_id, name, error):
+    logger.warning(f"Text extraction failed for learning resource {resource_id} ({name}): {error}")
+    _current(resource_id, name).update(extraction_status='failed', extraction_error=str(error)[:ERROR_LENGTH])
+
+
+def _jobs(resources):
+    """(resource id, document name, source) of ``resources`` that have a document, marked processing"""
+    jobs = []
+    for resource in resources:
+        if not resource.document:
+            continue
+        try:
+            jobs.append((resource.pk, resource.document.name, _source(resource.document)))
+        except (OSError, ValueError) as e:
+            store_failure(resource.pk, resource.document.name, e)
+    if jobs:
+        LearningResource.objects.filter(pk__in=[pk for pk, _, _ in jobs]).update(extraction_status='processing')
+    return jobs
+
+
+class DocumentExtractor:
+    """Runs extraction jobs in a process pool and stores their results as they finish"""
+
+    def __init__(self, workers=2, timeout=120):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    methods = multiprocessing.get_all_start_methods()
+                    # Fork from a clean server process, not from a Django worker holding DB connections
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def _submit(self, source):
+        try:
+            return self.pool.submit(extract_pages, source, self.timeout)
+        except BrokenProcessPool:
+            # A worker died (out of memory, killed): start a new pool once
+            with self._lock:
+                self._pool = None
+            return self.pool.submit(extract_pages, source, self.timeout)
+
+    def submit(self, resources):
+        """Start extracting ``resources`` and return at once. Returns the futures."""
+        futures = []
+        for resource_id, name, source in _jobs(resources):
+            future = self._submit(source)
+            future.add_done_callback(partial(self._finished, resource_id, name))
+            futures.append(future)
+        return futures
+
+    def _finished(self, resource_id, name, future):
+        try:
+            store_pages(resource_id, name, future.result())
+        except Exception as e:
+            store_failure(resource_id, name, e)
+        finally:
+            # Runs on the pool's result thread, which Django never closes connections for
+            if not connection.in_atomic_block:
+                connection.close()
+
+    def extract(self, resources):
+        """Extract ``resources`` and wait for them. Returns (done, failed)."""
+        futures = {
+            self._submit(source): (resource_id, name)
+            for resource_id, name, source in _jobs(resources)
+        }
+        done = failed = 0
+        for future in as_completed(futures):
+            resource_id, name = futures[future]
+            try:
+                store_pages(resource_id, name, future.result())
+                done += 1
+            except Exception as e:
+                store_failure(resource_id, name, e)
+                failed += 1
+        return done, failed
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_document_extractor():
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = DocumentExtractor(
+                    workers=getattr(settings, 'DOCUMENT_EXTRACTION_WORKERS', 2),
+                    timeout=getattr(settings, 'DOCUMENT_EXTRACTION_TIMEOUT_SECONDS', 120),
+                )
+    return _extractor
+
+
+def queue_extraction(resource_id):
+    """Extract the document of a resource in the background (called on commit by LearningResource.save)"""
+    resources = LearningResource.objects.filter(pk=resource_id).only('id', 'document')
+    try:
+        get_document_extractor().submit(resources)
+    except Exception as e:
+        logger.error(f"Could not queue text extraction for learning resource {resource_id}: {str(e)}")
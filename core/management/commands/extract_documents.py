@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.documents import DocumentExtractor
+from core.models import LearningResource
+
+
+class Command(BaseCommand):
+    help = "Extract the text of learning resource PDFs left pending (or interrupted) by the background extraction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Also retry documents whose extraction failed')
+        parser.add_argument('--all', action='store_true', help='Extract every document again')
+        parser.add_argument('--slug', help='Only the resource with this slug')
+        parser.add_argument('--workers', type=int, help='Extraction processes (default: DOCUMENT_EXTRACTION_WORKERS)')
+        parser.add_argument('--timeout', type=int, help='Seconds per document (default: DOCUMENT_EXTRACTION_TIMEOUT_SECONDS)')
+
+    def handle(self, *args, **options):
+        resources = LearningResource.objects.exclude(document='').exclude(document__isnull=True)
+        if options['slug']:
+            resources = resources.filter(slug=options['slug'])
+        if not options['all']:
+            statuses = ['pending', 'processing'] + (['failed'] if options['failed'] else [])
+            resources = resources.filter(extraction_status__in=statuses)
+
+        extractor = DocumentExtractor(
+            workers=options['workers'] or getattr(settings, 'DOCUMENT_EXTRACTION_WORKERS', 2),
+            timeout=options['timeout'] or getattr(settings, 'DOCUMENT_EXTRACTION_TIMEOUT_SECONDS', 120),
+        )
+        started = time.perf_counter()
+        try:
+            done, failed = extractor.extract(resources.only('id', 'document').order_by('pk'))
+        finally:
+            extractor.shutdown()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Extracted {done} documents in {elapsed:.1f} s ({failed} failed)"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:08
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def fill_extraction_status(apps, schema_editor):
+    """Text extracted on save is done; a document without text is left for the extract_documents command"""
+    LearningResource = apps.get_model('core', 'LearningResource')
+    with_document = LearningResource.objects.exclude(Q(document='') | Q(document__isnull=True))
+    with_document.exclude(document_text='').update(extraction_status='done')
+    with_document.filter(document_text='').update(extraction_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_project_options_alter_article_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningresource',
+            name='extraction_error',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='learningresource',
+            name='extraction_status',
+            field=models.CharField(choices=[('none', 'No document'), ('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='none', editable=False, help_text='Text extraction of the document, run in the background (core.documents)', max_length=10),
+        ),
+        migrations.RunPython(fill_extraction_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LINES_PER_PAGE = 40
+
+
+def split_document_text(apps, schema_editor):
+    """Store extracted texts as pages: the PDF's pages (form feeds), else 40 lines each as the reader showed them"""
+    LearningResource = apps.get_model('core', 'LearningResource')
+    DocumentPage = apps.get_model('core', 'DocumentPage')
+    for resource in LearningResource.objects.exclude(document_text='').only('id', 'document_text').iterator():
+        text = resource.document_text
+        if '\f' in text:
+            pages = text.split('\f')
+        else:
+            lines = text.split('\n')
+            pages = ['\n'.join(lines[i:i + LINES_PER_PAGE]) for i in range(0, len(lines), LINES_PER_PAGE)]
+        DocumentPage.objects.bulk_create(
+            [DocumentPage(resource_id=resource.pk, number=number, text=page) for number, page in enumerate(pages, 1)],
+            batch_size=500,
+        )
+        LearningResource.objects.filter(pk=resource.pk).update(page_count=len(pages))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_extraction_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningresource',
+            name='page_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='core.learningresource')),
+            ],
+            options={
+                'ordering': ['resource', 'number'],
+                'unique_together': {('resource', 'number')},
+            },
+        ),
+        migrations.RunPython(split_document_text, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='learningresource',
+            name='document_text',
+        ),
+    ]
@@ -1,12 +1,14 @@
 import os
 import mimetypes
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.urls import reverse
 from django.utils.text import slugify
-from .utils import extract_text_from_pdf, validate_video_url, get_video_embed_code
+from .utils import validate_video_url, get_video_embed_code
 
 class Contact(models.Model):
     name = models.CharField(max_length=100)
@@ -100,8 +102,9 @@ class Article(models.Model):
         super().save(*args, **kwargs)
     
     def increment_view_count(self):
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Count a view; written in batches by core.counters"""
+        from .counters import get_view_counter
+        get_view_counter().increment(self)
     
     def get_absolute_url(self):
         from django.urls import reverse
@@ -170,6 +173,14 @@ class LearningResource(models.Model):
         ('archived', 'Archived'),
     ]
     
+    EXTRACTION_STATUS_CHOICES = [
+        ('none', 'No document'),
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     resource_type = models.CharField(
@@ -196,7 +207,16 @@ class LearningResource(models.Model):
         null=True,
         help_text='Upload PDF document (max 10MB)'
     )
-    document_text = models.TextField(blank=True, editable=False)
+    page_count = models.PositiveIntegerField(default=0, editable=False)
+    extraction_status = models.CharField(
+        max_length=10,
+        choices=EXTRACTION_STATUS_CHOICES,
+        default='none',
+        editable=False,
+        db_index=True,
+        help_text='Text extraction of the document, run in the background (core.documents)'
+    )
+    extraction_error = models.CharField(max_length=255, blank=True, editable=False)
     
     # Media
     image = models.ImageField(
@@ -250,20 +270,34 @@ class LearningResource(models.Model):
             self.video_embed_code = get_video_embed_code(self.video_url)
             self._original_video_url = self.video_url
         
-        # Process PDF document
-        if self.document and self.document != getattr(self, '_original_document', None):
-            try:
-                self.document_text = extract_text_from_pdf(self.document)
-                self._original_document = self.document.name
-                
-                # If no description is set, use the first 200 chars of the PDF text
-                if not self.description and self.document_text:
-                    self.description = self.document_text[:200] + '...'
-            except Exception as e:
-                # If there's an error processing the PDF, don't fail the save
-                print(f"Error processing PDF: {e}")
+        # A new PDF document: its text is extracted in the background once the row is saved
+        document_changed = (
+            'document' not in self.get_deferred_fields()
+            and (self.document.name or '') != (getattr(self, '_original_document', None) or '')
+        )
+        if document_changed:
+            self.page_count = 0
+            self.extraction_status = 'pending' if self.document else 'none'
+            self.extraction_error = ''
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'page_count', 'extraction_status', 'extraction_error'}
         
         super().save(*args, **kwargs)
+        
+        if document_changed:
+            self._original_document = self.document.name
+            self.pages.all().delete()
+            if self.document:
+                from .documents import queue_extraction
+                transaction.on_commit(partial(queue_extraction, self.pk))
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored document so saving without a new upload does not extract it again
+        if 'document' in field_names:
+            instance._original_document = instance.__dict__['document']
+        return instance
     
     def clean(self):
         # Validate that video and document aren't both set
@@ -277,8 +311,9 @@ class LearningResource(models.Model):
             self.resource_type = 'pdf'
     
     def increment_view_count(self):
-        self.view_count = models.F('view_count') + 1
-        self.save(update_fields=['view_count'])
+        """Count a view; written in batches by core.counters"""
+        from .counters import get_view_counter
+        get_view_counter().increment(self)
     
     def get_absolute_url(self):
         return reverse('learning_resource_detail', args=[str(self.slug)])
@@ -304,4 +339,18 @@ class LearningResource(models.Model):
             models.Index(fields=['resource_type', 'status']),
         ]
         verbose_name = 'Learning Resource'
-        verbose_name_plural = 'Learning Resources'
\ No newline at end of file
+        verbose_name_plural = 'Learning Resources'
+
+
+class DocumentPage(models.Model):
+    """The extracted text of one page of a learning resource's document"""
+    resource = models.ForeignKey(LearningResource, on_delete=models.CASCADE, related_name='pages')
+    number = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.resource} - page {self.number}"
+
+    class Meta:
+        ordering = ['resource', 'number']
+        unique_together = ('resource', 'number')
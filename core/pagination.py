@@ -0,0 +1,192 @@
+"""
+Keyset (cursor) pagination.
+
+Django's ``Paginator`` counts the whole result set and reads a page with
+``OFFSET n``, so every page costs a COUNT(*) and page ``p`` scans and
+discards the ``(p - 1) * per_page`` rows before it. Both grow with the
+table and with the page depth.
+
+``KeysetPaginator`` instead remembers where a page ended. The queryset is
+ordered by key fields ending in a unique one (by default ``-created_at``,
+``-id``), and a page is the next ``per_page + 1`` rows after the cursor row:
+``created_at <= c AND (created_at < c OR id < i)``. The first condition is a
+range on the (created_at, id) index, so any page costs the same as the first.
+The extra row tells whether there is a next page. Going back reads the rows
+before the cursor in reverse order.
+
+Cursors are opaque URL-safe tokens wrapping the key values and the
+direction. A token that does not decode restarts at the first page. There
+are no page numbers. When a total is wanted, ``count='approximate'`` counts
+at most ``APPROXIMATE_COUNT_LIMIT`` rows, caches the result for
+``APPROXIMATE_COUNT_TTL`` seconds and reports whether it was capped.
+``count='exact'`` runs a full COUNT(*).
+"""
+import json
+import base64
+import hashlib
+import binascii
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+APPROXIMATE_COUNT_LIMIT = 10000
+APPROXIMATE_COUNT_TTL = 300
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps([direction] + [_dump(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(values, direction), or None for a missing or malformed token"""
+    if not token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(payload, list) or len(payload) < 2 or payload[0] not in ('next', 'prev'):
+        return None
+    return payload[1:], payload[0]
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterable like a Django Page"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page:
+            return ''
+        return encode_cursor(self.paginator.key_values(self.object_list[-1]), 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous_page:
+            return ''
+        return encode_cursor(self.paginator.key_values(self.object_list[0]), 'prev')
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by ``ordering``, whose last field must be unique.
+    Key fields must not be NULL; annotations may be used as keys.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), count=None):
+        if count not in (None, 'approximate', 'exact'):
+            raise ValueError(f"Unknown count mode: {count}")
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = [field.startswith('-') for field in self.ordering]
+        self.count_mode = count
+        self._count = None
+
+    def key_values(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def _after(self, values, backwards):
+        """Q selecting the rows after the cursor ``values`` in reading order"""
+        def beyond(index):
+            # Reading forwards through a descending key means smaller values
+            smaller = self.descending[index] != backwards
+            return Q(**{f'{self.fields[index]}__{"lt" if smaller else "gt"}': values[index]})
+
+        after = Q()
+        for index in range(len(self.fields)):
+            step = beyond(index)
+            for previous in range(index):
+                step &= Q(**{self.fields[previous]: values[previous]})
+            after |= step
+        # The same condition plus an index range on the leading key
+        leading = 'lte' if self.descending[0] != backwards else 'gte'
+        return Q(**{f'{self.fields[0]}__{leading}': values[0]}) & after
+
+    def get_page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        if decoded is not None and len(decoded[0]) != len(self.fields):
+            decoded = None
+        backwards = decoded is not None and decoded[1] == 'prev'
+
+        if backwards:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+        else:
+            ordering = list(self.ordering)
+        queryset = self.queryset.order_by(*ordering)
+        if decoded is not None:
+            try:
+                queryset = queryset.filter(self._after(decoded[0], backwards))
+            except (ValidationError, ValueError, TypeError):
+                # Well-formed token with values that do not fit the keys
+                return self.get_page()
+
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=more)
+        return KeysetPage(rows, self, has_next=more, has_previous=decoded is not None)
+
+    @property
+    def count(self):
+        """The total in ``count`` mode, or None"""
+        if self.count_mode == 'exact':
+            if self._count is None:
+                self._count = self.queryset.count()
+            return self._count
+        if self.count_mode == 'approximate':
+            return self._approximate_count()[0]
+        return None
+
+    @property
+    def count_is_capped(self):
+        """True when the approximate count stopped at APPROXIMATE_COUNT_LIMIT"""
+        return self.count_mode == 'approximate' and self._approximate_count()[1]
+
+    def _approximate_count(self):
+        if self._count is None:
+            sql, params = self.queryset.order_by().values('pk').query.sql_with_params()
+            key = 'keyset-count:' + hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+            self._count = cache.get(key)
+            if self._count is None:
+                self._count = self.queryset.order_by()[:APPROXIMATE_COUNT_LIMIT].count()
+                cache.set(key, self._count, APPROXIMATE_COUNT_TTL)
+        return self._count, self._count >= APPROXIMATE_COUNT_LIMIT
@@ -0,0 +1,59 @@
+"""
+PDF text extraction, run in pool processes.
+
+Only pypdf and the standard library are imported here: the document pool
+starts its processes from a clean forkserver (or spawn) process, and they
+should not have to set up Django. A job is the document's path (or its bytes
+when the storage has no local path), and the result is the text of each page.
+
+``iter_page_texts`` yields the pages one at a time, so a book is never held
+as a growing string; ``extract_pages`` collects them into a list, which the
+caller stores one row per page. A worker stops a document after ``timeout``
+seconds with SIGALRM, so one broken or huge file cannot keep a pool process
+busy and the process is free for the next document.
+"""
+import io
+import signal
+import threading
+from contextlib import contextmanager
+
+from pypdf import PdfReader
+
+PAGE_BREAK = '\f'
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+@contextmanager
+def _time_limit(seconds):
+    # Signal handlers can only be set from the main thread (a pool worker's tasks run there)
+    if not seconds or not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expired(signum, frame):
+        raise ExtractionTimeout(f"Text extraction took longer than {seconds} seconds")
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def iter_page_texts(source):
+    """The text of each page of ``source`` (a path or the PDF's bytes), in order"""
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    for page in reader.pages:
+        # A form feed inside the text would shift every later page
+        yield (page.extract_text() or '').replace(PAGE_BREAK, '\n').strip()
+
+
+def extract_pages(source, timeout=None):
+    """[page text] of ``source``; raises ExtractionTimeout after ``timeout`` seconds"""
+    with _time_limit(timeout):
+        return list(iter_page_texts(source))
@@ -84,5 +84,6 @@ urlpatterns = [
     # Learning resources
     path('learning-resources/', views.learning_resource_list, name='learning_resource_list'),
     path('learning-resources/<slug:slug>/', views.learning_resource_detail, name='learning_resource_detail'),
+    path('learning-resources/<slug:slug>/pages/', views.learning_resource_pages, name='learning_resource_pages'),
     path('bizflow_pos/docs/', views.bizflow_pos_docs, name='bizflow_pos_docs'),
 ]
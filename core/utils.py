@@ -4,18 +4,15 @@ import mimetypes
 from io import BytesIO
 from urllib.parse import urlparse
 
-from pypdf import PdfReader
 from django.core.files import File
 from django.core.exceptions import ValidationError
 
+from .pdf_text import PAGE_BREAK, iter_page_texts
+
 def extract_text_from_pdf(file):
-    """Extract text content from a PDF file."""
+    """Extract text content from a PDF file, pages separated by form feeds."""
     try:
-        pdf_reader = PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        return PAGE_BREAK.join(iter_page_texts(file)).strip()
     except Exception as e:
         raise ValidationError(f"Error extracting text from PDF: {str(e)}")
 
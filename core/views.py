@@ -1,6 +1,6 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db import models
-from django.db.models import Q, Count, Case, When, Value, IntegerField, F, Sum
+from django.db.models import Q, Count, Case, When, Value, IntegerField, Sum
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib import messages
@@ -15,6 +15,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils import timezone
+from django.utils.html import linebreaks
 from django.views.generic import (
     ListView, DetailView, CreateView, UpdateView, DeleteView, View, TemplateView
 )
@@ -26,6 +27,7 @@ import os
 import json
 from datetime import timedelta
 from .models import Contact, Project, Article, LearningResource, Comment
+from .documents import READER_MAX_PAGES, READER_PAGES, read_pages
 from coding_challenges.models import Challenge as CodeChallenge
 from lms.models import Course
 from .forms import ProjectForm, ProjectFilterForm, ArticleForm, CommentForm, ArticleQuickForm, ProjectQuickForm, ContactForm
@@ -736,9 +738,7 @@ def admin_article_detail(request, pk):
     comments = article.comments.all().order_by('created_at')
     
     # Increment view count
-    article.view_count = F('view_count') + 1
-    article.save(update_fields=['view_count'])
-    article.refresh_from_db()
+    article.increment_view_count()
     
     return render(request, 'admin/article_detail.html', {
         'article': article,
@@ -1116,9 +1116,30 @@ def learning_resource_detail(request, slug):
     context = {
         'resource': resource,
         'related_resources': related_resources,
+        'reader_pages': READER_PAGES,
     }
     
     return render(request, 'core/learning_resource_detail.html', context)
 
+@require_http_methods(["GET"])
+def learning_resource_pages(request, slug):
+    """JSON: the extracted text of a few pages of a resource's document, for the paged reader."""
+    resource = get_object_or_404(
+        LearningResource.objects.only('id', 'page_count', 'extraction_status'), slug=slug, status='published'
+    )
+    try:
+        start = max(1, int(request.GET.get('start', 1)))
+        count = min(READER_MAX_PAGES, max(1, int(request.GET.get('count', READER_PAGES))))
+    except ValueError:
+        return JsonResponse({'error': 'start and count must be numbers'}, status=400)
+    if resource.extraction_status != 'done':
+        return JsonResponse({'error': 'The document text is not ready', 'status': resource.extraction_status}, status=409)
+
+    pages = [
+        {'number': number, 'html': linebreaks(text, autoescape=True)}
+        for number, text in read_pages(resource, start, count)
+    ]
+    return JsonResponse({'page_count': resource.page_count, 'pages': pages})
+
 def bizflow_pos_docs(request):
     return render(request, 'core/bizflow_pos_docs.html')
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, InstructorProfile, Course, Lesson, Resource, Enrollment, Quiz, Question, Submission, Review, Certificate, Badge, UserBadge, Challenge
+from .models import Category, InstructorProfile, Course, CourseStats, Lesson, Resource, Enrollment, Quiz, Question, Submission, Review, Certificate, Badge, UserBadge, Challenge
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -28,7 +28,17 @@ class CourseAdmin(admin.ModelAdmin):
     inlines = [LessonInline, ResourceInline]
 
 admin.site.register(Enrollment)
-admin.site.register(Quiz)
+
+class QuestionInline(admin.StackedInline):
+    model = Question
+    extra = 1
+
+@admin.register(Quiz)
+class QuizAdmin(admin.ModelAdmin):
+    list_display = ("title", "course")
+    search_fields = ("title", "course__title")
+    inlines = [QuestionInline]
+
 admin.site.register(Question)
 admin.site.register(Submission)
 admin.site.register(Review)
@@ -37,6 +47,13 @@ admin.site.register(Badge)
 admin.site.register(UserBadge)
 
 
+@admin.register(CourseStats)
+class CourseStatsAdmin(admin.ModelAdmin):
+    list_display = ("course", "enrollments", "completed", "revenue", "updated_at")
+    readonly_fields = ("course", "enrollments", "completed", "progress_sum", "revenue", "updated_at")
+    search_fields = ("course__title",)
+
+
 @admin.register(Challenge)
 class ChallengeAdmin(admin.ModelAdmin):
     list_display = ("title", "difficulty", "points", "active", "start_at", "end_at")
@@ -4,6 +4,7 @@ from django.utils.decorators import method_decorator
 from django.core.paginator import Paginator
 from django.contrib import messages
 
+from core.pagination import KeysetPaginator
 from core.urls import staff_required  # reuse existing decorator
 from .models import Course, InstructorProfile, Challenge
 from .forms import CourseForm, InstructorProfileForm, ChallengeForm
@@ -16,8 +17,7 @@ def admin_challenge_list(request):
     challenges = Challenge.objects.all()
     if q:
         challenges = challenges.filter(title__icontains=q)
-    challenges = challenges.order_by('-created_at')
-    page_obj = Paginator(challenges, 12).get_page(request.GET.get('page'))
+    page_obj = KeysetPaginator(challenges, 12, count='approximate').get_page(request.GET.get('cursor'))
     return render(request, 'admin/lms/challenge_list.html', {
         'page_obj': page_obj,
         'q': q,
@@ -89,7 +89,7 @@ def admin_course_list(request):
     courses = Course.objects.select_related('instructor', 'category')
     if q:
         courses = courses.filter(title__icontains=q)
-    page_obj = Paginator(courses.order_by('-created_at'), 12).get_page(request.GET.get('page'))
+    page_obj = KeysetPaginator(courses, 12, count='approximate').get_page(request.GET.get('cursor'))
     return render(request, 'admin/lms/course_list.html', {'page_obj': page_obj, 'q': q})
 
 
@@ -0,0 +1,234 @@
+"""
+Course analytics rollup.
+
+``CourseStats`` keeps one row per course with its enrollment count, completed
+enrollments, the sum of enrollment progress and the revenue (price of a paid
+course times its enrollments), so the instructor dashboard renders from a
+single query instead of counting and loading enrollments per course.
+
+The row is maintained from model signals: creating or deleting an enrollment
+and changing its progress or completion apply the difference with one
+``F()`` UPDATE, and saving a course re-derives its revenue from the current
+price. Queryset ``update()``/``bulk_create`` bypass the signals, so
+``rebuild_course_stats`` (``manage.py rebuild_course_stats``) recomputes the
+rows from enrollments in one grouped query and repairs any drift.
+
+Module completion (the share of enrollments that completed every lesson of
+a module) is computed for all modules of a course by ``module_completion``
+in one grouped query over ``LessonProgress`` and cached per course until a
+progress record, lesson or enrollment of the course changes.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Course, CourseStats, Enrollment, Lesson, LessonProgress
+
+logger = logging.getLogger(__name__)
+
+RECENT_ENROLLMENT_DAYS = 30
+# Invalidation only reaches this process's cache; the TTL bounds staleness elsewhere
+MODULE_COMPLETION_CACHE_TTL = 600
+STATS_FIELDS = ['enrollments', 'completed', 'progress_sum', 'revenue', 'updated_at']
+
+
+def _price_of(course_id_ref):
+    """Per-enrollment revenue of a course, evaluated inside the UPDATE"""
+    price = Course.objects.filter(pk=course_id_ref, is_paid=True).values('price')[:1]
+    return Coalesce(Subquery(price), Value(Decimal('0')), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _apply(course_id, enrollments=0, completed=0, progress=0.0, sign=0):
+    """Add deltas to a course's row; ``sign`` adds or removes one enrollment's revenue"""
+    changes = {'updated_at': timezone.now()}
+    if enrollments:
+        changes['enrollments'] = F('enrollments') + enrollments
+    if completed:
+        changes['completed'] = F('completed') + completed
+    if progress:
+        changes['progress_sum'] = F('progress_sum') + progress
+    if sign:
+        changes['revenue'] = F('revenue') + sign * _price_of(course_id)
+    return CourseStats.objects.filter(course_id=course_id).update(**changes)
+
+
+def refresh_course_stats(course):
+    """Recompute one course's row from its enrollments and return it"""
+    course_id = getattr(course, 'pk', course)
+    rebuild_course_stats(Course.objects.filter(pk=course_id))
+    return CourseStats.objects.get(course_id=course_id)
+
+
+def rebuild_course_stats(courses=None):
+    """Recompute the rows of ``courses`` (default: all). Returns the number of rows written."""
+    courses = Course.objects.all() if courses is None else courses
+    totals = {
+        row['course']: row
+        for row in Enrollment.objects.filter(course__in=courses).order_by().values('course').annotate(
+            count=Count('id'),
+            done=Count('id', filter=Q(completed=True)),
+            progress=Sum('progress'),
+        )
+    }
+    rows = []
+    for course_id, is_paid, price in courses.order_by().values_list('id', 'is_paid', 'price'):
+        total = totals.get(course_id, {})
+        count = total.get('count', 0)
+        rows.append(CourseStats(
+            course_id=course_id,
+            enrollments=count,
+            completed=total.get('done', 0),
+            progress_sum=total.get('progress') or 0,
+            revenue=price * count if is_paid else 0,
+        ))
+    with transaction.atomic():
+        CourseStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['course'],
+            update_fields=STATS_FIELDS,
+        )
+    logger.info(f"Rebuilt course stats for {len(rows)} courses")
+    return len(rows)
+
+
+def course_saved(course, created):
+    if created:
+        CourseStats.objects.get_or_create(course_id=course.pk)
+        return
+    # The price or paid flag may have changed; revenue follows the current price
+    revenue = F('enrollments') * Value(course.price if course.is_paid else Decimal('0'))
+    CourseStats.objects.filter(course=course).update(
+        revenue=revenue, updated_at=timezone.now()
+    )
+
+
+def _snapshot(enrollment):
+    return enrollment.course_id, enrollment.progress or 0, bool(enrollment.completed)
+
+
+def enrollment_saved(enrollment, created, update_fields=None):
+    if update_fields is not None and not {'progress', 'completed', 'course'} & set(update_fields):
+        return
+    before = getattr(enrollment, '_stats_snapshot', None)
+    after = enrollment._stats_snapshot = _snapshot(enrollment)
+    course_id, progress, completed = after
+    if created:
+        updated = _apply(course_id, enrollments=1, completed=int(completed), progress=progress, sign=1)
+    elif before is None or None in before or before[0] != course_id:
+        # Stored values unknown (not loaded from the database) or moved to another course
+        for changed in {before and before[0], course_id} - {None}:
+            refresh_course_stats(changed)
+        return
+    else:
+        delta_progress = progress - before[1]
+        delta_completed = int(completed) - int(before[2])
+        if not (delta_progress or delta_completed):
+            return
+        updated = _apply(course_id, completed=delta_completed, progress=delta_progress)
+    if not updated:
+        refresh_course_stats(course_id)
+
+
+def enrollment_deleted(enrollment):
+    before = getattr(enrollment, '_stats_snapshot', None)
+    course_id, progress, completed = before if before and None not in before else _snapshot(enrollment)
+    # No refresh when the row is gone: the course is being deleted too
+    _apply(course_id, enrollments=-1, completed=-int(completed), progress=-progress, sign=-1)
+    invalidate_module_completion(course_id)
+
+
+def _module_completion_key(course_id):
+    return f"lms:module-completion:{course_id}"
+
+
+def invalidate_module_completion(course_id):
+    cache.delete(_module_completion_key(course_id))
+
+
+def module_completion(course):
+    """
+    {module id: enrollments that completed all of the module's lessons} for
+    every module of ``course``, from one query grouped by (enrollment, module)
+    """
+    course_id = getattr(course, 'pk', course)
+    key = _module_completion_key(course_id)
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    module_lessons = (
+        Lesson.objects.filter(module=OuterRef('lesson__module'))
+        .order_by().values('module').annotate(count=Count('id')).values('count')
+    )
+    completed_modules = (
+        LessonProgress.objects.filter(enrollment__course_id=course_id, completed=True, lesson__module__isnull=False)
+        .order_by()
+        .values('enrollment', 'lesson__module')
+        .annotate(done=Count('id'), lessons=Subquery(module_lessons))
+        .filter(done__gte=F('lessons'))
+        .values_list('lesson__module', flat=True)
+    )
+    counts = dict(Counter(completed_modules))
+    cache.set(key, counts, MODULE_COMPLETION_CACHE_TTL)
+    return counts
+
+
+def module_completion_rates(course):
+    """{module id: percentage of enrollments that completed the module}"""
+    enrollments = course.course_stats.enrollments
+    if not enrollments:
+        return {}
+    return {
+        module_id: round((done / enrollments) * 100, 1)
+        for module_id, done in module_completion(course).items()
+    }
+
+
+def instructor_dashboard_stats(instructor):
+    """
+    (courses, per-course stats, totals) for the instructor dashboard from two
+    queries: the courses joined with their CourseStats, and recent enrollments.
+    """
+    courses = list(
+        Course.objects.filter(instructor=instructor)
+        .select_related('category', 'stats')
+        .annotate(lesson_count=Count('lessons'))
+    )
+    course_stats = []
+    for course in courses:
+        stats = course.course_stats
+        course_stats.append({
+            'course': course,
+            'enrollments': stats.enrollments,
+            'completion_rate': stats.completion_rate,
+            'average_progress': stats.average_progress,
+            'revenue': stats.revenue,
+            'lessons': course.lesson_count,
+        })
+
+    recent_enrollments = Enrollment.objects.filter(
+        course__instructor=instructor,
+        created_at__gte=timezone.now() - timedelta(days=RECENT_ENROLLMENT_DAYS),
+    ).count()
+
+    totals = {
+        'total_courses': len(courses),
+        'published_courses': sum(1 for course in courses if course.status == 'published'),
+        'draft_courses': sum(1 for course in courses if course.status == 'draft'),
+        'total_students': sum(stat['enrollments'] for stat in course_stats),
+        'total_revenue': sum((stat['revenue'] for stat in course_stats), Decimal('0')),
+        'recent_enrollments': recent_enrollments,
+        # Precomputed by lms.reviews
+        'average_rating': instructor.average_rating,
+    }
+    return courses, course_stats, totals
@@ -0,0 +1,356 @@
+"""
+Course bundles: a whole course as one zip file.
+
+A bundle holds a manifest, ``course.json`` or ``course.yaml``, and the course
+image and resource files under ``media/``. The manifest is flat so it can be
+written record by record::
+
+    format: 1
+    course: {title, slug, description, ..., category: {name, slug}, image}
+    modules: [{key, title, description, order, duration_minutes, is_published}]
+    lessons: [{module, title, order, lesson_type, video_url, content, ...}]
+    resources: [{title, file}]
+
+A lesson's ``module`` is the ``key`` of its module, or null for a lesson
+directly in the course.
+
+``export_course`` streams: modules, lessons and resources are read with
+``iterator()`` and each record is encoded and written to the zip entry on its
+own. Media files are copied from storage in chunks. The output may be a
+non-seekable stream such as stdout.
+
+``import_course`` validates the whole manifest first and reports every
+problem at once. These include missing or oversized fields, unknown choices,
+duplicate orders that would break the unique constraints, dangling module
+keys and missing media. It then creates the course and ``bulk_create``s the
+modules, lessons and resources in one transaction. Slugs are generated in
+memory instead of one uniqueness query per record. Bulk inserts bypass model
+signals, so the search index, curriculum version and catalog version are
+refreshed once at the end.
+"""
+import os
+import json
+import shutil
+import logging
+import posixpath
+import zipfile
+
+import yaml
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import Category, Course, Lesson, Module, Resource
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFESTS = {'json': 'course.json', 'yaml': 'course.yaml'}
+MEDIA_DIR = 'media'
+ITERATOR_CHUNK = 500
+
+COURSE_FIELDS = (
+    'title', 'slug', 'description', 'short_description', 'curriculum', 'is_paid', 'price', 'difficulty',
+    'duration_hours', 'prerequisites', 'learning_outcomes', 'status', 'featured', 'published',
+)
+MODULE_FIELDS = ('title', 'description', 'order', 'duration_minutes', 'is_published')
+LESSON_FIELDS = (
+    'title', 'order', 'lesson_type', 'video_url', 'content', 'duration_minutes', 'is_preview', 'is_published',
+)
+
+
+class BundleError(Exception):
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__(f"Invalid course bundle: {len(self.problems)} problem(s)")
+
+
+# Export
+
+class _ManifestWriter:
+    """Writes the manifest's top-level keys and list items as they come"""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.first_key = True
+        self.first_item = True
+
+    def _write(self, text):
+        self.stream.write(text.encode('utf-8'))
+
+    def key(self, name, value):
+        if self.fmt == 'yaml':
+            self._write(yaml.safe_dump({name: value}, sort_keys=False, allow_unicode=True))
+        else:
+            self._write(('{\n' if self.first_key else ',\n') + f'{json.dumps(name)}: {json.dumps(value, indent=2)}')
+        self.first_key = False
+
+    def start_list(self, name):
+        if self.fmt == 'yaml':
+            self._write(f'{name}:\n')
+        else:
+            self._write(('{\n' if self.first_key else ',\n') + f'{json.dumps(name)}: [')
+        self.first_key = False
+        self.first_item = True
+
+    def item(self, value):
+        if self.fmt == 'yaml':
+            self._write(yaml.safe_dump([value], sort_keys=False, allow_unicode=True))
+        else:
+            self._write(('\n' if self.first_item else ',\n') + json.dumps(value))
+        self.first_item = False
+
+    def end_list(self):
+        # An empty YAML list reads back as null, which the importer accepts
+        if self.fmt == 'json':
+            self._write(']' if self.first_item else '\n]')
+
+    def close(self):
+        if self.fmt == 'json':
+            self._write('\n}\n')
+
+
+def _media_name(kind, pk, name):
+    return posixpath.join(MEDIA_DIR, kind, str(pk), os.path.basename(name))
+
+
+def _copy_media(archive, field_file, arcname):
+    with field_file.storage.open(field_file.name, 'rb') as source, archive.open(arcname, 'w') as target:
+        shutil.copyfileobj(source, target, length=1024 * 1024)
+
+
+def export_course(course, output, fmt='json'):
+    """Write ``course`` as a bundle to ``output`` (a path or a binary stream)"""
+    if fmt not in MANIFESTS:
+        raise ValueError(f"Unknown manifest format: {fmt}")
+    counts = {'modules': 0, 'lessons': 0, 'resources': 0}
+    resources = course.resources.order_by('id')
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(MANIFESTS[fmt], 'w', force_zip64=True) as stream:
+            manifest = _ManifestWriter(stream, fmt)
+            manifest.key('format', FORMAT_VERSION)
+            data = {field: getattr(course, field) for field in COURSE_FIELDS}
+            data['price'] = str(course.price)
+            data['category'] = {'name': course.category.name, 'slug': course.category.slug} if course.category else None
+            data['image'] = _media_name('course', course.pk, course.image.name) if course.image else None
+            manifest.key('course', data)
+
+            manifest.start_list('modules')
+            for module in course.modules.order_by('order').iterator(chunk_size=ITERATOR_CHUNK):
+                manifest.item(dict({'key': module.pk}, **{field: getattr(module, field) for field in MODULE_FIELDS}))
+                counts['modules'] += 1
+            manifest.end_list()
+
+            manifest.start_list('lessons')
+            for lesson in course.lessons.order_by('order', 'id').iterator(chunk_size=ITERATOR_CHUNK):
+                manifest.item(dict({'module': lesson.module_id}, **{field: getattr(lesson, field) for field in LESSON_FIELDS}))
+                counts['lessons'] += 1
+            manifest.end_list()
+
+            manifest.start_list('resources')
+            for resource in resources.iterator(chunk_size=ITERATOR_CHUNK):
+                manifest.item({'title': resource.title, 'file': _media_name('resources', resource.pk, resource.file.name)})
+                counts['resources'] += 1
+            manifest.end_list()
+            manifest.close()
+
+        # Media after the manifest: a zip is written one entry at a time
+        if course.image:
+            _copy_media(archive, course.image, data['image'])
+        for resource in resources.iterator(chunk_size=ITERATOR_CHUNK):
+            _copy_media(archive, resource.file, _media_name('resources', resource.pk, resource.file.name))
+    return counts
+
+
+# Import
+
+def _read_manifest(archive):
+    names = set(archive.namelist())
+    found = [(fmt, name) for fmt, name in MANIFESTS.items() if name in names]
+    if len(found) != 1:
+        raise BundleError([f"The bundle must contain exactly one of {', '.join(MANIFESTS.values())}"])
+    fmt, name = found[0]
+    try:
+        with archive.open(name) as stream:
+            manifest = yaml.safe_load(stream) if fmt == 'yaml' else json.load(stream)
+    except (ValueError, yaml.YAMLError) as e:
+        raise BundleError([f"{name} is not valid {fmt.upper()}: {e}"])
+    if not isinstance(manifest, dict):
+        raise BundleError([f"{name} must be a mapping"])
+    if manifest.get('format') != FORMAT_VERSION:
+        raise BundleError([f"Unsupported bundle format {manifest.get('format')!r}; expected {FORMAT_VERSION}"])
+    return manifest
+
+
+def _records(problems, manifest, name):
+    records = manifest.get(name) or []
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        problems.append(f"'{name}' must be a list of mappings")
+        return []
+    return records
+
+
+def _build(problems, where, model, record, fields, exclude=()):
+    """An unsaved ``model`` from ``record``, with its field errors added to ``problems``"""
+    unknown = set(record) - set(fields) - {'key', 'module', 'category', 'image', 'file'}
+    if unknown:
+        problems.append(f"{where}: unknown field(s) {', '.join(sorted(map(str, unknown)))}")
+    instance = model(**{field: record[field] for field in fields if field in record and record[field] is not None})
+    try:
+        # No uniqueness or foreign key checks here: those would query per record
+        instance.full_clean(exclude=list(exclude), validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        for field, messages in e.message_dict.items():
+            problems.extend(f"{where}: {field}: {message}" for message in messages)
+    return instance
+
+
+def _check_media(problems, where, names, path):
+    if path is not None and path not in names:
+        problems.append(f"{where}: media file {path!r} is not in the bundle")
+
+
+def _module_slugs(modules):
+    seen = {}
+    for module in modules:
+        base = slugify(module.title) or 'module'
+        slug, counter = base, 1
+        while slug in seen:
+            slug = f"{base}-{counter}"
+            counter += 1
+        seen[slug] = module
+        module.slug = slug
+
+
+class CoursePlan:
+    """A validated bundle, ready to be written"""
+
+    def __init__(self, course, category, image, modules, lessons, resources):
+        self.course = course
+        self.category = category
+        self.image = image
+        self.modules = modules        # [(key, Module)]
+        self.lessons = lessons        # [(module key or None, Lesson)]
+        self.resources = resources    # [(path, Resource)]
+
+
+def validate_bundle(archive, slug=None):
+    """Check every record of the bundle in ``archive``. Returns a CoursePlan or raises BundleError."""
+    manifest = _read_manifest(archive)
+    names = set(archive.namelist())
+    problems = []
+
+    data = manifest.get('course')
+    if not isinstance(data, dict):
+        raise BundleError(["'course' must be a mapping"])
+    data = dict(data)
+    data['slug'] = slug or data.get('slug') or slugify(data.get('title') or '')
+    course = _build(problems, 'course', Course, data, COURSE_FIELDS, exclude=['category', 'instructor', 'image'])
+    if course.slug and Course.objects.filter(slug=course.slug).exists():
+        problems.append(f"course: a course with slug {course.slug!r} already exists (use --slug)")
+    category = data.get('category')
+    if category is not None and not (isinstance(category, dict) and category.get('slug') and category.get('name')):
+        problems.append("course: category must be null or a mapping with 'name' and 'slug'")
+    _check_media(problems, 'course', names, data.get('image'))
+
+    modules, module_orders = [], set()
+    for index, record in enumerate(_records(problems, manifest, 'modules')):
+        where = f"modules[{index}]"
+        module = _build(problems, where, Module, record, MODULE_FIELDS, exclude=['course', 'slug'])
+        key = record.get('key')
+        if key is None or key in {k for k, _ in modules}:
+            problems.append(f"{where}: 'key' is missing or not unique")
+        if module.order in module_orders:
+            problems.append(f"{where}: order {module.order} is used by another module")
+        module_orders.add(module.order)
+        modules.append((key, module))
+    _module_slugs([module for _, module in modules])
+
+    module_keys = {key for key, _ in modules}
+    lessons, lesson_orders = [], set()
+    for index, record in enumerate(_records(problems, manifest, 'lessons')):
+        where = f"lessons[{index}]"
+        lesson = _build(problems, where, Lesson, record, LESSON_FIELDS, exclude=['course', 'module', 'slug'])
+        key = record.get('module')
+        if key is not None and key not in module_keys:
+            problems.append(f"{where}: module {key!r} is not defined in 'modules'")
+        # Unique per course, and so also per (module, order)
+        if lesson.order in lesson_orders:
+            problems.append(f"{where}: order {lesson.order} is used by another lesson")
+        lesson_orders.add(lesson.order)
+        lesson.slug = slugify(lesson.title)
+        lessons.append((key, lesson))
+
+    resources = []
+    for index, record in enumerate(_records(problems, manifest, 'resources')):
+        where = f"resources[{index}]"
+        resource = _build(problems, where, Resource, record, ('title',), exclude=['course', 'file'])
+        if not record.get('file'):
+            problems.append(f"{where}: 'file' is required")
+        _check_media(problems, where, names, record.get('file'))
+        resources.append((record.get('file'), resource))
+
+    if problems:
+        raise BundleError(problems)
+    return CoursePlan(course, category, data.get('image'), modules, lessons, resources)
+
+
+def _save_media(archive, field_file, path, saved):
+    with archive.open(path) as stream:
+        field_file.save(os.path.basename(path), File(stream), save=False)
+    saved.append(field_file)
+
+
+def import_course(archive, instructor, slug=None):
+    """
+    Create the course in the bundle ``archive`` (a ZipFile) for
+    ``instructor``. Returns the course; raises BundleError without writing
+    anything when the bundle is invalid.
+    """
+    from .catalog import bump_catalog_version
+    from .curriculum import bump_curriculum_version
+    from .search import index_courses
+
+    plan = validate_bundle(archive, slug=slug)
+    course = plan.course
+    saved = []
+    try:
+        with transaction.atomic():
+            if plan.category:
+                course.category, _ = Category.objects.get_or_create(
+                    slug=plan.category['slug'], defaults={'name': plan.category['name']}
+                )
+            course.instructor = instructor
+            if plan.image:
+                _save_media(archive, course.image, plan.image, saved)
+            course.save()
+
+            for _, module in plan.modules:
+                module.course = course
+            Module.objects.bulk_create([module for _, module in plan.modules], batch_size=ITERATOR_CHUNK)
+            modules = dict(plan.modules)
+            for key, lesson in plan.lessons:
+                lesson.course = course
+                lesson.module = modules[key] if key is not None else None
+            Lesson.objects.bulk_create([lesson for _, lesson in plan.lessons], batch_size=ITERATOR_CHUNK)
+
+            for path, resource in plan.resources:
+                resource.course = course
+                _save_media(archive, resource.file, path, saved)
+            Resource.objects.bulk_create([resource for _, resource in plan.resources], batch_size=ITERATOR_CHUNK)
+
+            # What the skipped post_save signals would have done, once
+            bump_curriculum_version(course.pk)
+            index_courses([course.pk])
+            transaction.on_commit(bump_catalog_version)
+    except Exception:
+        for field_file in saved:
+            field_file.storage.delete(field_file.name)
+        raise
+    logger.info(
+        f"Imported course {course.slug}: {len(plan.modules)} modules, {len(plan.lessons)} lessons, "
+        f"{len(plan.resources)} resources"
+    )
+    return course
@@ -0,0 +1,131 @@
+"""
+Public catalog page cache.
+
+The course list and course detail pages look the same for every anonymous
+visitor, and the catalog changes rarely. For those visitors the page body is
+rendered once per set of query parameters and cached as a fragment under the
+catalog version, a millisecond timestamp that any Course, Category, Lesson or
+Resource save or delete moves forward. A new version simply misses the old
+fragments, so nothing has to be deleted, and the version never goes back even
+if the cache is cleared. The surrounding layout (navigation, messages, CSRF
+token) is rendered for every request.
+
+Anonymous responses carry an ETag that is a hash of the rendered fragment,
+stored with it, so a fragment rendered again with different content never
+matches a validator a browser kept. Last-Modified is the time the page's
+content last changed, as seen by this cache: a per-page record of the
+latest hash and when it first appeared. A repeat request with a matching
+If-None-Match or If-Modified-Since gets a 304 without touching the database.
+Signed-in users see enrollment state, so their pages are rendered without
+the fragment cache or validators.
+
+Course statistics (enrollment counts, ratings) are updated without signals,
+so the fragments may show them up to ``CATALOG_CACHE_SECONDS`` old. Reviews
+move the version (the detail page lists them), so they show at once. The
+version lives in the default cache; use a shared backend in production so a
+change made in one process reaches the others.
+"""
+import time
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
+
+from .models import Category
+
+VERSION_KEY = 'lms:catalog-version'
+# The version key itself must outlive the fragments keyed by it
+VERSION_TTL = None
+# How long a page's latest content hash is remembered for Last-Modified
+CHANGED_TTL = 30 * 24 * 3600
+
+
+def catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(VERSION_KEY, version, VERSION_TTL):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    version = max(int(time.time() * 1000), catalog_version() + 1)
+    cache.set(VERSION_KEY, version, VERSION_TTL)
+    return version
+
+
+def _cache_seconds():
+    return getattr(settings, 'CATALOG_CACHE_SECONDS', 300)
+
+
+def catalog_categories():
+    """Every category, cached for the current catalog version"""
+    key = f"lms:catalog:categories:{catalog_version()}"
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.all())
+        cache.set(key, categories, _cache_seconds())
+    return categories
+
+
+def _page_key(name, request):
+    params = urlencode(sorted(request.GET.lists()), doseq=True)
+    return f"{name}:{request.path}?{params}"
+
+
+def _content_changed_at(page, digest):
+    """When the content of ``page`` became ``digest``: kept while the content stays the same"""
+    key = f"lms:catalog:changed:{page}"
+    seen = cache.get(key)
+    if seen is not None and seen[0] == digest:
+        return seen[1]
+    changed_at = datetime.now(tz=dt_timezone.utc)
+    cache.set(key, (digest, changed_at), CHANGED_TTL)
+    return changed_at
+
+
+def catalog_page(request, name, template, fragment_template, build_context):
+    """
+    Render ``template`` around ``fragment_template``. ``build_context()``
+    returns the fragment context and is only called when the fragment has to
+    be rendered.
+    """
+    if request.user.is_authenticated:
+        context = build_context()
+        return render(request, template, {
+            'title': context['title'],
+            'catalog_html': render_to_string(fragment_template, context, request=request),
+        })
+
+    version = catalog_version()
+    page = hashlib.md5(_page_key(name, request).encode()).hexdigest()
+    key = f"lms:catalog:{version}:{page}"
+    entry = cache.get(key)
+    if entry is None:
+        context = build_context()
+        html = render_to_string(fragment_template, context, request=request)
+        digest = hashlib.md5(html.encode()).hexdigest()
+        entry = {
+            'title': context['title'],
+            'html': html,
+            'digest': digest,
+            'last_modified': _content_changed_at(page, digest),
+        }
+        cache.set(key, entry, _cache_seconds())
+
+    etag = quote_etag(entry['digest'])
+    last_modified = int(entry['last_modified'].timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render(request, template, {'title': entry['title'], 'catalog_html': entry['html']})
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    # Stored by the browser but revalidated on every visit
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
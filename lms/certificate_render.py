@@ -0,0 +1,81 @@
+"""
+Certificate rendering, run in pool processes.
+
+Only Pillow and the standard library are imported here: the certificate
+pool starts its processes from a clean forkserver (or spawn) process, and
+they should not have to set up Django. A job is a plain dict of the texts to
+print, and the result is the PDF as bytes; the caller stores it.
+
+The page background (the template image, or the built-in border and
+headings) and the fonts are prepared once per process and reused for every
+certificate it renders, so a certificate only costs drawing a few lines of
+text and encoding the page.
+"""
+import io
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+# A4 landscape at 150 dpi
+DPI = 150
+PAGE_SIZE = (1754, 1240)
+INK = (33, 37, 41)
+ACCENT = (102, 126, 234)
+MUTED = (108, 117, 125)
+MARGIN = 160
+
+
+@lru_cache(maxsize=None)
+def _font(size, path=''):
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size=size)
+
+
+@lru_cache(maxsize=4)
+def _background(template_path='', font_path=''):
+    if template_path:
+        return Image.open(template_path).convert('RGB').resize(PAGE_SIZE)
+    page = Image.new('RGB', PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(page)
+    width, height = PAGE_SIZE
+    draw.rectangle((40, 40, width - 41, height - 41), outline=ACCENT, width=12)
+    draw.rectangle((70, 70, width - 71, height - 71), outline=ACCENT, width=3)
+    draw.text((width / 2, 240), 'Certificate of Completion', font=_font(96, font_path), fill=INK, anchor='mm')
+    draw.text((width / 2, 400), 'This certifies that', font=_font(40, font_path), fill=MUTED, anchor='mm')
+    draw.text((width / 2, 640), 'has successfully completed the course', font=_font(40, font_path), fill=MUTED, anchor='mm')
+    return page
+
+
+def _fitted_font(draw, text, size, font_path):
+    """The largest font up to ``size`` that fits ``text`` between the margins"""
+    limit = PAGE_SIZE[0] - 2 * MARGIN
+    while size > 24 and draw.textlength(text, font=_font(size, font_path)) > limit:
+        size -= 4
+    return _font(size, font_path)
+
+
+def render_certificate(job, template_path='', font_path=''):
+    """
+    PDF bytes for ``job``: {'name', 'course', 'instructor', 'issued',
+    'code', 'verify_url'}
+    """
+    page = _background(template_path, font_path).copy()
+    draw = ImageDraw.Draw(page)
+    center = PAGE_SIZE[0] / 2
+    draw.text((center, 520), job['name'], font=_fitted_font(draw, job['name'], 88, font_path), fill=ACCENT, anchor='mm')
+    draw.text((center, 760), job['course'], font=_fitted_font(draw, job['course'], 64, font_path), fill=INK, anchor='mm')
+    if job.get('instructor'):
+        draw.text((center, 860), f"Instructor: {job['instructor']}", font=_font(36, font_path), fill=MUTED, anchor='mm')
+    draw.text((MARGIN, 1040), f"Issued {job['issued']}", font=_font(32, font_path), fill=INK, anchor='lm')
+    draw.text((PAGE_SIZE[0] - MARGIN, 1040), f"Certificate {job['code']}", font=_font(32, font_path), fill=INK, anchor='rm')
+    if job.get('verify_url'):
+        draw.text((center, 1110), f"Verify at {job['verify_url']}", font=_font(26, font_path), fill=MUTED, anchor='mm')
+
+    output = io.BytesIO()
+    page.save(output, 'PDF', resolution=DPI)
+    return output.getvalue()
+
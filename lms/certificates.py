@@ -0,0 +1,165 @@
+"""
+Course completion certificates.
+
+An enrollment gets its Certificate when it is saved as completed (see the
+Enrollment receiver in lms.models). ``issue_certificates`` issues the
+missing ones in bulk, which also covers completions written without signals;
+the ``issue_certificates`` command runs it for every completed enrollment.
+
+A code is 20 random hex digits followed by the first 12 hex digits of an
+HMAC of them keyed with SECRET_KEY. ``verify_certificate`` checks that
+signature with ``constant_time_compare`` before looking anything up, so a
+guessed or mistyped code is rejected in the same time without a query, and
+a genuine one costs a single lookup on the unique ``certificate_code``
+index.
+
+The PDFs are drawn by lms.certificate_render and stored once as
+``lms/certificates/<code>.pdf`` in the media storage, recorded on
+``Certificate.file``. ``certificate_pdf`` renders a certificate on its first
+download; ``render_certificates`` renders many in a process pool.
+"""
+import os
+import re
+import secrets
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.dateformat import format as date_format
+
+from .certificate_render import render_certificate
+from .models import Certificate, Enrollment
+
+SIGNATURE_SALT = 'lms.certificates.code'
+TOKEN_LENGTH = 20
+SIGNATURE_LENGTH = 12
+CODE_RE = re.compile(r'[0-9A-F]{%d}' % (TOKEN_LENGTH + SIGNATURE_LENGTH))
+ISSUE_BATCH = 500
+RENDER_CHUNK = 4
+
+
+def _signature(token):
+    return salted_hmac(SIGNATURE_SALT, token, algorithm='sha256').hexdigest()[:SIGNATURE_LENGTH].upper()
+
+
+def new_certificate_code():
+    token = secrets.token_hex(TOKEN_LENGTH // 2).upper()
+    return token + _signature(token)
+
+
+def normalize_code(code):
+    """Codes are printed in upper case; accept them typed with spaces, dashes or lower case"""
+    return re.sub(r'[\s-]', '', code or '').upper()
+
+
+def code_is_genuine(code):
+    return bool(CODE_RE.fullmatch(code)) and constant_time_compare(code[TOKEN_LENGTH:], _signature(code[:TOKEN_LENGTH]))
+
+
+def certificates_with_details():
+    return Certificate.objects.select_related('enrollment__user', 'enrollment__course__instructor__user')
+
+
+def verify_certificate(code):
+    """The certificate with ``code``, or None"""
+    code = normalize_code(code)
+    if not code_is_genuine(code):
+        return None
+    return certificates_with_details().filter(certificate_code=code).first()
+
+
+def issue_certificates(enrollments=None):
+    """
+    Issue certificates for the completed enrollments that have none, limited
+    to ``enrollments`` (ids or a queryset) if given. Returns how many were
+    issued.
+    """
+    pending = Enrollment.objects.filter(completed=True, certificate__isnull=True)
+    if enrollments is not None:
+        pending = pending.filter(pk__in=enrollments)
+    enrollment_ids = list(pending.values_list('pk', flat=True))
+    issued_at = timezone.now()
+    issued = 0
+    for start in range(0, len(enrollment_ids), ISSUE_BATCH):
+        certificates = [
+            Certificate(enrollment_id=enrollment_id, issued_at=issued_at, certificate_code=new_certificate_code())
+            for enrollment_id in enrollment_ids[start:start + ISSUE_BATCH]
+        ]
+        # A concurrent completion may have issued some of these first; its certificate stands
+        Certificate.objects.bulk_create(certificates, ignore_conflicts=True)
+        issued += Certificate.objects.filter(certificate_code__in=[c.certificate_code for c in certificates]).count()
+    return issued
+
+
+def _display_name(user):
+    return user.get_full_name() or user.username
+
+
+def certificate_job(certificate):
+    """What lms.certificate_render prints on ``certificate``"""
+    enrollment = certificate.enrollment
+    instructor = enrollment.course.instructor
+    verify_path = reverse('lms:certificate_verify', args=[certificate.certificate_code])
+    return {
+        'name': _display_name(enrollment.user),
+        'course': enrollment.course.title,
+        'instructor': _display_name(instructor.user) if instructor else '',
+        'issued': date_format(timezone.localtime(certificate.issued_at), 'F j, Y'),
+        'code': certificate.certificate_code,
+        'verify_url': f"{getattr(settings, 'SITE_URL', '').rstrip('/')}{verify_path}",
+    }
+
+
+def _renderer():
+    return partial(
+        render_certificate,
+        template_path=getattr(settings, 'CERTIFICATE_TEMPLATE', ''),
+        font_path=getattr(settings, 'CERTIFICATE_FONT', ''),
+    )
+
+
+def _store(certificate, pdf):
+    certificate.file.save(f"{certificate.certificate_code}.pdf", ContentFile(pdf), save=False)
+
+
+def certificate_pdf(certificate):
+    """The stored PDF of ``certificate`` (loaded with certificates_with_details), rendered on first use"""
+    if not certificate.file or not certificate.file.storage.exists(certificate.file.name):
+        _store(certificate, _renderer()(certificate_job(certificate)))
+        Certificate.objects.filter(pk=certificate.pk).update(file=certificate.file.name)
+    return certificate.file
+
+
+def certificate_pool(workers=None):
+    """A process pool for render_certificates, or None to render in this process"""
+    workers = workers or getattr(settings, 'CERTIFICATE_WORKERS', None) or os.cpu_count() or 1
+    if workers < 2:
+        return None
+    methods = multiprocessing.get_all_start_methods()
+    # Fork from a clean server process, not from a Django process holding DB connections
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def render_certificates(certificates, pool=None):
+    """
+    Render and store the PDFs of ``certificates`` (loaded with
+    certificates_with_details), in ``pool`` if given. Returns how many were
+    rendered.
+    """
+    certificates = list(certificates)
+    jobs = [certificate_job(certificate) for certificate in certificates]
+    render = _renderer()
+    if pool is None:
+        pdfs = map(render, jobs)
+    else:
+        pdfs = pool.map(render, jobs, chunksize=RENDER_CHUNK)
+    for certificate, pdf in zip(certificates, pdfs):
+        _store(certificate, pdf)
+    Certificate.objects.bulk_update(certificates, ['file'], batch_size=ISSUE_BATCH)
+    return len(certificates)
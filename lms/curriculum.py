@@ -0,0 +1,119 @@
+"""
+Course player curriculum.
+
+The player page needs every module and lesson of a course, its resources and
+the learner's progress on each lesson. The course part is the same for every
+learner, so it is built once as plain data (modules -> lessons, resources)
+and cached under the course's ``curriculum_version``. Saving or deleting a
+lesson, module, resource or quiz bumps that version with an ``F()`` UPDATE, so
+the next page view misses the old entry in every process; nothing has to be
+deleted. The learner's LessonProgress rows (and heartbeats still buffered in
+this process, see ``lms.progress``) are merged into a copy on each request.
+
+A page view therefore costs the course, enrollment and progress queries, plus
+four more when the curriculum is not cached.
+"""
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Course, LessonProgress
+from .progress import get_progress_buffer
+
+CURRICULUM_CACHE_TTL = 24 * 3600
+LESSON_FIELDS = ('id', 'module_id', 'title', 'slug', 'lesson_type', 'video_url', 'content', 'duration_minutes')
+
+
+def bump_curriculum_version(course_id):
+    # updated_at too: it is the course page's Last-Modified (see lms.catalog)
+    Course.objects.filter(pk=course_id).update(
+        curriculum_version=F('curriculum_version') + 1, updated_at=timezone.now()
+    )
+
+
+def _cache_key(course):
+    return f"lms:curriculum:{course.pk}:{course.curriculum_version}"
+
+
+def build_curriculum(course):
+    """The learner-independent part of the player page as plain, cacheable data"""
+    modules = list(course.modules.order_by('order').values('id', 'title', 'order'))
+    by_module = {module['id']: module for module in modules}
+    for module in modules:
+        module['lessons'] = []
+
+    lessons = list(course.lessons.order_by('order', 'id').values(*LESSON_FIELDS))
+    unorganized = []
+    for number, lesson in enumerate(lessons, start=1):
+        lesson['number'] = number
+        module = by_module.get(lesson['module_id'])
+        lesson['module_title'] = module['title'] if module else ''
+        (module['lessons'] if module else unorganized).append(lesson)
+
+    resources = [{'title': resource.title, 'url': resource.file.url} for resource in course.resources.all()]
+    quizzes = list(course.quizzes.order_by('id').values('id', 'title'))
+    return {
+        'version': course.curriculum_version,
+        'modules': modules,
+        'lessons': lessons,
+        'unorganized': unorganized,
+        'resources': resources,
+        'quizzes': quizzes,
+    }
+
+
+def get_curriculum(course):
+    key = _cache_key(course)
+    curriculum = cache.get(key)
+    if curriculum is None:
+        curriculum = build_curriculum(course)
+        cache.set(key, curriculum, CURRICULUM_CACHE_TTL)
+    return curriculum
+
+
+def _percent(lesson, last_position, completed):
+    if completed:
+        return 100
+    if not lesson['duration_minutes']:
+        return 0
+    return min(99, int(last_position / (lesson['duration_minutes'] * 60) * 100))
+
+
+def learner_curriculum(course, enrollment):
+    """The cached curriculum with ``enrollment``'s progress merged into copies of its lessons"""
+    curriculum = get_curriculum(course)
+    state = {
+        lesson_id: [last_position, seconds_watched, completed]
+        for lesson_id, last_position, seconds_watched, completed in LessonProgress.objects.filter(
+            enrollment=enrollment
+        ).values_list('lesson_id', 'last_position', 'seconds_watched', 'completed')
+    }
+    for lesson_id, (last_position, watched_delta) in get_progress_buffer().pending_for(enrollment.pk).items():
+        entry = state.setdefault(lesson_id, [0, 0, False])
+        entry[0] = last_position
+        entry[1] += watched_delta
+
+    lessons = {}
+    for lesson in curriculum['lessons']:
+        last_position, seconds_watched, completed = state.get(lesson['id'], (0, 0, False))
+        lessons[lesson['id']] = dict(
+            lesson,
+            last_position=last_position,
+            seconds_watched=seconds_watched,
+            completed=completed,
+            percent=_percent(lesson, last_position, completed),
+        )
+    return {
+        'version': curriculum['version'],
+        'modules': [
+            dict(module, lessons=[lessons[lesson['id']] for lesson in module['lessons']])
+            for module in curriculum['modules']
+        ],
+        'lessons': list(lessons.values()),
+        'unorganized': [lessons[lesson['id']] for lesson in curriculum['unorganized']],
+        'resources': curriculum['resources'],
+        'quizzes': curriculum.get('quizzes', []),
+        'lesson_count': len(lessons),
+        'completed_count': sum(1 for lesson in lessons.values() if lesson['completed']),
+        'progress': {str(lesson_id): lesson['percent'] for lesson_id, lesson in lessons.items()},
+    }
@@ -0,0 +1,73 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.crypto import get_random_string
+
+from lms.certificate_render import _background, render_certificate
+from lms.certificates import RENDER_CHUNK, certificate_pool, new_certificate_code, verify_certificate
+
+
+def sample_jobs(count):
+    return [
+        {
+            'name': f"Learner {get_random_string(6)} {index}",
+            'course': 'Full-Stack Web Development with Django and Modern JavaScript',
+            'instructor': 'Benchmark Instructor',
+            'issued': 'January 1, 2026',
+            'code': new_certificate_code(),
+            'verify_url': f"{settings.SITE_URL}/lms/certificates/verify/{'0' * 32}/",
+        }
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measure certificate rendering throughput in one process and in process pools"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Certificates per run')
+        parser.add_argument('--workers', type=int, nargs='+', default=[2, 4], help='Pool sizes to try')
+
+    def handle(self, *args, **options):
+        jobs = sample_jobs(options['count'])
+        render = partial(
+            render_certificate,
+            template_path=getattr(settings, 'CERTIFICATE_TEMPLATE', ''),
+            font_path=getattr(settings, 'CERTIFICATE_FONT', ''),
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Rendering {len(jobs)} certificates"))
+
+        _background.cache_clear()
+        started = time.perf_counter()
+        size = len(render(jobs[0]))
+        self.stdout.write(f"First certificate (background drawn): {(time.perf_counter() - started) * 1000:.1f} ms, {size // 1024} KB")
+
+        started = time.perf_counter()
+        for job in jobs:
+            render(job)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{'1 process':>12}: {len(jobs) / elapsed:7.1f} certificates/s ({elapsed * 1000 / len(jobs):.1f} ms each)")
+
+        for workers in options['workers']:
+            pool = certificate_pool(workers)
+            if pool is None:
+                continue
+            with pool:
+                # Start the processes (and their backgrounds) outside the timing
+                list(pool.map(render, jobs[:workers]))
+                started = time.perf_counter()
+                list(pool.map(render, jobs, chunksize=RENDER_CHUNK))
+                elapsed = time.perf_counter() - started
+            self.stdout.write(f"{f'{workers} processes':>12}: {len(jobs) / elapsed:7.1f} certificates/s")
+
+        code = new_certificate_code()
+        forged = code[:-1] + ('1' if code[-1] == '0' else '0')
+        started = time.perf_counter()
+        for _ in range(1000):
+            verify_certificate(forged)
+        self.stdout.write(
+            f"Rejecting a forged code: {(time.perf_counter() - started) * 1000:.3f} µs each, no query"
+        )
+        self.stdout.write(self.style.SUCCESS("Done"))
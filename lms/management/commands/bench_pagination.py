@@ -0,0 +1,93 @@
+import time
+import statistics
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+
+from core.pagination import APPROXIMATE_COUNT_LIMIT, KeysetPaginator, encode_cursor
+from lms.models import Course, InstructorProfile
+
+# Two courses per second of created_at, so the id tie-break is exercised
+FILL_COURSES = """
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s)
+INSERT INTO lms_course (
+    title, slug, description, short_description, curriculum, category_id, instructor_id, image,
+    is_paid, price, difficulty, duration_hours, prerequisites, learning_outcomes, status, featured,
+    created_at, updated_at, published, rating_avg, rating_count, curriculum_version
+)
+SELECT 'Benchmark course ' || n, 'bench-pagination-' || n, '-', '', '', NULL, %s, '',
+       n %% 2, n %% 100, 'beginner', 0, '', '', 'published', 0,
+       datetime('2020-01-01', '+' || (n / 2) || ' seconds'), datetime('now'), 1, 0, 0, 0
+FROM seq
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare OFFSET pagination with keyset pagination on a large generated course table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--per-page', type=int, default=12)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page; the median is reported')
+
+    def _time(self, repeat, fn):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The fixture is generated with SQLite SQL")
+        rows, per_page, repeat = options['rows'], options['per_page'], options['repeat']
+        last_page = -(-rows // per_page)
+        depths = sorted({p for p in (1, 10, 100, 1000, 10000, 50000, last_page) if p <= last_page})
+
+        with transaction.atomic():
+            owner, _ = User.objects.get_or_create(username='bench_pagination_instructor')
+            instructor, _ = InstructorProfile.objects.get_or_create(user=owner)
+            existing = Course.objects.count()
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute(FILL_COURSES, [rows, instructor.pk])
+                cursor.execute('ANALYZE lms_course')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rows} generated courses (+{existing} existing) in {time.perf_counter() - started:.1f} s, "
+                f"{per_page} per page"
+            ))
+
+            courses = Course.objects.all()
+            ordering = ('-created_at', '-id')
+            self.stdout.write(f"{'page':>8} {'OFFSET + COUNT':>16} {'OFFSET only':>12} {'keyset':>10}")
+            for page in depths:
+                offset_paginator = Paginator(courses.order_by(*ordering), per_page)
+                # A request counts and then reads the page
+                offset_ms = self._time(repeat, lambda: list(Paginator(courses.order_by(*ordering), per_page).page(page)))
+                offset_paginator.count  # counted once; the next timing is the page query alone
+                offset_only_ms = self._time(repeat, lambda: list(offset_paginator.page(page)))
+
+                # The cursor a visitor would hold after reading the previous page
+                cursor = None
+                if page > 1:
+                    before = courses.order_by(*ordering).values_list('created_at', 'id')[(page - 1) * per_page - 1]
+                    cursor = encode_cursor(before, 'next')
+                keyset = KeysetPaginator(courses, per_page, ordering=ordering)
+                expected = [course.pk for course in offset_paginator.page(page)]
+                if [course.pk for course in keyset.get_page(cursor)] != expected:
+                    raise CommandError(f"Keyset page {page} differs from the OFFSET page")
+                keyset_ms = self._time(repeat, lambda: list(keyset.get_page(cursor)))
+                self.stdout.write(f"{page:>8} {offset_ms:>13.2f} ms {offset_only_ms:>9.2f} ms {keyset_ms:>7.2f} ms")
+
+            exact_ms = self._time(repeat, lambda: courses.count())
+            capped_ms = self._time(repeat, lambda: courses.order_by()[:APPROXIMATE_COUNT_LIMIT].count())
+            self.stdout.write(
+                f"Total: exact COUNT(*) {exact_ms:.2f} ms, approximate (capped at {APPROXIMATE_COUNT_LIMIT}) "
+                f"{capped_ms:.2f} ms and then cached for the keyset paginator"
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Every keyset page matched its OFFSET page"))
@@ -0,0 +1,153 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from lms.models import Course, Enrollment, InstructorProfile, Lesson, LessonProgress
+from lms.progress import ProgressBuffer, recompute_enrollment_progress
+
+HEARTBEAT_SECONDS = 10
+
+
+def legacy_heartbeat(user, course_slug, lesson_id, last_position, watched_delta, completed):
+    """What update_progress used to do for every heartbeat"""
+    course = Course.objects.get(slug=course_slug)
+    enrollment = Enrollment.objects.get(user=user, course=course)
+    lesson = Lesson.objects.get(id=lesson_id, course=course)
+    lp, _ = LessonProgress.objects.get_or_create(enrollment=enrollment, lesson=lesson)
+    lp.last_position = last_position
+    lp.seconds_watched = max(lp.seconds_watched, lp.seconds_watched + watched_delta)
+    if completed:
+        lp.completed = True
+    lp.save()
+    recompute_enrollment_progress(enrollment)
+    return enrollment.progress, lp.completed
+
+
+class StatementCounter:
+    """connection.execute_wrapper that counts statements and writes"""
+
+    def __init__(self):
+        self.statements = 0
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements += 1
+        if sql.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "Simulate concurrent lesson heartbeats and compare write-through with the buffered progress pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--learners', type=int, default=200)
+        parser.add_argument('--minutes', type=int, default=5, help='Simulated viewing time')
+        parser.add_argument('--lesson-seconds', type=int, default=120, help='Video length; the last heartbeat completes it')
+        parser.add_argument('--flush-interval', type=float, default=5, help='Simulated seconds between flushes')
+
+    def _simulate(self, learners, slug, lessons, rounds, lesson_heartbeats, heartbeat):
+        """Every learner sends one heartbeat per round; yields after each round"""
+        for round_no in range(rounds):
+            lesson = lessons[(round_no // lesson_heartbeats) % len(lessons)]
+            completed = (round_no + 1) % lesson_heartbeats == 0
+            position = (round_no % lesson_heartbeats + 1) * HEARTBEAT_SECONDS
+            for user in learners:
+                heartbeat(user, slug, lesson.id, float(position), float(HEARTBEAT_SECONDS), completed)
+            yield round_no
+
+    def _run(self, label, run, simulated_seconds):
+        counter = StatementCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            heartbeats = run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:>12}: {heartbeats} heartbeats, {counter.statements} statements, {counter.writes} writes "
+            f"({counter.writes / simulated_seconds:.1f} writes/s simulated), "
+            f"{elapsed * 1000:.0f} ms ({heartbeats / elapsed:.0f} heartbeats/s)"
+        )
+        return counter
+
+    def handle(self, *args, **options):
+        n = options['learners']
+        lesson_heartbeats = max(1, options['lesson_seconds'] // HEARTBEAT_SECONDS)
+        rounds = options['minutes'] * 60 // HEARTBEAT_SECONDS
+        simulated_seconds = rounds * HEARTBEAT_SECONDS
+        flush_every = max(1, int(options['flush_interval'] // HEARTBEAT_SECONDS))
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{n} learners, one heartbeat every {HEARTBEAT_SECONDS} s for {simulated_seconds} s, "
+            f"a lesson completes every {lesson_heartbeats} heartbeats"
+        ))
+
+        with transaction.atomic():
+            owner, _ = User.objects.get_or_create(username='bench_progress_instructor')
+            instructor, _ = InstructorProfile.objects.get_or_create(user=owner)
+            results = []
+            for label in ('legacy', 'buffered'):
+                course = Course.objects.create(
+                    title=f'Progress benchmark ({label})', slug=f'bench-progress-{label}',
+                    description='-', instructor=instructor,
+                )
+                lessons = Lesson.objects.bulk_create([
+                    Lesson(course=course, title=f'Lesson {i}', slug=f'lesson-{i}', order=i) for i in range(1, 11)
+                ])
+                learners = User.objects.bulk_create([
+                    User(username=f'bench_progress_{label}_{i}') for i in range(n)
+                ])
+                for user in learners:
+                    Enrollment.objects.create(user=user, course=course)
+                results.append((label, course, lessons, learners))
+
+            (_, legacy_course, legacy_lessons, legacy_learners), (_, course, lessons, learners) = results
+
+            def run_legacy():
+                sent = 0
+                for _ in self._simulate(legacy_learners, legacy_course.slug, legacy_lessons, rounds,
+                                        lesson_heartbeats, legacy_heartbeat):
+                    sent += n
+                return sent
+
+            buffer = ProgressBuffer(flush_interval=float('inf'), max_entries=10 ** 9, background=False)
+
+            def buffered_heartbeat(user, *args):
+                buffer.record(user.pk, *args)
+
+            def run_buffered():
+                sent = 0
+                for round_no in self._simulate(learners, course.slug, lessons, rounds,
+                                               lesson_heartbeats, buffered_heartbeat):
+                    sent += n
+                    if (round_no + 1) % flush_every == 0:
+                        buffer.flush()
+                buffer.flush()
+                return sent
+
+            legacy = self._run('legacy', run_legacy, simulated_seconds)
+            buffered = self._run('buffered', run_buffered, simulated_seconds)
+
+            # Both pipelines must leave the same progress behind
+            def state(course):
+                lesson_rows = LessonProgress.objects.filter(enrollment__course=course).values_list(
+                    'enrollment__user__username', 'lesson__order', 'last_position', 'seconds_watched', 'completed',
+                )
+                enrollment_rows = course.enrollments.values_list('user__username', 'progress', 'completed')
+                return (
+                    sorted((name.rsplit('_', 1)[1],) + tuple(rest) for name, *rest in lesson_rows),
+                    sorted((name.rsplit('_', 1)[1],) + tuple(rest) for name, *rest in enrollment_rows),
+                )
+            consistent = state(legacy_course) == state(course)
+            transaction.set_rollback(True)
+
+        stats = buffer.stats()
+        self.stdout.write(
+            f"Buffer: {stats['flushes']} flushes, {stats['rows_written']} rows written, "
+            f"{stats['completions']} completions written through"
+        )
+        self.stdout.write(f"Resulting progress identical to write-through: {'yes' if consistent else 'NO'}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Writes reduced {legacy.writes / max(buffered.writes, 1):.1f}x, "
+            f"statements {legacy.statements / max(buffered.statements, 1):.1f}x"
+        ))
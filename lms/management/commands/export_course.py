@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.bundles import MANIFESTS, export_course
+from lms.models import Course
+
+
+class Command(BaseCommand):
+    help = "Export a course, its modules, lessons, resources and media as a zip bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('-o', '--output', help="Bundle path (default <slug>.zip); '-' writes to stdout")
+        parser.add_argument('--format', choices=sorted(MANIFESTS), default='json', help='Manifest format')
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.select_related('category').get(slug=options['slug'])
+        except Course.DoesNotExist:
+            raise CommandError(f"No course with slug {options['slug']!r}")
+        output = options['output'] or f"{course.slug}.zip"
+        counts = export_course(course, sys.stdout.buffer if output == '-' else output, fmt=options['format'])
+        if output != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {course.slug} to {output}: {counts['modules']} modules, {counts['lessons']} lessons, "
+                f"{counts['resources']} resources"
+            ))
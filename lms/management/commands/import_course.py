@@ -0,0 +1,42 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.bundles import BundleError, import_course, validate_bundle
+from lms.models import InstructorProfile
+
+
+class Command(BaseCommand):
+    help = "Create a course from a zip bundle written by export_course"
+
+    def add_arguments(self, parser):
+        parser.add_argument('bundle')
+        parser.add_argument('--instructor', required=True, help='Username of the course instructor')
+        parser.add_argument('--slug', help="Course slug, instead of the bundle's")
+        parser.add_argument('--dry-run', action='store_true', help='Validate the bundle without importing it')
+
+    def handle(self, *args, **options):
+        try:
+            instructor = InstructorProfile.objects.get(user__username=options['instructor'])
+        except InstructorProfile.DoesNotExist:
+            raise CommandError(f"{options['instructor']!r} has no instructor profile")
+        try:
+            archive = zipfile.ZipFile(options['bundle'])
+        except (OSError, zipfile.BadZipFile) as e:
+            raise CommandError(f"Cannot read {options['bundle']}: {e}")
+
+        with archive:
+            try:
+                if options['dry_run']:
+                    plan = validate_bundle(archive, slug=options['slug'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{plan.course.slug}: {len(plan.modules)} modules, {len(plan.lessons)} lessons and "
+                        f"{len(plan.resources)} resources are valid"
+                    ))
+                    return
+                course = import_course(archive, instructor, slug=options['slug'])
+            except BundleError as e:
+                raise CommandError('\n'.join([str(e)] + [f"  {problem}" for problem in e.problems]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {course.slug} (id {course.pk}) for {instructor.user.username}"
+        ))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms.certificates import (
+    certificate_pool, certificates_with_details, issue_certificates, render_certificates,
+)
+from lms.models import Enrollment
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = "Issue certificates for completed enrollments and render the PDFs not yet rendered"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', help='Only enrollments in the course with this slug')
+        parser.add_argument('--workers', type=int, help='Rendering processes (default: CERTIFICATE_WORKERS or CPU count)')
+        parser.add_argument('--no-render', action='store_true', help='Issue the certificates; render them on first download')
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options['course']:
+            enrollments = enrollments.filter(course__slug=options['course'])
+        issued = issue_certificates(enrollments.values('pk'))
+        self.stdout.write(f"Issued {issued} certificates")
+        if options['no_render']:
+            return
+
+        pending = certificates_with_details().filter(file='', enrollment__in=enrollments.values('pk')).order_by('pk')
+        rendered, last_pk = 0, 0
+        started = time.perf_counter()
+        pool = certificate_pool(options['workers'])
+        try:
+            # Batches by primary key: every batch is written before the next is read
+            while True:
+                batch = list(pending.filter(pk__gt=last_pk)[:BATCH_SIZE])
+                if not batch:
+                    break
+                rendered += render_certificates(batch, pool)
+                last_pk = batch[-1].pk
+                self.stdout.write(f"  {rendered} rendered")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        elapsed = time.perf_counter() - started
+        rate = f" ({rendered / elapsed:.1f}/s)" if rendered else ''
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} certificates in {elapsed:.1f} s{rate}"))
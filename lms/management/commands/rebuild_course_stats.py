@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lms.analytics import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the CourseStats rollup (enrollments, completions, progress, revenue) from enrollments"
+
+    def handle(self, *args, **options):
+        count = rebuild_course_stats()
+        self.stdout.write(self.style.SUCCESS(f"Course stats rebuilt for {count} courses"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lms.reviews import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute course and instructor ratings from the reviews (after bulk loads or instructor changes)"
+
+    def handle(self, *args, **options):
+        count = rebuild_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Ratings rebuilt for {count} courses"))
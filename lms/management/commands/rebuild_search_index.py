@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from lms.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Re-index every course for catalog search (after bulk imports or queryset updates)"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Search index ({backend.name}) rebuilt for {count} courses"))
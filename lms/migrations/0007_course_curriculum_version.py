@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0006_coursestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='curriculum_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
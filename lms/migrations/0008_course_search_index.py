@@ -0,0 +1,48 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:05
+
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+CREATE_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lms_course_search USING fts5("
+    "title, short_description, description, learning_outcomes, lessons, "
+    "tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+)
+FILL_INDEX = (
+    "INSERT INTO lms_course_search (rowid, title, short_description, description, learning_outcomes, lessons) "
+    "SELECT c.id, c.title, c.short_description, c.description, c.learning_outcomes, "
+    "COALESCE((SELECT group_concat(l.title, ' ') FROM lms_lesson l WHERE l.course_id = c.id), '') "
+    "FROM lms_course c"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # Only SQLite has FTS5; other databases use lms.search.DatabaseSearchBackend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            logger.warning("SQLite was built without FTS5; course search falls back to icontains")
+            return
+        cursor.execute(CREATE_INDEX)
+        cursor.execute(FILL_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS lms_course_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0007_course_curriculum_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
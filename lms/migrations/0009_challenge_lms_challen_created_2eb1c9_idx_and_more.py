@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0008_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['created_at', 'id'], name='lms_challen_created_2eb1c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['created_at', 'id'], name='lms_course_created_c083f4_idx'),
+        ),
+    ]
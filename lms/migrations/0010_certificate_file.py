@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0009_challenge_lms_challen_created_2eb1c9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='file',
+            field=models.FileField(blank=True, upload_to='lms/certificates/'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:03
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def fill_rating_totals(apps, schema_editor):
+    """
+    Totals from the Review rows, as lms.reviews.rebuild_ratings computes them
+    (the old rating_avg/rating_count were not kept in step with the reviews).
+    Duplicate reviews of a course by one user are dropped first, keeping the
+    latest, so the unique constraint below can be added.
+    """
+    Course = apps.get_model('lms', 'Course')
+    InstructorProfile = apps.get_model('lms', 'InstructorProfile')
+    Review = apps.get_model('lms', 'Review')
+    duplicates = (
+        Review.objects.order_by().values('course', 'user')
+        .annotate(reviews=Count('id'), latest=Max('id')).filter(reviews__gt=1)
+    )
+    for row in duplicates:
+        Review.objects.filter(course_id=row['course'], user_id=row['user']).exclude(pk=row['latest']).delete()
+
+    totals = {
+        row['course']: (row['count'], row['total'])
+        for row in Review.objects.order_by().values('course').annotate(count=Count('id'), total=Sum('rating'))
+    }
+    courses = []
+    instructors = {}
+    for course in Course.objects.only('id', 'instructor_id'):
+        count, total = totals.get(course.pk, (0, 0))
+        course.rating_count, course.rating_sum = count, total
+        course.rating_avg = total / count if count else 0
+        courses.append(course)
+        instructor_count, instructor_total = instructors.get(course.instructor_id, (0, 0))
+        instructors[course.instructor_id] = (instructor_count + count, instructor_total + total)
+    Course.objects.bulk_update(courses, ['rating_avg', 'rating_count', 'rating_sum'], batch_size=500)
+
+    profiles = [
+        InstructorProfile(pk=pk, rating_count=count, rating_sum=total, rating_avg=total / count if count else 0)
+        for pk, (count, total) in instructors.items()
+    ]
+    InstructorProfile.objects.bulk_update(profiles, ['rating_avg', 'rating_count', 'rating_sum'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0011_quiz_version_answer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_totals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.PositiveSmallIntegerField(default=5, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='review',
+            unique_together={('course', 'user')},
+        ),
+    ]
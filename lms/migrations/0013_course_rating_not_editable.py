@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0012_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
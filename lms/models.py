@@ -1,8 +1,23 @@
 from django.conf import settings
 from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone
 
 
+def _skip_counter_fields(instance, kwargs, counters):
+    """
+    Save every loaded field except ``counters``, which are only changed with
+    F() updates; writing back values loaded before a concurrent update would
+    undo it.
+    """
+    if not instance._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+        deferred = instance.get_deferred_fields()
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counters and field.attname not in deferred
+        ]
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=120, unique=True)
@@ -25,14 +40,24 @@ class InstructorProfile(models.Model):
     is_verified = models.BooleanField(default=False, help_text="Verified instructor status")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Reviews of all the instructor's courses, kept up to date with F() by lms.reviews
+    rating_avg = models.FloatField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.user.get_full_name() or self.user.username
+
+    def save(self, *args, **kwargs):
+        _skip_counter_fields(self, kwargs, ('rating_avg', 'rating_count', 'rating_sum'))
+        super().save(*args, **kwargs)
     
     @property
     def total_students(self):
-        """Total number of students across all courses"""
-        return sum(course.enrollments.count() for course in self.courses.all())
+        """Total number of enrollments across all courses"""
+        return CourseStats.objects.filter(course__instructor=self).aggregate(
+            total=models.Sum('enrollments')
+        )['total'] or 0
     
     @property
     def total_courses(self):
@@ -41,13 +66,8 @@ class InstructorProfile(models.Model):
     
     @property
     def average_rating(self):
-        """Average rating across all courses"""
-        courses = self.courses.filter(rating_count__gt=0)
-        if courses.exists():
-            total_rating = sum(course.rating_avg * course.rating_count for course in courses)
-            total_reviews = sum(course.rating_count for course in courses)
-            return round(total_rating / total_reviews, 2) if total_reviews > 0 else 0
-        return 0
+        """Average rating of all reviews across all courses"""
+        return round(self.rating_avg, 2)
 
 
 class Course(models.Model):
@@ -82,18 +102,28 @@ class Course(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     published = models.BooleanField(default=True)  # Keep for backward compatibility
-    rating_avg = models.FloatField(default=0)
-    rating_count = models.PositiveIntegerField(default=0)
+    # Kept up to date with F() by lms.reviews as reviews are added, changed or deleted
+    rating_avg = models.FloatField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped with F() by lms.curriculum whenever lessons, modules or resources change
+    curriculum_version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'featured']),
             models.Index(fields=['category', 'difficulty']),
+            # Keyset pagination (core.pagination)
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        _skip_counter_fields(self, kwargs, ('curriculum_version', 'rating_avg', 'rating_count', 'rating_sum'))
+        super().save(*args, **kwargs)
     
     @property
     def total_lessons(self):
@@ -105,19 +135,24 @@ class Course(models.Model):
         """Total estimated duration in minutes"""
         return self.duration_hours * 60
     
+    @property
+    def course_stats(self):
+        """The CourseStats rollup, created on first access if missing"""
+        try:
+            return self.stats
+        except CourseStats.DoesNotExist:
+            from .analytics import refresh_course_stats
+            return refresh_course_stats(self)
+
     @property
     def enrollment_count(self):
         """Total number of enrolled students"""
-        return self.enrollments.count()
+        return self.course_stats.enrollments
     
     @property
     def completion_rate(self):
         """Percentage of students who completed the course"""
-        total_enrollments = self.enrollments.count()
-        if total_enrollments == 0:
-            return 0
-        completed = self.enrollments.filter(completed=True).count()
-        return round((completed / total_enrollments) * 100, 1)
+        return self.course_stats.completion_rate
     
     @property
     def is_published(self):
@@ -126,11 +161,35 @@ class Course(models.Model):
     
     def get_average_progress(self):
         """Get average progress across all enrollments"""
-        enrollments = self.enrollments.all()
-        if not enrollments:
+        return self.course_stats.average_progress
+
+
+class CourseStats(models.Model):
+    """Per-course enrollment rollup, maintained by lms.analytics"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    enrollments = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    progress_sum = models.FloatField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Course stats'
+
+    def __str__(self):
+        return f"{self.course_id}: {self.enrollments} enrolled, {self.completed} completed"
+
+    @property
+    def completion_rate(self):
+        if not self.enrollments:
+            return 0
+        return round((self.completed / self.enrollments) * 100, 1)
+
+    @property
+    def average_progress(self):
+        if not self.enrollments:
             return 0
-        total_progress = sum(enrollment.progress for enrollment in enrollments)
-        return round(total_progress / len(enrollments), 1)
+        return round(self.progress_sum / self.enrollments, 1)
 
 
 class Module(models.Model):
@@ -179,21 +238,8 @@ class Module(models.Model):
     @property
     def completion_rate(self):
         """Percentage of enrolled students who completed this module"""
-        total_enrollments = self.course.enrollments.count()
-        if total_enrollments == 0:
-            return 0
-        
-        completed_count = 0
-        for enrollment in self.course.enrollments.all():
-            module_lessons = self.lessons.all()
-            completed_lessons = enrollment.lesson_progress.filter(
-                lesson__in=module_lessons, 
-                completed=True
-            ).count()
-            if completed_lessons == module_lessons.count() and module_lessons.count() > 0:
-                completed_count += 1
-        
-        return round((completed_count / total_enrollments) * 100, 1)
+        from .analytics import module_completion_rates
+        return module_completion_rates(self.course).get(self.pk, 0)
 
 
 class Lesson(models.Model):
@@ -261,6 +307,13 @@ class Enrollment(models.Model):
     class Meta:
         unique_together = ('user', 'course')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so CourseStats only gets the difference on save
+        instance._stats_snapshot = tuple(instance.__dict__.get(field) for field in ('course_id', 'progress', 'completed'))
+        return instance
+
 
 class LessonProgress(models.Model):
     """Tracks progress per user per lesson."""
@@ -278,10 +331,16 @@ class LessonProgress(models.Model):
 class Quiz(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='quizzes')
     title = models.CharField(max_length=200)
+    # Bumped whenever a question changes; the cached answer key is keyed by it (see lms.quizzes)
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        _skip_counter_fields(self, kwargs, ('version',))
+        super().save(*args, **kwargs)
+
 
 class Question(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='questions')
@@ -300,18 +359,40 @@ class Submission(models.Model):
     taken_at = models.DateTimeField(default=timezone.now)
 
 
+class Answer(models.Model):
+    """One question of a graded quiz Submission"""
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
+    choice = models.CharField(max_length=1, blank=True)  # '' when unanswered
+    is_correct = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('submission', 'question')
+
+
 class Review(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    rating = models.PositiveSmallIntegerField(default=5)
+    rating = models.PositiveSmallIntegerField(default=5, validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        unique_together = ('course', 'user')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored rating so the course rating only gets the difference on save
+        instance._stored_rating = instance.__dict__.get('rating')
+        return instance
+
 
 class Certificate(models.Model):
     enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='certificate')
     issued_at = models.DateTimeField(default=timezone.now)
     certificate_code = models.CharField(max_length=32, unique=True)
+    file = models.FileField(upload_to='lms/certificates/', blank=True)  # rendered on first use; see lms.certificates
 
 
 class Badge(models.Model):
@@ -345,8 +426,150 @@ class Challenge(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['created_at', 'id'])]
         verbose_name = 'LMS Challenge'
         verbose_name_plural = 'LMS Challenges'
 
     def __str__(self):
         return self.title
+
+
+# Keep CourseStats in step with enrollments and course prices
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Course)
+def update_course_stats_on_course_save(sender, instance: Course, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .analytics import course_saved
+    course_saved(instance, created)
+
+
+@receiver(post_save, sender=Enrollment)
+def update_course_stats_on_enrollment_save(sender, instance: Enrollment, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    from .analytics import enrollment_saved
+    enrollment_saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=Enrollment)
+def update_course_stats_on_enrollment_delete(sender, instance: Enrollment, **kwargs):
+    from .analytics import enrollment_deleted
+    enrollment_deleted(instance)
+
+
+# Module completion counts are cached per course; drop them when progress or lessons change
+@receiver(post_save, sender=LessonProgress)
+def invalidate_module_completion_on_progress_save(sender, instance: LessonProgress, **kwargs):
+    from .analytics import invalidate_module_completion
+    invalidate_module_completion(instance.enrollment.course_id)
+
+
+@receiver(post_delete, sender=LessonProgress)
+def invalidate_module_completion_on_progress_delete(sender, instance: LessonProgress, origin=None, **kwargs):
+    # Cascades from an enrollment or lesson are invalidated by their own handlers
+    if isinstance(origin, models.Model) and origin is not instance:
+        return
+    from .analytics import invalidate_module_completion
+    invalidate_module_completion(instance.enrollment.course_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_module_completion_on_lesson_change(sender, instance: Lesson, **kwargs):
+    from .analytics import invalidate_module_completion
+    invalidate_module_completion(instance.course_id)
+
+
+# The course player caches the curriculum per course version
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def bump_curriculum_version_on_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .curriculum import bump_curriculum_version
+    bump_curriculum_version(instance.course_id)
+
+
+# Catalog search indexes course text and lesson titles
+@receiver(post_save, sender=Course)
+def index_course_on_save(sender, instance: Course, raw=False, update_fields=None, **kwargs):
+    from .search import SEARCH_FIELDS, index_courses
+    if raw or (update_fields is not None and not set(SEARCH_FIELDS) & set(update_fields)):
+        return
+    index_courses([instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_from_search(sender, instance: Course, **kwargs):
+    from .search import remove_courses
+    remove_courses([instance.pk])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def index_course_on_lesson_change(sender, instance: Lesson, raw=False, origin=None, update_fields=None, **kwargs):
+    # Deleting the course removes its document anyway
+    if raw or isinstance(origin, Course) or (update_fields is not None and 'title' not in update_fields):
+        return
+    from .search import index_courses
+    index_courses([instance.course_id])
+
+
+# Anonymous catalog pages are cached per catalog version
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def bump_catalog_version_on_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .catalog import bump_catalog_version
+    bump_catalog_version()
+
+
+# Completing a course issues its certificate; the PDF is rendered when first downloaded
+@receiver(post_save, sender=Enrollment)
+def issue_certificate_on_completion(sender, instance: Enrollment, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.completed or (update_fields is not None and 'completed' not in update_fields):
+        return
+    from .certificates import issue_certificates
+    issue_certificates([instance.pk])
+
+
+# Quiz answer keys are cached per quiz version
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_quiz_version_on_question_change(sender, instance: Question, raw=False, origin=None, **kwargs):
+    if raw or isinstance(origin, (Course, Quiz)):
+        return
+    from .quizzes import bump_quiz_version
+    bump_quiz_version(instance.quiz_id)
+
+
+# Course and instructor ratings follow reviews
+@receiver(post_save, sender=Review)
+def update_ratings_on_review_save(sender, instance: Review, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'rating' not in update_fields):
+        return
+    from .reviews import review_saved
+    review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def update_ratings_on_review_delete(sender, instance: Review, **kwargs):
+    from .reviews import review_deleted
+    review_deleted(instance)
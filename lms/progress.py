@@ -0,0 +1,326 @@
+"""
+Lesson progress ingestion.
+
+The course player reports every active viewer's position every few seconds.
+Writing each heartbeat through costs several lookups, a LessonProgress save
+and an enrollment progress recount, most of which change nothing but the
+playback position.
+
+``ProgressBuffer`` keeps heartbeats in memory instead, coalesced per
+(enrollment, lesson): the latest position wins and watched seconds add up.
+Every ``PROGRESS_FLUSH_INTERVAL_SECONDS`` (or when ``PROGRESS_BUFFER_MAX_ENTRIES``
+keys are pending) the buffer is written with one ``bulk_update``, adding the
+watched seconds with ``F()`` so flushes from several worker processes do not
+overwrite each other. A heartbeat that completes a lesson is written through
+immediately, and only then is the enrollment's progress recounted. The
+player can also report several lessons at once (``record_batch``); their
+completions share one transaction and one recount.
+
+Which enrollment and lessons a (user, course) heartbeat refers to is cached
+per process for ``CONTEXT_TTL`` seconds, so a buffered heartbeat costs no
+queries. Heartbeats still in memory are lost if the process is killed; a
+normal exit flushes them.
+"""
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Enrollment, Lesson, LessonProgress
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TTL = 300
+MAX_CONTEXTS = 10000
+# Keys per query, below SQLite's bound parameter limit
+BATCH_SIZE = 400
+
+
+def recompute_enrollment_progress(enrollment):
+    lessons = Lesson.objects.filter(course_id=enrollment.course_id).count()
+    if lessons == 0:
+        enrollment.progress = 0
+        enrollment.completed = False
+        enrollment.save(update_fields=['progress', 'completed'])
+        return
+    completed = LessonProgress.objects.filter(enrollment=enrollment, completed=True).count()
+    pct = (completed / lessons) * 100.0
+    enrollment.progress = round(pct, 2)
+    enrollment.completed = completed == lessons
+    enrollment.save(update_fields=['progress', 'completed'])
+
+
+class LearnerContext:
+    """What a learner's heartbeats for one course need to know"""
+
+    def __init__(self, enrollment_id, course_id, progress, lesson_ids, completed):
+        self.enrollment_id = enrollment_id
+        self.course_id = course_id
+        self.progress = progress
+        self.lesson_ids = lesson_ids
+        self.completed = completed
+
+
+def load_context(user_id, course_slug):
+    row = (
+        Enrollment.objects.filter(user_id=user_id, course__slug=course_slug)
+        .values_list('id', 'course_id', 'progress')
+        .first()
+    )
+    if row is None:
+        return None
+    enrollment_id, course_id, progress = row
+    lesson_ids = set(Lesson.objects.filter(course_id=course_id).values_list('id', flat=True))
+    completed = set(
+        LessonProgress.objects.filter(enrollment_id=enrollment_id, completed=True).values_list('lesson_id', flat=True)
+    )
+    return LearnerContext(enrollment_id, course_id, progress, lesson_ids, completed)
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _existing_rows(keys):
+    enrollment_ids = {enrollment_id for enrollment_id, _ in keys}
+    lesson_ids = {lesson_id for _, lesson_id in keys}
+    rows = LessonProgress.objects.filter(enrollment_id__in=enrollment_ids, lesson_id__in=lesson_ids)
+    return {
+        (enrollment_id, lesson_id): pk
+        for pk, enrollment_id, lesson_id in rows.values_list('id', 'enrollment_id', 'lesson_id')
+    }
+
+
+def write_heartbeats(pending):
+    """Apply {(enrollment id, lesson id): [last position, watched delta]}. Returns rows updated."""
+    written = 0
+    now = timezone.now()
+    for keys in _chunks(pending):
+        rows = _existing_rows(keys)
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            # The enrollment or lesson may have been deleted since the heartbeat
+            enrollments = set(Enrollment.objects.filter(id__in={e for e, _ in missing}).values_list('id', flat=True))
+            lessons = set(Lesson.objects.filter(id__in={l for _, l in missing}).values_list('id', flat=True))
+            LessonProgress.objects.bulk_create(
+                [LessonProgress(enrollment_id=e, lesson_id=l) for e, l in missing if e in enrollments and l in lessons],
+                ignore_conflicts=True,
+            )
+            rows = _existing_rows(keys)
+        updates = [
+            LessonProgress(
+                pk=rows[key],
+                last_position=pending[key][0],
+                seconds_watched=F('seconds_watched') + pending[key][1],
+                updated_at=now,
+            )
+            for key in keys if key in rows
+        ]
+        LessonProgress.objects.bulk_update(updates, ['last_position', 'seconds_watched', 'updated_at'])
+        written += len(updates)
+    return written
+
+
+class ProgressBuffer:
+    """Per-process, thread-safe buffer of lesson heartbeats"""
+
+    def __init__(self, flush_interval=5.0, max_entries=5000, background=True):
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.background = background
+        self._pending = {}              # (enrollment_id, lesson_id) -> [last_position, watched_delta]
+        self._contexts = OrderedDict()  # (user_id, course_slug) -> (expires_at, LearnerContext)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher = None
+        self.heartbeats = 0
+        self.completions = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def context(self, user_id, course_slug, refresh=False):
+        key = (user_id, course_slug)
+        with self._lock:
+            cached = self._contexts.get(key)
+            if cached and not refresh and cached[0] > time.monotonic():
+                self._contexts.move_to_end(key)
+                return cached[1]
+        context = load_context(user_id, course_slug)
+        with self._lock:
+            if context is None:
+                self._contexts.pop(key, None)
+                return None
+            self._contexts[key] = (time.monotonic() + CONTEXT_TTL, context)
+            self._contexts.move_to_end(key)
+            while len(self._contexts) > MAX_CONTEXTS:
+                self._contexts.popitem(last=False)
+        return context
+
+    def record(self, user_id, course_slug, lesson_id, last_position, watched_delta, completed=False):
+        """
+        Buffer one heartbeat. Returns (enrollment progress, lesson completed),
+        or None when the user is not enrolled or the lesson is not in the course.
+        """
+        result = self.record_batch(user_id, course_slug, [(lesson_id, last_position, watched_delta, completed)])
+        if result is None:
+            return None
+        progress, lessons = result
+        return progress, lessons[lesson_id]
+
+    def record_batch(self, user_id, course_slug, heartbeats):
+        """
+        Buffer (lesson id, last position, watched delta, completed) heartbeats
+        of one course together. Returns (enrollment progress, {lesson id:
+        completed}), or None (and records nothing) when the user is not
+        enrolled or a lesson is not in the course.
+        """
+        lesson_ids = {heartbeat[0] for heartbeat in heartbeats}
+        context = self.context(user_id, course_slug)
+        if context is not None and not lesson_ids <= context.lesson_ids:
+            # Lessons may have been added since the context was loaded
+            context = self.context(user_id, course_slug, refresh=True)
+        if context is None or not lesson_ids <= context.lesson_ids:
+            return None
+
+        completing = {}
+        with self._lock:
+            self.heartbeats += len(heartbeats)
+            for lesson_id, last_position, watched_delta, completed in heartbeats:
+                key = (context.enrollment_id, lesson_id)
+                entry = self._pending.get(key)
+                if entry is None:
+                    entry = self._pending[key] = [last_position, 0.0]
+                entry[0] = last_position
+                entry[1] += watched_delta
+                if completed and lesson_id not in context.completed:
+                    completing[lesson_id] = entry
+            for lesson_id in completing:
+                del self._pending[(context.enrollment_id, lesson_id)]
+            due = len(self._pending) >= self.max_entries or time.monotonic() - self._last_flush >= self.flush_interval
+
+        if completing:
+            try:
+                self._complete(context, completing)
+            except Enrollment.DoesNotExist:
+                with self._lock:
+                    self._contexts.pop((user_id, course_slug), None)
+                return None
+        if due:
+            self.flush()
+        elif self.background:
+            self._start_flusher()
+        return context.progress, {lesson_id: lesson_id in context.completed for lesson_id in lesson_ids}
+
+    def _complete(self, context, completing):
+        """
+        Write completing heartbeats ({lesson id: [last position, watched
+        delta]}) through and recount the enrollment's progress once
+        """
+        with transaction.atomic():
+            enrollment = Enrollment.objects.select_for_update().get(pk=context.enrollment_id)
+            for lesson_id, (last_position, watched_delta) in completing.items():
+                progress, _ = LessonProgress.objects.get_or_create(enrollment=enrollment, lesson_id=lesson_id)
+                progress.last_position = last_position
+                progress.seconds_watched = F('seconds_watched') + watched_delta
+                progress.completed = True
+                progress.save()
+            recompute_enrollment_progress(enrollment)
+        with self._lock:
+            self.completions += len(completing)
+            context.completed.update(completing)
+            context.progress = enrollment.progress
+
+    def flush(self):
+        """Write all buffered heartbeats. Returns the number of rows updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            try:
+                with transaction.atomic():
+                    written = write_heartbeats(pending)
+            except DatabaseError as e:
+                logger.error(f"Failed to flush {len(pending)} lesson heartbeats: {str(e)}")
+                self._requeue(pending)
+                return 0
+            with self._lock:
+                self.flushes += 1
+                self.rows_written += written
+            return written
+
+    def _requeue(self, pending):
+        with self._lock:
+            for key, (last_position, watched_delta) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = [last_position, watched_delta]
+                else:
+                    # Newer heartbeats arrived meanwhile; keep their position
+                    entry[1] += watched_delta
+
+    def _start_flusher(self):
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='progress-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _run_flusher(self):
+        # Heartbeats also flush when due, this covers a buffer that went quiet
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Progress flusher error: {str(e)}")
+
+    def pending_for(self, enrollment_id):
+        """{lesson id: (last position, watched delta)} not flushed yet for an enrollment"""
+        with self._lock:
+            return {
+                lesson_id: tuple(entry)
+                for (pending_enrollment, lesson_id), entry in self._pending.items()
+                if pending_enrollment == enrollment_id
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'contexts': len(self._contexts),
+                'heartbeats': self.heartbeats,
+                'completions': self.completions,
+                'flushes': self.flushes,
+                'rows_written': self.rows_written,
+            }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_progress_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ProgressBuffer(
+                    flush_interval=getattr(settings, 'PROGRESS_FLUSH_INTERVAL_SECONDS', 5),
+                    max_entries=getattr(settings, 'PROGRESS_BUFFER_MAX_ENTRIES', 5000),
+                )
+    return _buffer
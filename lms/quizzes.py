@@ -0,0 +1,150 @@
+"""
+Quiz taking, grading and question statistics.
+
+A quiz page is the quiz and its questions, read with one query each;
+``correct_choice`` is deferred so it never reaches the page.
+
+Grading needs only the answer key, ``{question id: correct choice}``. It is
+fetched with one query and cached under the quiz's ``version``. Saving or
+deleting a question bumps the version with an ``F()`` UPDATE, so a stale key
+is never used and nothing has to be deleted. ``grade_responses`` grades any
+number of responses against the key in memory. It then writes their
+Submissions and Answers with two ``bulk_create`` calls in one transaction.
+Taking a quiz once goes through the same path.
+
+``question_statistics`` computes, per question, in one grouped query:
+
+- the share of correct answers (classical difficulty index p);
+- how often each choice was picked;
+- the mean score of the submissions that got the question right and wrong.
+
+One more aggregate gives the mean and variance of the quiz scores. From
+these, discrimination is the point-biserial correlation between answering
+the question correctly and the submission score:
+``(M1 - M0) / s * sqrt(p * (1 - p))``. A question that strong students get
+right and weak students get wrong scores near 1. Near 0 or below means the
+question does not tell them apart.
+"""
+import math
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Answer, Question, Quiz, Submission
+
+ANSWER_KEY_TTL = 24 * 3600
+CHOICES = ('A', 'B', 'C', 'D')
+
+
+def bump_quiz_version(quiz_id):
+    Quiz.objects.filter(pk=quiz_id).update(version=F('version') + 1)
+
+
+def quiz_questions(quiz):
+    """The questions of ``quiz`` to show, without their correct choices"""
+    return list(Question.objects.filter(quiz_id=quiz.pk).order_by('id').defer('correct_choice'))
+
+
+def question_choices(question):
+    """[(letter, text)] of the choices the question has"""
+    return [
+        (letter, getattr(question, f'choice_{letter.lower()}'))
+        for letter in CHOICES
+        if getattr(question, f'choice_{letter.lower()}')
+    ]
+
+
+def answer_key(quiz):
+    key = f"lms:quiz:{quiz.pk}:{quiz.version}:answer-key"
+    answers = cache.get(key)
+    if answers is None:
+        answers = dict(Question.objects.filter(quiz_id=quiz.pk).values_list('id', 'correct_choice'))
+        cache.set(key, answers, ANSWER_KEY_TTL)
+    return answers
+
+
+def _grade(key, answers):
+    """[(question id, choice, correct)] and the score (0-100) of ``answers``"""
+    graded = []
+    for question_id, correct_choice in key.items():
+        choice = answers.get(question_id) or ''
+        graded.append((question_id, choice if choice in CHOICES else '', choice == correct_choice))
+    correct = sum(1 for _, _, is_correct in graded if is_correct)
+    return graded, round(100.0 * correct / len(key), 2) if key else 0.0
+
+
+def grade_responses(quiz, responses):
+    """
+    Grade ``responses``, [(user id, {question id: choice})], and store them
+    as Submissions with their Answers. Choices for questions not in the quiz
+    are ignored and missing ones count as wrong. Returns the Submissions.
+    """
+    key = answer_key(quiz)
+    taken_at = timezone.now()
+    submissions, graded = [], []
+    for user_id, answers in responses:
+        rows, score = _grade(key, answers)
+        submissions.append(Submission(user_id=user_id, quiz_id=quiz.pk, score=score, taken_at=taken_at))
+        graded.append(rows)
+    with transaction.atomic():
+        Submission.objects.bulk_create(submissions)
+        Answer.objects.bulk_create([
+            Answer(submission_id=submission.pk, question_id=question_id, choice=choice, is_correct=is_correct)
+            for submission, rows in zip(submissions, graded)
+            for question_id, choice, is_correct in rows
+        ], batch_size=1000)
+    return submissions
+
+
+def grade_submission(quiz, user, answers):
+    return grade_responses(quiz, [(user.pk, answers)])[0]
+
+
+def parse_answers(data, prefix='question_'):
+    """{question id: choice} from POST data named ``question_<id>``"""
+    answers = {}
+    for name, value in data.items():
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            answers[int(name[len(prefix):])] = value.strip().upper()
+    return answers
+
+
+def question_statistics(quiz):
+    """
+    (summary, [per-question row]) for ``quiz``. Rows carry the question id
+    and text, ``responses``, ``difficulty`` (share correct), ``choices``
+    ({letter: count}) and ``discrimination`` (None when undefined).
+    """
+    summary = Submission.objects.filter(quiz_id=quiz.pk).aggregate(
+        submissions=Count('id'),
+        mean=Avg('score'),
+        mean_square=Avg(F('score') * F('score')),
+    )
+    mean = summary['mean'] or 0.0
+    variance = max(0.0, (summary['mean_square'] or 0.0) - mean * mean)
+    summary['deviation'] = math.sqrt(variance)
+
+    answered = {f'picked_{letter}': Count('answers', filter=Q(answers__choice=letter)) for letter in CHOICES}
+    rows = list(
+        Question.objects.filter(quiz_id=quiz.pk).order_by('id').annotate(
+            responses=Count('answers'),
+            difficulty=Avg(Cast('answers__is_correct', FloatField())),
+            mean_correct=Avg('answers__submission__score', filter=Q(answers__is_correct=True)),
+            mean_incorrect=Avg('answers__submission__score', filter=Q(answers__is_correct=False)),
+            **answered,
+        ).values('id', 'text', 'correct_choice', 'responses', 'difficulty', 'mean_correct', 'mean_incorrect', *answered)
+    )
+    for row in rows:
+        row['choices'] = {letter: row.pop(f'picked_{letter}') for letter in CHOICES}
+        p = row['difficulty']
+        if p is None or p in (0.0, 1.0) or not summary['deviation']:
+            # Everyone (or no one) got it right, or every score is the same
+            row['discrimination'] = None
+        else:
+            row['discrimination'] = (
+                (row['mean_correct'] - row['mean_incorrect']) / summary['deviation'] * math.sqrt(p * (1 - p))
+            )
+    return summary, rows
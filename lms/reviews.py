@@ -0,0 +1,136 @@
+"""
+Course reviews and the ratings derived from them.
+
+``Course.rating_sum``, ``rating_count`` and ``rating_avg`` are running totals
+of the course's reviews, and the same fields on InstructorProfile total the
+reviews of all the instructor's courses. Adding, changing or deleting a review
+applies the difference to both rows with one ``F()`` UPDATE each. The Review
+receivers in lms.models do this, so the UPDATEs run inside the transaction
+that writes the review (``submit_review`` opens one). The average is
+recomputed in the same statement from the integer sum, so it does not drift
+the way averaging floats repeatedly would.
+
+Course lists sort by the stored ``rating_avg`` and the dashboards read the
+stored values, so nothing aggregates reviews on read. ``rebuild_ratings``
+recomputes every total from the reviews. Run it after loading reviews
+without signals or moving a course to another instructor. Until then a
+total that drifted is clamped at zero rather than going negative.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, Greatest
+
+from .catalog import bump_catalog_version
+from .models import Course, InstructorProfile, Review
+
+logger = logging.getLogger(__name__)
+
+RATING_FIELDS = ['rating_avg', 'rating_count', 'rating_sum']
+
+
+def _rating_changes(rating, count):
+    # Never below zero: a total that drifted from the reviews must not block deleting them
+    total = Greatest(F('rating_sum') + rating, 0)
+    reviews = Greatest(F('rating_count') + count, 0)
+    return {
+        # First: MySQL evaluates SET assignments left to right against the updated row
+        'rating_avg': Cast(total, FloatField()) / Greatest(reviews, 1),
+        'rating_count': reviews,
+        'rating_sum': total,
+    }
+
+
+def _apply(course_id, rating, count):
+    """Add ``rating`` to the rating sums and ``count`` to the review counts of a course and its instructor"""
+    changes = _rating_changes(rating, count)
+    Course.objects.filter(pk=course_id).update(**changes)
+    InstructorProfile.objects.filter(courses__id=course_id).update(**changes)
+
+
+def _refresh_catalog():
+    # The course detail page lists the recent reviews
+    transaction.on_commit(bump_catalog_version)
+
+
+def review_saved(review, created):
+    _refresh_catalog()
+    before = getattr(review, '_stored_rating', None)
+    review._stored_rating = review.rating
+    if created:
+        _apply(review.course_id, review.rating, 1)
+    elif before is None:
+        # Stored rating unknown (not loaded from the database): recount just this course
+        rebuild_course_rating(review.course_id)
+    elif review.rating != before:
+        _apply(review.course_id, review.rating - before, 0)
+
+
+def review_deleted(review):
+    _refresh_catalog()
+    rating = getattr(review, '_stored_rating', None)
+    _apply(review.course_id, -(review.rating if rating is None else rating), -1)
+
+
+def submit_review(user, course, rating, comment=''):
+    """Add or replace ``user``'s review of ``course``. Returns (review, created)."""
+    with transaction.atomic():
+        review, created = Review.objects.select_for_update().get_or_create(
+            course=course, user=user, defaults={'rating': rating, 'comment': comment}
+        )
+        if not created:
+            review.rating = rating
+            review.comment = comment
+            review.save(update_fields=['rating', 'comment'])
+    return review, created
+
+
+def _totals(count, total):
+    return {'rating_count': count, 'rating_sum': total, 'rating_avg': total / count if count else 0}
+
+
+def rebuild_course_rating(course_id):
+    """Recompute the rating of one course from its reviews, and its instructor's from their courses"""
+    course = Review.objects.filter(course_id=course_id).aggregate(count=Count('id'), total=Sum('rating'))
+    Course.objects.filter(pk=course_id).update(**_totals(course['count'], course['total'] or 0))
+    instructor_id = Course.objects.filter(pk=course_id).values_list('instructor_id', flat=True).first()
+    if instructor_id is not None:
+        instructor = Course.objects.filter(instructor_id=instructor_id).aggregate(
+            count=Sum('rating_count'), total=Sum('rating_sum')
+        )
+        InstructorProfile.objects.filter(pk=instructor_id).update(
+            **_totals(instructor['count'] or 0, instructor['total'] or 0)
+        )
+
+
+def rebuild_ratings():
+    """Recompute every course and instructor rating from the reviews. Returns the number of courses."""
+    totals = {
+        row['course']: (row['count'], row['total'])
+        for row in Review.objects.order_by().values('course').annotate(count=Count('id'), total=Sum('rating'))
+    }
+    courses = []
+    for course in Course.objects.only('id', 'instructor_id'):
+        count, total = totals.get(course.pk, (0, 0))
+        course.rating_count, course.rating_sum = count, total
+        course.rating_avg = total / count if count else 0
+        courses.append(course)
+
+    instructors = {}
+    for course in courses:
+        count, total = instructors.get(course.instructor_id, (0, 0))
+        instructors[course.instructor_id] = (count + course.rating_count, total + course.rating_sum)
+    profiles = [
+        InstructorProfile(pk=pk, rating_count=count, rating_sum=total, rating_avg=total / count if count else 0)
+        for pk, (count, total) in instructors.items()
+    ]
+    profiles += [
+        InstructorProfile(pk=pk, rating_count=0, rating_sum=0, rating_avg=0)
+        for pk in InstructorProfile.objects.exclude(pk__in=list(instructors)).values_list('pk', flat=True)
+    ]
+    with transaction.atomic():
+        Course.objects.bulk_update(courses, RATING_FIELDS, batch_size=500)
+        InstructorProfile.objects.bulk_update(profiles, RATING_FIELDS, batch_size=500)
+    logger.info(f"Rebuilt ratings for {len(courses)} courses and {len(profiles)} instructors")
+    return len(courses)
@@ -0,0 +1,279 @@
+"""
+Course search.
+
+The catalog used to search with ``title__icontains | description__icontains``,
+a full scan of the course table for every query that also missed the
+short description, learning outcomes and lesson titles.
+
+A search backend indexes one document per course (title, short description,
+description, learning outcomes and its lesson titles) and turns a query into a
+filter of the matching courses and a ``search_rank`` expression (lower is
+better). Every word of the query must match, the last one as a prefix, so
+results follow the user as they type.
+
+``Fts5SearchBackend`` keeps the documents in the SQLite FTS5 table
+``lms_course_search`` (rowid = course id, created by migration 0008) and
+ranks with ``bm25`` weighted towards the title. Course and lesson signals
+re-index a course with one DELETE and one INSERT ... SELECT.
+``DatabaseSearchBackend`` is the fallback for databases without FTS5: the
+same matching with ``icontains`` and a title-first rank. A PostgreSQL
+backend maps onto the same interface with a ``tsvector`` document column
+under a GIN index, ``to_tsquery('word:*')`` and ``ts_rank``.
+
+``COURSE_SEARCH_BACKEND`` selects the backend: ``fts5``, ``database``, or
+``auto`` (FTS5 when the index table exists). ``facet_counts`` counts the
+results per category, difficulty and price in one conditional aggregate
+query, each facet under the other facets' filters.
+"""
+import re
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Course, Lesson
+
+logger = logging.getLogger(__name__)
+
+INDEX_TABLE = 'lms_course_search'
+SEARCH_FIELDS = ('title', 'short_description', 'description', 'learning_outcomes')
+# bm25 column weights: title, short description, description, learning outcomes, lesson titles
+RANK_WEIGHTS = (10.0, 4.0, 1.0, 2.0, 2.0)
+MAX_TERMS = 8
+
+
+def query_terms(q):
+    """Lowercase words of a query, at most MAX_TERMS"""
+    return re.findall(r'\w+', (q or '').lower())[:MAX_TERMS]
+
+
+class BaseSearchBackend:
+    """Interface of a course search backend"""
+
+    name = None
+
+    def available(self):
+        return True
+
+    def matches(self, terms):
+        """Q matching the courses that contain every term"""
+        raise NotImplementedError
+
+    def rank(self, terms):
+        """Expression ranking a matching course, lower is better"""
+        raise NotImplementedError
+
+    def index(self, course_ids):
+        """(Re)index the documents of ``course_ids``"""
+
+    def remove(self, course_ids):
+        """Drop ``course_ids`` from the index"""
+
+    def rebuild(self):
+        """Re-index every course. Returns the number of documents."""
+        return Course.objects.count()
+
+
+class Fts5SearchBackend(BaseSearchBackend):
+    """SQLite FTS5 index with bm25 ranking and prefix matching"""
+
+    name = 'fts5'
+
+    def __init__(self):
+        self._available = None
+
+    def available(self):
+        if self._available is None:
+            self._available = (
+                connection.vendor == 'sqlite' and INDEX_TABLE in connection.introspection.table_names()
+            )
+        return self._available
+
+    @staticmethod
+    def match_expression(terms):
+        # Quoted so FTS5 operators in the input are plain words; the last word is a prefix
+        return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+    def matches(self, terms):
+        expression = self.match_expression(terms)
+        return Q(pk__in=RawSQL(f'SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s', (expression,)))
+
+    def rank(self, terms):
+        # Evaluated only for matching rows, each a rowid lookup in the index
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        return RawSQL(
+            f'SELECT bm25({INDEX_TABLE}, {weights}) FROM {INDEX_TABLE} '
+            f'WHERE {INDEX_TABLE} MATCH %s AND {INDEX_TABLE}.rowid = {Course._meta.db_table}.id',
+            (self.match_expression(terms),),
+        )
+
+    def _documents_sql(self, where=''):
+        course_table = Course._meta.db_table
+        lesson_table = Lesson._meta.db_table
+        return (
+            f'INSERT INTO {INDEX_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}, lessons) '
+            f'SELECT c.id, {", ".join(f"c.{field}" for field in SEARCH_FIELDS)}, '
+            f"COALESCE((SELECT group_concat(l.title, ' ') FROM {lesson_table} l WHERE l.course_id = c.id), '') "
+            f'FROM {course_table} c {where}'
+        )
+
+    def index(self, course_ids):
+        course_ids = list(course_ids)
+        if not course_ids or not self.available():
+            return
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid IN ({placeholders})', course_ids)
+            cursor.execute(self._documents_sql(f'WHERE c.id IN ({placeholders})'), course_ids)
+
+    def remove(self, course_ids):
+        course_ids = list(course_ids)
+        if not course_ids or not self.available():
+            return
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid IN ({placeholders})', course_ids)
+
+    def rebuild(self):
+        if not self.available():
+            raise DatabaseError(f"The {INDEX_TABLE} table does not exist; run migrate on SQLite with FTS5")
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+            cursor.execute(self._documents_sql())
+            cursor.execute(f"INSERT INTO {INDEX_TABLE} ({INDEX_TABLE}) VALUES ('optimize')")
+            cursor.execute(f'SELECT count(*) FROM {INDEX_TABLE}')
+            return cursor.fetchone()[0]
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """icontains matching for databases without a full-text index"""
+
+    name = 'database'
+
+    def matches(self, terms):
+        courses = Course.objects.all()
+        for term in terms:
+            matching = Q(lessons__title__icontains=term)
+            for field in SEARCH_FIELDS:
+                matching |= Q(**{f'{field}__icontains': term})
+            courses = courses.filter(matching)
+        # A subquery, so several matching lessons do not repeat a course
+        return Q(pk__in=courses.values('pk'))
+
+    def rank(self, terms):
+        in_title = Q()
+        for term in terms:
+            in_title &= Q(title__icontains=term)
+        return Case(When(in_title, then=Value(0)), default=Value(1), output_field=IntegerField())
+
+
+BACKENDS = {
+    'fts5': Fts5SearchBackend,
+    'database': DatabaseSearchBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _instance(name):
+    if name not in _backends:
+        with _backends_lock:
+            if name not in _backends:
+                _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def get_search_backend(name=None):
+    """The configured search backend (see COURSE_SEARCH_BACKEND)"""
+    name = name or getattr(settings, 'COURSE_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        fts5 = _instance('fts5')
+        return fts5 if fts5.available() else _instance('database')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown search backend: {name}")
+    return _instance(name)
+
+
+def search_courses(queryset, q):
+    """``queryset`` narrowed to the courses matching ``q``"""
+    terms = query_terms(q)
+    if not terms:
+        return queryset
+    return queryset.filter(get_search_backend().matches(terms))
+
+
+def rank_courses(queryset, q):
+    """
+    ``queryset`` (already narrowed by ``search_courses``) annotated with
+    ``search_rank``. Only rank querysets that are listed: an annotation makes
+    counts run over a subquery.
+    """
+    terms = query_terms(q)
+    if not terms:
+        return queryset
+    return queryset.annotate(search_rank=get_search_backend().rank(terms))
+
+
+def index_courses(course_ids):
+    try:
+        get_search_backend().index(course_ids)
+    except DatabaseError as e:
+        # Search must not break saving a course; rebuild_search_index repairs the index
+        logger.error(f"Failed to index courses {list(course_ids)}: {str(e)}")
+
+
+def remove_courses(course_ids):
+    try:
+        get_search_backend().remove(course_ids)
+    except DatabaseError as e:
+        logger.error(f"Failed to remove courses {list(course_ids)} from the search index: {str(e)}")
+
+
+def course_filters(categories, category=None, price=None, difficulty=None):
+    """{facet: Q} for the selected catalog filters; ``categories`` resolves the category slug"""
+    filters = {}
+    if category:
+        ids = [c.pk for c in categories if c.slug == category]
+        filters['category'] = Q(category_id=ids[0]) if ids else Q(pk__in=[])
+    if price == 'free':
+        filters['price'] = Q(is_paid=False)
+    elif price == 'paid':
+        filters['price'] = Q(is_paid=True)
+    if difficulty:
+        filters['difficulty'] = Q(difficulty=difficulty)
+    return filters
+
+
+def facet_counts(queryset, filters, categories):
+    """
+    (matching courses, {'category': {slug: n}, 'difficulty': {value: n},
+    'price': {'free': n, 'paid': n}}) in one query. A facet's counts apply
+    every filter except its own, so they show what choosing it would give.
+    """
+    def others(facet):
+        condition = Q()
+        for name, q in filters.items():
+            if name != facet:
+                condition &= q
+        return condition
+
+    everything = others(None)
+    aggregates = {'total': Count('pk', filter=everything) if filters else Count('pk')}
+    for category in categories:
+        aggregates[f'category_{category.pk}'] = Count('pk', filter=Q(category_id=category.pk) & others('category'))
+    for value, _ in Course.DIFFICULTY_CHOICES:
+        aggregates[f'difficulty_{value}'] = Count('pk', filter=Q(difficulty=value) & others('difficulty'))
+    for value, is_paid in (('free', False), ('paid', True)):
+        aggregates[f'price_{value}'] = Count('pk', filter=Q(is_paid=is_paid) & others('price'))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+    facets = {
+        'category': {category.slug: counts[f'category_{category.pk}'] for category in categories},
+        'difficulty': {value: counts[f'difficulty_{value}'] for value, _ in Course.DIFFICULTY_CHOICES},
+        'price': {value: counts[f'price_{value}'] for value in ('free', 'paid')},
+    }
+    return counts['total'], facets
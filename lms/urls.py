@@ -14,5 +14,14 @@ urlpatterns = [
     path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
     path('courses/<slug:slug>/enroll/', views.enroll_course, name='enroll_course'),
     path('courses/<slug:slug>/learn/', views.course_learn, name='course_learn'),
+    path('quizzes/<int:pk>/', views.quiz_take, name='quiz_take'),
+    path('quizzes/<int:pk>/submissions/<int:submission_id>/', views.quiz_result, name='quiz_result'),
+    path('instructor/quizzes/<int:pk>/statistics/', views.quiz_statistics, name='quiz_statistics'),
+    path('certificates/verify/', views.certificate_verify, name='certificate_verify'),
+    path('certificates/verify/<str:code>/', views.certificate_verify, name='certificate_verify'),
+    path('certificates/<str:code>/download/', views.certificate_download, name='certificate_download'),
+    path('api/courses/<slug:slug>/reviews/', views.review_submit, name='review_submit'),
     path('api/progress/', views.update_progress, name='update_progress'),
+    path('api/progress/batch/', views.update_progress_batch, name='update_progress_batch'),
+    path('api/progress/beacon/', views.update_progress_beacon, name='update_progress_beacon'),
 ]
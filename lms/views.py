@@ -1,123 +1,112 @@
+import json
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import get_object_or_404, redirect, render
-from django.db.models import Avg, Q
-from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponseBadRequest
-from .models import Course, Enrollment, InstructorProfile, Category, LessonProgress, Lesson, Module
+from django.db.models import Avg
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.views.decorators.http import require_POST
+
+from core.pagination import KeysetPaginator
+from .models import Course, Enrollment, InstructorProfile, Lesson, Module, Quiz, Submission
 from .forms import CourseForm, LessonForm, ResourceForm, ModuleForm
+from .analytics import instructor_dashboard_stats
+from .catalog import catalog_categories, catalog_page
+from .certificates import certificate_pdf, certificates_with_details, normalize_code, verify_certificate
+from .curriculum import learner_curriculum
+from .progress import get_progress_buffer
+from .quizzes import grade_submission, parse_answers, question_choices, question_statistics, quiz_questions
+from .reviews import submit_review
+from .search import course_filters, facet_counts, query_terms, rank_courses, search_courses
 
 
 def is_instructor(user):
     return hasattr(user, 'instructor_profile')
 
 
-def course_list(request):
+def _course_list_context(request):
     q = request.GET.get('q', '')
     category = request.GET.get('category')
     price = request.GET.get('price')
     difficulty = request.GET.get('difficulty')
-    sort = request.GET.get('sort', 'newest')
-
-    courses = Course.objects.filter(published=True)
-    if q:
-        courses = courses.filter(Q(title__icontains=q) | Q(description__icontains=q))
-    if category:
-        courses = courses.filter(category__slug=category)
-    if price == 'free':
-        courses = courses.filter(is_paid=False)
-    elif price == 'paid':
-        courses = courses.filter(is_paid=True)
-    if difficulty:
-        courses = courses.filter(difficulty=difficulty)
-
-    # Sorting
+    sort = request.GET.get('sort') or ('relevance' if query_terms(q) else 'newest')
+
+    categories = catalog_categories()
+    courses = search_courses(Course.objects.filter(published=True), q)
+    # The total and every facet's counts come from one query
+    filters = course_filters(categories, category, price, difficulty)
+    total, facets = facet_counts(courses, filters, categories)
+    for category_obj in categories:
+        category_obj.facet_count = facets['category'][category_obj.slug]
+    for condition in filters.values():
+        courses = courses.filter(condition)
+
+    # Sorting; every order ends in a unique key for cursor pagination
     sort_map = {
-        'newest': '-created_at',
-        'oldest': 'created_at',
-        'price_low': 'price',
-        'price_high': '-price',
-        'rating': '-rating_avg',
+        'newest': ('-created_at', '-id'),
+        'oldest': ('created_at', 'id'),
+        'price_low': ('price', '-created_at', '-id'),
+        'price_high': ('-price', '-created_at', '-id'),
+        'rating': ('-rating_avg', '-created_at', '-id'),
     }
-    order_by = sort_map.get(sort, '-created_at')
-    courses = courses.order_by(order_by)
-
-    # Pagination
-    paginator = Paginator(courses.select_related('instructor', 'category'), 9)
-    page_param = request.GET.get('page', None)
-    # Sanitize page: ensure positive integer, else None (defaults to 1)
-    if page_param is not None:
-        try:
-            page_int = int(page_param)
-            if page_int < 1:
-                page_param = None
-        except (TypeError, ValueError):
-            page_param = None
-    page_obj = paginator.get_page(page_param)
+    if sort == 'relevance' and query_terms(q):
+        courses = rank_courses(courses, q)
+        ordering = ('search_rank', '-created_at', '-id')
+    else:
+        ordering = sort_map.get(sort, sort_map['newest'])
+
+    paginator = KeysetPaginator(courses.select_related('instructor__user', 'category', 'stats'), 9, ordering=ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    page_query = request.GET.copy()
+    for param in ('cursor', 'page'):
+        page_query.pop(param, None)
 
-    categories = Category.objects.all()
-    return render(request, 'lms/course_list.html', {
+    return {
         'page_obj': page_obj,
+        'page_query': page_query.urlencode(),
         'courses': page_obj.object_list,
+        'total': total,
         'categories': categories,
+        'facets': facets,
         'title': 'Courses',
         'sort': sort,
-    })
+    }
+
+
+def course_list(request):
+    return catalog_page(
+        request, 'list', 'lms/course_list.html', 'lms/partials/course_list_content.html',
+        lambda: _course_list_context(request),
+    )
+
+
+RECENT_REVIEWS = 5
 
 
 def course_detail(request, slug):
-    course = get_object_or_404(Course.objects.select_related('instructor', 'category'), slug=slug, published=True)
-    return render(request, 'lms/course_detail.html', {
-        'course': course,
-        'title': course.title,
-    })
+    def build_context():
+        course = get_object_or_404(
+            Course.objects.select_related('instructor__user', 'category', 'stats'), slug=slug, published=True
+        )
+        reviews = course.reviews.select_related('user').order_by('-created_at')[:RECENT_REVIEWS]
+        return {'course': course, 'reviews': reviews, 'title': course.title}
+
+    return catalog_page(
+        request, 'detail', 'lms/course_detail.html', 'lms/partials/course_detail_content.html', build_context,
+    )
 
 
 @login_required
 @user_passes_test(is_instructor)
 def instructor_dashboard(request):
     instructor = request.user.instructor_profile
-    courses = Course.objects.filter(instructor=instructor).select_related('category').prefetch_related('enrollments')
-    
-    # Calculate dashboard statistics
-    total_courses = courses.count()
-    published_courses = courses.filter(status='published').count()
-    draft_courses = courses.filter(status='draft').count()
-    total_students = instructor.total_students
-    total_revenue = sum(course.price * course.enrollment_count for course in courses if course.is_paid)
-    
-    # Recent enrollments (last 30 days)
-    from datetime import datetime, timedelta
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_enrollments = Enrollment.objects.filter(
-        course__instructor=instructor,
-        created_at__gte=thirty_days_ago
-    ).count()
-    
-    # Course performance data
-    course_stats = []
-    for course in courses:
-        course_stats.append({
-            'course': course,
-            'enrollments': course.enrollment_count,
-            'completion_rate': course.completion_rate,
-            'average_progress': course.get_average_progress(),
-            'revenue': course.price * course.enrollment_count if course.is_paid else 0,
-        })
+    courses, course_stats, stats = instructor_dashboard_stats(instructor)
     
     context = {
         'courses': courses,
         'course_stats': course_stats,
         'instructor': instructor,
-        'stats': {
-            'total_courses': total_courses,
-            'published_courses': published_courses,
-            'draft_courses': draft_courses,
-            'total_students': total_students,
-            'total_revenue': total_revenue,
-            'recent_enrollments': recent_enrollments,
-            'average_rating': instructor.average_rating,
-        },
+        'stats': stats,
         'title': 'Instructor Dashboard'
     }
     
@@ -303,22 +292,31 @@ def instructor_course_manage(request, slug):
 
 @login_required
 def student_dashboard(request):
-    enrollments = Enrollment.objects.filter(user=request.user).select_related('course')
-    return render(request, 'lms/student_dashboard.html', {'enrollments': enrollments, 'title': 'My Learning'})
+    enrollments = list(Enrollment.objects.filter(user=request.user).select_related('course', 'certificate'))
+    certificates = sum(1 for enrollment in enrollments if hasattr(enrollment, 'certificate'))
+    return render(request, 'lms/student_dashboard.html', {
+        'enrollments': enrollments, 'certificates': certificates, 'title': 'My Learning'
+    })
 
 
-def _recompute_enrollment_progress(enrollment: Enrollment):
-    lessons = Lesson.objects.filter(course=enrollment.course).count()
-    if lessons == 0:
-        enrollment.progress = 0
-        enrollment.completed = False
-        enrollment.save(update_fields=['progress', 'completed'])
-        return
-    completed = LessonProgress.objects.filter(enrollment=enrollment, completed=True).count()
-    pct = (completed / lessons) * 100.0
-    enrollment.progress = round(pct, 2)
-    enrollment.completed = completed == lessons
-    enrollment.save(update_fields=['progress', 'completed'])
+@login_required
+def certificate_download(request, code):
+    certificate = get_object_or_404(certificates_with_details(), certificate_code=normalize_code(code))
+    if certificate.enrollment.user_id != request.user.pk and not request.user.is_staff:
+        raise Http404('No such certificate')
+    return FileResponse(
+        certificate_pdf(certificate).open('rb'),
+        filename=f"certificate-{certificate.certificate_code}.pdf",
+        content_type='application/pdf',
+    )
+
+
+def certificate_verify(request, code=None):
+    code = code or request.GET.get('code', '')
+    certificate = verify_certificate(code) if code else None
+    return render(request, 'lms/certificate_verify.html', {
+        'code': code, 'certificate': certificate, 'title': 'Verify a Certificate'
+    })
 
 
 @login_required
@@ -333,24 +331,93 @@ def update_progress(request):
 
     if not (course_slug and lesson_id and last_position is not None):
         return HttpResponseBadRequest('Missing parameters')
-
-    course = get_object_or_404(Course, slug=course_slug)
-    enrollment = get_object_or_404(Enrollment, user=request.user, course=course)
-    lesson = get_object_or_404(Lesson, id=lesson_id, course=course)
-
-    lp, _ = LessonProgress.objects.get_or_create(enrollment=enrollment, lesson=lesson)
     try:
-        lp.last_position = float(last_position)
-        wd = max(0.0, float(watched_delta))
-        lp.seconds_watched = max(lp.seconds_watched, lp.seconds_watched + wd)
-        if completed:
-            lp.completed = True
-        lp.save()
+        lesson_id = int(lesson_id)
+        last_position = float(last_position)
+        watched_delta = max(0.0, float(watched_delta))
     except ValueError:
         return HttpResponseBadRequest('Invalid numeric values')
 
-    _recompute_enrollment_progress(enrollment)
-    return JsonResponse({'ok': True, 'progress': enrollment.progress, 'lesson_completed': lp.completed})
+    # Buffered and written in batches; see lms.progress
+    result = get_progress_buffer().record(
+        request.user.pk, course_slug, lesson_id, last_position, watched_delta, completed
+    )
+    if result is None:
+        raise Http404('Not enrolled in this course or no such lesson')
+    progress, lesson_completed = result
+    return JsonResponse({'ok': True, 'progress': progress, 'lesson_completed': lesson_completed})
+
+
+MAX_BATCH_LESSONS = 100
+
+
+def _parse_progress_batch(body):
+    """(course slug, [(lesson id, last position, watched delta, completed)]) from a batch JSON body"""
+    try:
+        data = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid JSON')
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    course_slug = data.get('course_slug')
+    lessons = data.get('lessons')
+    if not course_slug or not isinstance(lessons, list) or not lessons:
+        raise ValueError('Missing parameters')
+    if len(lessons) > MAX_BATCH_LESSONS:
+        raise ValueError(f'At most {MAX_BATCH_LESSONS} lessons per request')
+    heartbeats = []
+    for item in lessons:
+        if not isinstance(item, dict) or item.get('lesson_id') is None or item.get('last_position') is None:
+            raise ValueError('Each lesson needs lesson_id and last_position')
+        try:
+            heartbeats.append((
+                int(item['lesson_id']),
+                float(item['last_position']),
+                max(0.0, float(item.get('watched_delta') or 0)),
+                item.get('completed') is True,
+            ))
+        except (TypeError, ValueError):
+            raise ValueError('Invalid numeric values')
+    return course_slug, heartbeats
+
+
+def _record_progress_batch(user, course_slug, heartbeats):
+    result = get_progress_buffer().record_batch(user.pk, course_slug, heartbeats)
+    if result is None:
+        raise Http404('Not enrolled in this course or no such lesson')
+    return result
+
+
+@login_required
+@require_POST
+def update_progress_batch(request):
+    """Progress for several lessons in one JSON body: {course_slug, lessons: [{lesson_id, last_position, watched_delta, completed}]}"""
+    try:
+        course_slug, heartbeats = _parse_progress_batch(request.body)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    progress, lessons = _record_progress_batch(request.user, course_slug, heartbeats)
+    return JsonResponse({
+        'ok': True,
+        'progress': progress,
+        'lessons': {str(lesson_id): completed for lesson_id, completed in lessons.items()},
+    })
+
+
+@login_required
+@require_POST
+def update_progress_beacon(request):
+    """
+    The batch endpoint for navigator.sendBeacon on page unload: the same JSON
+    in a ``payload`` form field, next to csrfmiddlewaretoken since a beacon
+    cannot set headers. Nobody reads the response.
+    """
+    try:
+        course_slug, heartbeats = _parse_progress_batch(request.POST.get('payload'))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    _record_progress_batch(request.user, course_slug, heartbeats)
+    return HttpResponse(status=204)
 
 
 @login_required
@@ -363,12 +430,18 @@ def enroll_course(request, slug):
 
 @login_required
 def course_learn(request, slug):
-    course = get_object_or_404(Course, slug=slug)
+    course = get_object_or_404(Course.objects.select_related('instructor__user', 'category'), slug=slug)
     # Ensure the user is enrolled
-    if not Enrollment.objects.filter(user=request.user, course=course).exists():
+    enrollment = Enrollment.objects.filter(user=request.user, course=course).first()
+    if enrollment is None:
         messages.error(request, 'You must enroll to access the course.')
         return redirect('lms:course_detail', slug=slug)
-    return render(request, 'lms/course_learn.html', {'course': course, 'title': f"Learn: {course.title}"})
+    return render(request, 'lms/course_learn.html', {
+        'course': course,
+        'enrollment': enrollment,
+        'curriculum': learner_curriculum(course, enrollment),
+        'title': f"Learn: {course.title}",
+    })
 
 
 # Lesson edit/delete for instructors
@@ -419,3 +492,98 @@ def instructor_lesson_delete(request, slug, pk):
         'course': course,
         'lesson': lesson,
     })
+
+
+# Quizzes
+def _owns_course(user, course):
+    return user.is_staff or (is_instructor(user) and course.instructor_id == user.instructor_profile.pk)
+
+
+@login_required
+def quiz_take(request, pk):
+    quiz = get_object_or_404(Quiz.objects.select_related('course'), pk=pk)
+    if not _owns_course(request.user, quiz.course) and not Enrollment.objects.filter(
+        user=request.user, course_id=quiz.course_id
+    ).exists():
+        messages.error(request, 'You must enroll to take this quiz.')
+        return redirect('lms:course_detail', slug=quiz.course.slug)
+
+    if request.method == 'POST':
+        submission = grade_submission(quiz, request.user, parse_answers(request.POST))
+        return redirect('lms:quiz_result', pk=quiz.pk, submission_id=submission.pk)
+
+    questions = [(question, question_choices(question)) for question in quiz_questions(quiz)]
+    return render(request, 'lms/quiz_take.html', {
+        'quiz': quiz,
+        'questions': questions,
+        'title': quiz.title,
+    })
+
+
+@login_required
+def quiz_result(request, pk, submission_id):
+    submission = get_object_or_404(
+        Submission.objects.select_related('quiz__course').prefetch_related('answers__question'),
+        pk=submission_id, quiz_id=pk,
+    )
+    if submission.user_id != request.user.pk and not _owns_course(request.user, submission.quiz.course):
+        raise Http404('No such submission')
+    # (answer, text of the chosen choice, text of the correct choice)
+    answers = []
+    for answer in sorted(submission.answers.all(), key=lambda answer: answer.question_id):
+        choices = dict(question_choices(answer.question))
+        answers.append((answer, choices.get(answer.choice, ''), choices.get(answer.question.correct_choice, '')))
+    return render(request, 'lms/quiz_result.html', {
+        'quiz': submission.quiz,
+        'submission': submission,
+        'answers': answers,
+        'correct': sum(1 for answer, _, _ in answers if answer.is_correct),
+        'title': f"Result: {submission.quiz.title}",
+    })
+
+
+@login_required
+@user_passes_test(is_instructor)
+def quiz_statistics(request, pk):
+    quiz = get_object_or_404(Quiz.objects.select_related('course'), pk=pk)
+    if not _owns_course(request.user, quiz.course):
+        messages.error(request, 'You do not have permission to view statistics for this quiz.')
+        return redirect('lms:instructor_dashboard')
+    summary, questions = question_statistics(quiz)
+    return render(request, 'lms/quiz_statistics.html', {
+        'quiz': quiz,
+        'summary': summary,
+        'questions': questions,
+        'title': f"Statistics: {quiz.title}",
+    })
+
+
+# Reviews
+MAX_REVIEW_LENGTH = 2000
+
+
+@login_required
+@require_POST
+def review_submit(request, slug):
+    course = get_object_or_404(Course, slug=slug, published=True)
+    if not Enrollment.objects.filter(user=request.user, course=course).exists():
+        return JsonResponse({'ok': False, 'error': 'Enroll in the course to review it'}, status=403)
+    try:
+        rating = int(request.POST.get('rating', ''))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid rating')
+    if not 1 <= rating <= 5:
+        return HttpResponseBadRequest('Rating must be between 1 and 5')
+    comment = request.POST.get('comment', '').strip()
+    if len(comment) > MAX_REVIEW_LENGTH:
+        return HttpResponseBadRequest(f'Comment longer than {MAX_REVIEW_LENGTH} characters')
+
+    review, created = submit_review(request.user, course, rating, comment)
+    course.refresh_from_db(fields=['rating_avg', 'rating_count'])
+    return JsonResponse({
+        'ok': True,
+        'created': created,
+        'review': {'id': review.pk, 'rating': review.rating, 'comment': review.comment},
+        'rating_avg': round(course.rating_avg, 2),
+        'rating_count': course.rating_count,
+    }, status=201 if created else 200)
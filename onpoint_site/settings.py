@@ -69,6 +69,18 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by every worker process; use Redis in production for atomic increments
+    'ratelimit': {
+        'BACKEND': os.environ.get('RATE_LIMIT_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('RATE_LIMIT_CACHE_LOCATION', os.path.join(BASE_DIR, '.cache', 'ratelimit')),
+    },
+}
+RATE_LIMIT_CACHE = 'ratelimit'
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -129,6 +141,40 @@ JUDGE0_API_URL = os.environ.get('JUDGE0_API_URL', 'https://judge0-ce.p.rapidapi.
 # If you are using RapidAPI, you may set JUDGE0_API_HOST and JUDGE0_API_KEY
 JUDGE0_API_HOST = os.environ.get('JUDGE0_API_HOST', 'judge0-ce.p.rapidapi.com')
 JUDGE0_API_KEY = os.environ.get('JUDGE0_API_KEY', '4063869391mshafb793812d957c1p1ce4b9jsn7a1b4845c3e6')
+# Shared Judge0 client: connection pool size and circuit breaker tuning
+JUDGE0_POOL_SIZE = int(os.environ.get('JUDGE0_POOL_SIZE', 10))
+JUDGE0_BREAKER_THRESHOLD = int(os.environ.get('JUDGE0_BREAKER_THRESHOLD', 5))
+JUDGE0_BREAKER_RESET_SECONDS = int(os.environ.get('JUDGE0_BREAKER_RESET_SECONDS', 30))
+# Code runner for judging: 'judge0', 'local' (Python/JavaScript subprocesses
+# on this machine) or 'auto' (local where supported, Judge0 otherwise)
+CODE_RUNNER = os.environ.get('CODE_RUNNER', 'judge0')
+LOCAL_RUNNER_WORKERS = int(os.environ.get('LOCAL_RUNNER_WORKERS', 0)) or None  # default: CPU count
+LOCAL_RUNNER_PYTHON = os.environ.get('LOCAL_RUNNER_PYTHON', '')  # default: this interpreter
+LOCAL_RUNNER_NODE = os.environ.get('LOCAL_RUNNER_NODE', 'node')
+
+# Stop judging a submission at its first failing test case
+JUDGE_EARLY_EXIT = os.environ.get('JUDGE_EARLY_EXIT', 'True') == 'True'
+# Identical "Run" requests are answered from a per-process result cache
+RUN_CACHE_MAX_ENTRIES = int(os.environ.get('RUN_CACHE_MAX_ENTRIES', 1000))
+RUN_CACHE_TTL_SECONDS = int(os.environ.get('RUN_CACHE_TTL_SECONDS', 3600))
+
+# Lesson heartbeats are buffered per process and written in batches; 0 writes each one through
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.environ.get('PROGRESS_FLUSH_INTERVAL_SECONDS', 5))
+PROGRESS_BUFFER_MAX_ENTRIES = int(os.environ.get('PROGRESS_BUFFER_MAX_ENTRIES', 5000))
+VIEW_COUNT_FLUSH_INTERVAL_SECONDS = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL_SECONDS', 10))
+VIEW_COUNT_BUFFER_MAX_ENTRIES = int(os.environ.get('VIEW_COUNT_BUFFER_MAX_ENTRIES', 1000))
+
+# Catalog search: 'fts5' (SQLite full-text index), 'database' (icontains) or 'auto'
+COURSE_SEARCH_BACKEND = os.environ.get('COURSE_SEARCH_BACKEND', 'auto')
+# Anonymous course list/detail fragments; catalog edits invalidate them immediately
+CATALOG_CACHE_SECONDS = int(os.environ.get('CATALOG_CACHE_SECONDS', 300))
+SITE_URL = os.environ.get('SITE_URL', 'https://onpointsoft.pythonanywhere.com')  # printed on certificates
+CERTIFICATE_WORKERS = int(os.environ.get('CERTIFICATE_WORKERS', 0)) or None  # default: CPU count
+CERTIFICATE_TEMPLATE = os.environ.get('CERTIFICATE_TEMPLATE', '')  # background image; default: built-in border
+CERTIFICATE_FONT = os.environ.get('CERTIFICATE_FONT', '')  # TrueType file; default: Pillow's font
+# Learning resource PDFs are read in a background process pool, each for at most this long
+DOCUMENT_EXTRACTION_WORKERS = int(os.environ.get('DOCUMENT_EXTRACTION_WORKERS', 2))
+DOCUMENT_EXTRACTION_TIMEOUT_SECONDS = int(os.environ.get('DOCUMENT_EXTRACTION_TIMEOUT_SECONDS', 120))
 
 # UI preferences
 DEFAULT_THEME = os.environ.get('DEFAULT_THEME', 'light')  # 'light' or 'dark'
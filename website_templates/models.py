@@ -101,14 +101,14 @@ class WebsiteTemplate(models.Model):
         return [tech.strip() for tech in self.technologies.split(',') if tech.strip()]
     
     def increment_view_count(self):
-        """Increment view count"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Increment view count; written in batches by core.counters"""
+        from core.counters import get_view_counter
+        get_view_counter().increment(self)
     
     def increment_download_count(self):
-        """Increment download count"""
-        self.download_count += 1
-        self.save(update_fields=['download_count'])
+        """Increment download count; written in batches by core.counters"""
+        from core.counters import get_view_counter
+        get_view_counter().increment(self, 'download_count')
     
     def __str__(self):
         return self.title